@@ -0,0 +1,70 @@
+from decimal import Decimal, InvalidOperation
+
+
+DECIMALS = 8
+COIN = 10 ** DECIMALS
+"""int: Number of base units in one coin. Every amount in the ledger is an int of base units."""
+
+
+def to_units(coins):
+    """
+    Converts an amount in coins to integer base units, exactly.
+
+    Floats are converted through their shortest decimal representation, so 0.1
+    becomes exactly 10_000_000 units instead of carrying binary rounding error.
+
+    Args:
+        coins (int, float, str or Decimal): The amount in coins.
+
+    Returns:
+        int: The amount in base units.
+
+    Raises:
+        ValueError: If the amount is not a number or is finer than one base unit.
+        TypeError: If the amount has an unsupported type.
+    """
+    if isinstance(coins, bool):
+        raise TypeError("Amounts cannot be booleans")
+    if isinstance(coins, int):
+        return coins * COIN
+    if isinstance(coins, float):
+        coins = repr(coins)
+    if not isinstance(coins, (str, Decimal)):
+        raise TypeError(f"Unsupported amount type {type(coins).__name__}")
+    try:
+        units = Decimal(coins) * COIN
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {coins!r}")
+    if not units.is_finite() or units != units.to_integral_value():
+        raise ValueError(f"Amount {coins} is not a whole number of base units")
+    return int(units)
+
+
+def to_coins(units):
+    """
+    Converts base units to a float number of coins, for charts and numeric widgets.
+
+    Args:
+        units (int): The amount in base units.
+
+    Returns:
+        float: The amount in coins.
+    """
+    return units / COIN
+
+
+def format_amount(units):
+    """
+    Formats base units as an exact decimal string of coins.
+
+    Args:
+        units (int): The amount in base units.
+
+    Returns:
+        str: The amount in coins without trailing zeros, e.g. "989.5".
+    """
+    sign = '-' if units < 0 else ''
+    whole, fraction = divmod(abs(units), COIN)
+    if fraction:
+        return f"{sign}{whole}.{fraction:0{DECIMALS}d}".rstrip('0')
+    return f"{sign}{whole}"
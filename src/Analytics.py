@@ -0,0 +1,337 @@
+from array import array
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # pandas is optional
+    pd = None
+
+
+class ChainAnalytics:
+    """
+    Columnar view of the chain history for analysis with NumPy or pandas.
+
+    Blocks and transactions are stored in typed arrays, one column per field, with
+    addresses interned to small integer ids like in UTXOTable. `update` only reads the
+    blocks appended since the previous call; if the chain was reorganized (or another
+    system is passed), the columns are first truncated back to the last shared block.
+
+    Amounts are in base units. The coinbase has no sender, stored as owner id -1.
+    The transaction columns have one row per output, the fee being carried by the
+    first one; the contributions of the cosigners of a batch transaction appear as
+    extra rows moving them to the sender, who pays the outputs.
+
+    Attributes:
+        hashes (list): Hash of each ingested block, to detect reorganizations.
+        block_height (array): Height of each block.
+        block_time (array): Timestamp of each block, in seconds since the epoch.
+        block_tx_count (array): Number of transactions of each block.
+        block_fees (array): Sum of the fees paid by the transactions of each block.
+        block_reward (array): Amount created by the coinbase of each block (reward plus fees).
+        block_supply (array): Money in circulation after each block.
+        block_tx_start (array): Row of the first transaction of each block in the tx columns.
+        tx_height (array): Height of the block of each transaction row.
+        tx_sender (array): Owner id of each sender, -1 for coinbase transactions.
+        tx_receiver (array): Owner id of each receiver.
+        tx_amount (array): Amount sent by each transaction.
+        tx_fee (array): Fee paid by each transaction, 0 for coinbase transactions.
+        txids (list): Txid of each transaction row.
+        tx_heights (dict): Txid to the height of the block that confirmed it.
+        adresses (list): Owner id to address.
+        owner_ids (dict): Address to owner id.
+
+    Methods:
+        update(system): Ingests the blocks appended since the last update.
+        balance_history(): Returns the balance of every address after every block.
+        utxo_ages(utxos): Returns the age, in blocks, of confirmed outputs.
+        utxo_age_histogram(utxos, bins): Returns a histogram of the UTXO ages.
+        columns(): Returns every column as a NumPy array.
+        to_pandas(): Returns the block and transaction columns as DataFrames.
+        save(file): Writes the columns to a compressed NumPy archive.
+    """
+    BLOCK_COLUMNS = ('block_height', 'block_time', 'block_tx_count', 'block_fees', 'block_reward', 'block_supply', 'block_tx_start')
+    TX_COLUMNS = ('tx_height', 'tx_sender', 'tx_receiver', 'tx_amount', 'tx_fee')
+
+    def __init__(self):
+        """
+        Initializes empty columns.
+        """
+        self.hashes = []
+        self.block_height = array('q')
+        self.block_time = array('d')
+        self.block_tx_count = array('q')
+        self.block_fees = array('q')
+        self.block_reward = array('q')
+        self.block_supply = array('q')
+        self.block_tx_start = array('q')
+        self.tx_height = array('q')
+        self.tx_sender = array('i')
+        self.tx_receiver = array('i')
+        self.tx_amount = array('q')
+        self.tx_fee = array('q')
+        self.txids = []
+        self.tx_heights = {}
+        self.adresses = []
+        self.owner_ids = {}
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def owner_id(self, adress):
+        """
+        Returns the id of an address, interning it on first use.
+
+        Args:
+            adress (str): The address.
+
+        Returns:
+            int: The owner id.
+        """
+        owner = self.owner_ids.get(adress)
+        if owner is None:
+            owner = len(self.adresses)
+            self.owner_ids[adress] = owner
+            self.adresses.append(adress)
+        return owner
+
+    def update(self, system):
+        """
+        Ingests the blocks appended to the chain of `system` since the last update.
+
+        Args:
+            system (System): The system.
+
+        Returns:
+            int: Number of blocks ingested.
+        """
+        chain = system.blockchain
+        shared = len(self.hashes)
+        while shared > 0 and (shared > len(chain) or chain[shared - 1].hash != self.hashes[shared - 1]):
+            shared -= 1
+        if shared < len(self.hashes):
+            self.truncate(shared)
+
+        for block in chain[shared:]:
+            self.add_block(block)
+        return len(chain) - shared
+
+    def add_block(self, block):
+        """
+        Appends a block and its transactions to the columns.
+
+        Args:
+            block (Block): The block following the last ingested one.
+        """
+        fees = 0
+        reward = 0
+        self.block_tx_start.append(len(self.tx_height))
+        for tx in block.transactions:
+            self.tx_heights[tx['txid']] = block.index
+            if tx['sender'] is None:
+                self.add_row(block.index, -1, tx['receiver'], tx['amount'], 0, tx['txid'])
+                reward += tx['amount']
+                continue
+
+            sender = self.owner_id(tx['sender'])
+            for adress, contribution in tx.get('cosigners', ()):
+                self.add_row(block.index, self.owner_id(adress), tx['sender'], contribution, 0, tx['txid'])
+            fee = tx['mining_fee']
+            for receiver, amount in tx.get('outputs', [(tx['receiver'], tx['amount'])]):
+                self.add_row(block.index, sender, receiver, amount, fee, tx['txid'])
+                fee = 0
+            fees += tx['mining_fee']
+
+        supply = self.block_supply[-1] if self.block_supply else 0
+        self.hashes.append(block.hash)
+        self.block_height.append(block.index)
+        self.block_time.append(datetime.fromisoformat(block.timestamp).timestamp())
+        self.block_tx_count.append(block.tx_count)
+        self.block_fees.append(fees)
+        self.block_reward.append(reward)
+        self.block_supply.append(supply + reward - fees)
+
+    def add_row(self, height, sender, receiver, amount, fee, txid):
+        """
+        Appends one row to the transaction columns.
+
+        Args:
+            height (int): Height of the block.
+            sender (int): Owner id of the sender, -1 for a coinbase.
+            receiver (str): Address of the receiver.
+            amount (int): Amount received.
+            fee (int): Fee paid by the sender on this row.
+            txid (str): Txid of the transaction.
+        """
+        self.tx_height.append(height)
+        self.tx_sender.append(sender)
+        self.tx_receiver.append(self.owner_id(receiver))
+        self.tx_amount.append(amount)
+        self.tx_fee.append(fee)
+        self.txids.append(txid)
+
+    def truncate(self, n_blocks):
+        """
+        Drops every block after the first `n_blocks`, with their transactions.
+
+        Args:
+            n_blocks (int): Number of blocks kept.
+        """
+        n_txs = self.block_tx_start[n_blocks] if n_blocks < len(self.hashes) else len(self.tx_height)
+        for txid in self.txids[n_txs:]:
+            self.tx_heights.pop(txid, None)
+        del self.txids[n_txs:]
+        del self.hashes[n_blocks:]
+        for name in self.BLOCK_COLUMNS:
+            del getattr(self, name)[n_blocks:]
+        for name in self.TX_COLUMNS:
+            del getattr(self, name)[n_txs:]
+
+    def balance_history(self):
+        """
+        Returns the balance of every address after every block.
+
+        A transaction moves `amount` to the receiver and takes `amount + fee` from the
+        sender (the change comes back to it); the fees reach the miner through the
+        coinbase of the same block.
+
+        Returns:
+            numpy.ndarray or list: Matrix of shape (blocks, addresses), in base units;
+            a list of rows without NumPy.
+        """
+        n_blocks = len(self.hashes)
+        if not n_blocks:
+            return np.zeros((0, len(self.adresses)), dtype=np.int64) if np is not None else []
+        first = self.block_height[0]
+        if np is not None:
+            cols = self.columns()
+            rows = cols['tx_height'] - first
+            deltas = np.zeros((n_blocks, len(self.adresses)), dtype=np.int64)
+            np.add.at(deltas, (rows, cols['tx_receiver']), cols['tx_amount'])
+            regular = cols['tx_sender'] >= 0
+            np.add.at(
+                deltas,
+                (rows[regular], cols['tx_sender'][regular]),
+                -(cols['tx_amount'][regular] + cols['tx_fee'][regular])
+            )
+            return np.cumsum(deltas, axis=0)
+
+        history = []
+        balances = [0] * len(self.adresses)
+        start = 0
+        for row in range(n_blocks):
+            stop = self.block_tx_start[row + 1] if row + 1 < n_blocks else len(self.tx_height)
+            for i in range(start, stop):
+                balances[self.tx_receiver[i]] += self.tx_amount[i]
+                if self.tx_sender[i] >= 0:
+                    balances[self.tx_sender[i]] -= self.tx_amount[i] + self.tx_fee[i]
+            history.append(list(balances))
+            start = stop
+        return history
+
+    def utxo_ages(self, utxos):
+        """
+        Returns the age of every confirmed output, in blocks since the block that created it.
+        Outputs of pending transactions are skipped.
+
+        Args:
+            utxos (iterable): The outputs, e.g. `system.UTXO_set`.
+
+        Returns:
+            list: Ages in blocks.
+        """
+        tip = self.block_height[-1] if self.hashes else 0
+        heights = self.tx_heights
+        ages = []
+        for utxo in utxos:
+            height = heights.get(utxo.txid.hex())
+            if height is not None:
+                ages.append(tip - height)
+        return ages
+
+    def utxo_age_histogram(self, utxos, bins=10):
+        """
+        Returns a histogram of the age of the confirmed outputs.
+
+        Args:
+            utxos (iterable): The outputs.
+            bins (int): Number of equal-width bins.
+
+        Returns:
+            tuple: (counts, bin edges), as NumPy arrays when available.
+        """
+        ages = self.utxo_ages(utxos)
+        if np is not None:
+            return np.histogram(np.array(ages, dtype=np.int64), bins=bins)
+        if not ages:
+            return [0] * bins, [0.0] * (bins + 1)
+        low, high = min(ages), max(ages)
+        width = (high - low) / bins or 1
+        counts = [0] * bins
+        for age in ages:
+            counts[min(int((age - low) / width), bins - 1)] += 1
+        return counts, [low + width * i for i in range(bins + 1)]
+
+    def columns(self):
+        """
+        Returns every column as a NumPy array.
+
+        Returns:
+            dict: Column name to array.
+        """
+        if np is None:
+            raise ImportError("NumPy is required for columns()")
+        cols = {name: np.frombuffer(getattr(self, name), dtype=np.float64 if name == 'block_time' else np.int64)
+                for name in self.BLOCK_COLUMNS + self.TX_COLUMNS if name not in ('tx_sender', 'tx_receiver')}
+        cols['tx_sender'] = np.frombuffer(self.tx_sender, dtype=np.int32)
+        cols['tx_receiver'] = np.frombuffer(self.tx_receiver, dtype=np.int32)
+        return {name: column.copy() for name, column in cols.items()}
+
+    def to_pandas(self):
+        """
+        Returns the block and transaction columns as DataFrames, with owner ids
+        replaced by addresses and timestamps as datetimes.
+
+        Returns:
+            dict: DataFrames 'blocks' and 'transactions'.
+        """
+        if pd is None:
+            raise ImportError("pandas is required for to_pandas()")
+        cols = self.columns()
+        adresses = np.array(self.adresses + [None], dtype=object)  # owner id -1 maps to None
+        blocks = pd.DataFrame({
+            'height': cols['block_height'],
+            'time': pd.to_datetime(cols['block_time'], unit='s'),
+            'tx_count': cols['block_tx_count'],
+            'fees': cols['block_fees'],
+            'reward': cols['block_reward'],
+            'supply': cols['block_supply'],
+        })
+        transactions = pd.DataFrame({
+            'height': cols['tx_height'],
+            'sender': adresses[cols['tx_sender']],
+            'receiver': adresses[cols['tx_receiver']],
+            'amount': cols['tx_amount'],
+            'fee': cols['tx_fee'],
+        })
+        return {'blocks': blocks, 'transactions': transactions}
+
+    def save(self, file):
+        """
+        Writes every column, the block hashes and the addresses to a compressed NumPy
+        archive, readable with `numpy.load`.
+
+        Args:
+            file (str or file): Path or binary file object.
+        """
+        cols = self.columns()
+        np.savez_compressed(
+            file,
+            block_hash=np.array(self.hashes, dtype='U64'),
+            adresses=np.array(self.adresses, dtype=str),
+            **cols
+        )
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import struct
+
+
+# block hash, offset, length, SHA-256 of the body
+INDEX_RECORD = struct.Struct('<32sQI32s')
+
+
+class BlockArchive:
+    """
+    Append-only on-disk store of block bodies (their transaction lists).
+
+    Bodies are appended as JSON to `bodies.dat`; `bodies.idx` holds one fixed-size
+    record (block hash, offset, length, body digest) per body so the archive can be
+    reopened and any body read back with a single seek. Bodies are keyed by block
+    hash, so an archive directory reused by another chain (or shared by the branches
+    of a reorganization) never serves the body of a different block, and the digest
+    is checked on every read. Bodies are never cached: every access reads the file
+    again, so memory stays bounded by the caller.
+
+    Attributes:
+        directory (str): Directory holding the archive files.
+        offsets (dict): Block hash to (offset, length, digest) in the data file.
+
+    Methods:
+        append(block_hash, transactions): Stores the body of a block.
+        load(block_hash): Reads the body of a block back.
+        close(): Closes the underlying files.
+    """
+    def __init__(self, directory):
+        """
+        Opens (or creates) the archive in `directory`.
+
+        Args:
+            directory (str): Directory holding the archive files.
+        """
+        self.directory = directory
+        self.offsets = {}
+        self.open()
+
+    def open(self):
+        """
+        Opens the data and index files and loads the index.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.data = open(os.path.join(self.directory, 'bodies.dat'), 'a+b')
+        self.index = open(os.path.join(self.directory, 'bodies.idx'), 'a+b')
+        self.index.seek(0)
+        raw = self.index.read()
+        for start in range(0, len(raw) - len(raw) % INDEX_RECORD.size, INDEX_RECORD.size):
+            block_hash, offset, length, digest = INDEX_RECORD.unpack_from(raw, start)
+            self.offsets[block_hash.hex()] = (offset, length, digest)
+
+    def __contains__(self, block_hash):
+        return block_hash in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def append(self, block_hash, transactions):
+        """
+        Stores the body of a block. A body that is already archived is left as is.
+
+        Args:
+            block_hash (str): Hash of the block.
+            transactions (list): The serialized transactions of the block.
+        """
+        if block_hash in self.offsets:
+            return
+        body = json.dumps(transactions, sort_keys=True).encode()
+        digest = hashlib.sha256(body).digest()
+        self.data.seek(0, os.SEEK_END)
+        offset = self.data.tell()
+        self.data.write(body)
+        self.data.flush()
+        self.index.write(INDEX_RECORD.pack(bytes.fromhex(block_hash), offset, len(body), digest))
+        self.index.flush()
+        self.offsets[block_hash] = (offset, len(body), digest)
+
+    def load(self, block_hash):
+        """
+        Reads the body of a block from disk.
+
+        Args:
+            block_hash (str): Hash of the block.
+
+        Returns:
+            list: The serialized transactions of the block.
+
+        Raises:
+            KeyError: If the block is not archived.
+            ValueError: If the stored body does not match its digest.
+        """
+        offset, length, digest = self.offsets[block_hash]
+        self.data.seek(offset)
+        body = self.data.read(length)
+        if hashlib.sha256(body).digest() != digest:
+            raise ValueError(f"Archived body of block {block_hash} is corrupted")
+        return json.loads(body)
+
+    def close(self):
+        """
+        Closes the archive files.
+        """
+        self.data.close()
+        self.index.close()
+
+    def __getstate__(self):
+        return {'directory': self.directory}
+
+    def __setstate__(self, state):
+        self.directory = state['directory']
+        self.offsets = {}
+        self.open()
@@ -0,0 +1,661 @@
+import argparse
+import gc
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from System import System
+from Transaction import Transaction, thawed
+from UTXO import UTXO
+from UTXOTable import UTXOTable
+from UTXOSet import UTXOSet
+from Amount import to_units, format_amount
+from Profiler import profiler
+from Snapshot import save_snapshot
+from ChainValidator import ChainValidator, check_transactions
+from HeaderChain import HEADER
+from ChainFile import export_system, import_system
+
+
+def measure_memory(build):
+    """
+    Measures the memory retained by the object returned by `build`.
+
+    Args:
+        build (callable): Function building the structure to measure.
+
+    Returns:
+        tuple: (the built object, retained bytes)
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def bench_memory(n):
+    """
+    Reports the bytes used per UTXO (as objects and in a UTXOTable) and per transaction.
+
+    Args:
+        n (int): Number of entries to create.
+
+    Returns:
+        dict: Bytes per entry for each representation.
+    """
+    system = System(difficulty=1)
+    owners = [system.first_user.adress, system.create_user().adress]
+    amount = to_units(1.5)
+
+    def make_utxos():
+        utxos = []
+        for i in range(n):
+            txid = os.urandom(32)
+            utxos.append(UTXO(txid, i, owners[i % 2], amount))
+        return utxos
+
+    def make_table():
+        table = UTXOTable()
+        for i in range(n):
+            table.add_row(os.urandom(32), i, owners[i % 2], amount)
+        return table
+
+    def make_transactions():
+        receiver = system.first_user
+        return [Transaction(i, None, receiver, amount, system) for i in range(n)]
+
+    utxos, utxo_bytes = measure_memory(make_utxos)
+    del utxos
+    table, table_bytes = measure_memory(make_table)
+    del table
+    transactions, tx_bytes = measure_memory(make_transactions)
+    del transactions
+
+    results = {
+        'utxo_object': utxo_bytes / n,
+        'utxo_table': table_bytes / n,
+        'transaction': tx_bytes / n,
+    }
+    print(f"Memory at {n:,} entries:")
+    for name, value in results.items():
+        print(f"  {name:<14} {value:8.1f} bytes/entry")
+    return results
+
+
+def build_chain(n_blocks, n_users=10, tx_per_block=5, seed=0, difficulty=1):
+    """
+    Builds a deterministic system with `n_blocks` mined blocks of random payments between users.
+
+    Args:
+        n_blocks (int): Number of blocks to mine after the genesis block.
+        n_users (int): Number of users.
+        tx_per_block (int): Payments attempted per block.
+        seed (int): Seed of the system and of the choice of payments.
+        difficulty (int): Proof-of-work difficulty.
+
+    Returns:
+        System: The system.
+    """
+    system = System(difficulty=difficulty, seed=seed)
+    for _ in range(n_users - 1):
+        system.create_user()
+    extend_chain(system, n_blocks, random.Random(seed), tx_per_block)
+    return system
+
+
+def extend_chain(system, n_blocks, rng, tx_per_block=5):
+    """
+    Mines `n_blocks` more blocks of random payments between the users of a system.
+
+    Args:
+        system (System): The system.
+        n_blocks (int): Number of blocks to mine.
+        rng (random.Random): Source of the choice of payments.
+        tx_per_block (int): Payments attempted per block.
+    """
+    users = system.users
+    for _ in range(n_blocks):
+        for _ in range(tx_per_block):
+            sender, receiver = rng.sample(users, 2)
+            system.send_transaction(sender, receiver, to_units(rng.choice([0.5, 1, 2.5])))
+        system.mine_block(rng.choice(users))
+
+
+def bench_bootstrap(n_blocks, tail_lengths=(0, 10, 100)):
+    """
+    Compares a full replay of the chain with bootstraps from snapshots taken
+    `tail` blocks before the tip.
+
+    Args:
+        n_blocks (int): Length of the chain.
+        tail_lengths (tuple): Numbers of blocks to replay after the snapshot.
+
+    Returns:
+        dict: Seconds per bootstrap, keyed by the number of replayed blocks.
+    """
+    system = build_chain(n_blocks)
+    blocks = system.blockchain
+    results = {}
+
+    start = time.perf_counter()
+    System.bootstrap(blocks, tempfile.mkdtemp())
+    results[len(blocks)] = time.perf_counter() - start
+
+    for tail in tail_lengths:
+        if tail >= len(blocks):
+            continue
+        directory = tempfile.mkdtemp()
+        snapshot_system = System.bootstrap(blocks[:len(blocks) - tail], tempfile.mkdtemp())
+        save_snapshot(snapshot_system, directory)
+        start = time.perf_counter()
+        System.bootstrap(blocks, directory)
+        results[tail] = time.perf_counter() - start
+
+    print(f"Bootstrap of a {len(blocks)}-block chain:")
+    for replayed, seconds in sorted(results.items()):
+        print(f"  {replayed:>8} blocks replayed  {seconds * 1000:10.2f} ms")
+    return results
+
+
+def bench_determinism(n_blocks, difficulty=3, runs=3):
+    """
+    Builds the same seeded chain several times, checks that every run ends on the
+    same block hash and reports the time of each run.
+
+    Args:
+        n_blocks (int): Number of blocks per run.
+        difficulty (int): Proof-of-work difficulty.
+        runs (int): Number of runs.
+
+    Returns:
+        tuple: (tip hash, list of seconds per run)
+    """
+    tips = set()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        system = build_chain(n_blocks, difficulty=difficulty)
+        timings.append(time.perf_counter() - start)
+        tips.add(system.blockchain[-1].hash)
+    if len(tips) != 1:
+        raise RuntimeError(f"Seeded runs produced {len(tips)} different chains")
+    tip = tips.pop()
+    print(f"{runs} seeded runs of {n_blocks} blocks, tip {tip}:")
+    for seconds in timings:
+        print(f"  {seconds:.3f} s")
+    return tip, timings
+
+
+def bench_reorg(n_blocks, depths=(1, 10, 100)):
+    """
+    Times reorganizations of increasing depth on a chain of `n_blocks` blocks and
+    compares them with a full replay of the new chain.
+
+    For each depth k, a second seeded system shares the first `n_blocks - k` blocks,
+    then mines k + 1 different blocks; submitting them to the first system makes it
+    disconnect k blocks and connect k + 1. Both paths validate every block they
+    connect the same way: a reorganization checks the txids and signatures of the
+    blocks it connects (see `check_transactions`), so the full replay checks every
+    block of the new chain with it before replaying them. What is compared is the
+    number of blocks each path validates and connects.
+
+    Args:
+        n_blocks (int): Length of the chain.
+        depths (tuple): Numbers of blocks to disconnect.
+
+    Returns:
+        dict: Seconds per reorganization, keyed by depth, and the full replay time under 'replay'.
+    """
+    results = {}
+    for depth in depths:
+        if depth >= n_blocks:
+            continue
+        system = build_chain(n_blocks)
+        rival = build_chain(n_blocks - depth)
+        extend_chain(rival, depth + 1, random.Random(f"rival-{depth}"))
+
+        branch = rival.blockchain[n_blocks - depth + 1:]
+        for block in branch[:-1]:
+            system.submit_block(block)
+        start = time.perf_counter()
+        system.submit_block(branch[-1])
+        results[depth] = time.perf_counter() - start
+        if system.blockchain[-1].hash != rival.blockchain[-1].hash:
+            raise RuntimeError(f"Reorganization of depth {depth} did not switch to the rival chain")
+
+    keys = {user.adress: user.public_key for user in system.users}
+    start = time.perf_counter()
+    for block in rival.blockchain:
+        if check_transactions(block.transactions, keys):
+            raise RuntimeError(f"Block {block.index} of the rival chain is invalid")
+    System.bootstrap(rival.blockchain, tempfile.mkdtemp())
+    results['replay'] = time.perf_counter() - start
+
+    print(f"Reorganizations of a {n_blocks}-block chain:")
+    for depth, seconds in results.items():
+        label = f"depth {depth}" if depth != 'replay' else "full replay"
+        print(f"  {label:>12}  {seconds * 1000:10.2f} ms")
+    return results
+
+
+def bench_transactions(n, serializations=3, verifications=2):
+    """
+    Compares the per-transaction encoding, hashing and signature work with memoized
+    transactions against recomputing it on every access.
+
+    A transaction is serialized when it enters the mempool, when it is put in a block
+    and when the chain is exported, and its signature is checked on admission and
+    when the block is validated; `serializations` and `verifications` set how many
+    times each happens.
+
+    Args:
+        n (int): Number of transactions.
+        serializations (int): Serializations per transaction.
+        verifications (int): Signature checks per transaction.
+
+    Returns:
+        dict: Microseconds per transaction, 'memoized' and 'recomputed'.
+    """
+    system = System(difficulty=1, seed=0)
+    receiver = system.create_user()
+    transactions = []
+    for i in range(n):
+        transaction = Transaction(i, system.first_user, receiver, to_units(1), system)
+        transaction.sign_transaction()
+        transactions.append(transaction)
+
+    start = time.perf_counter()
+    for transaction in transactions:
+        for _ in range(serializations):
+            transaction.serialize_transaction()
+        for _ in range(verifications):
+            transaction.verify_signature()
+    memoized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for transaction in transactions:
+        for _ in range(serializations):
+            data = {key: thawed(value) for key, value in transaction.get_transaction_data().items()}
+            data['txid'] = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        for _ in range(verifications):
+            transaction.sender.verify_signature(transaction.txid, transaction.signature.hex())
+    recomputed = time.perf_counter() - start
+
+    results = {'memoized': memoized / n * 1e6, 'recomputed': recomputed / n * 1e6}
+    print(f"Per transaction, after construction ({n:,} transactions):")
+    print(f"  memoized    0 encodings, 0 hashes, 1 verification   {results['memoized']:10.1f} µs")
+    print(f"  recomputed  {serializations} encodings, {serializations} hashes, {verifications} verifications"
+          f"  {results['recomputed']:10.1f} µs")
+    return results
+
+
+def bench_batch(n, amount=to_units(0.1)):
+    """
+    Compares a payout to `n` users sent as `n` transactions with a single `send_many`
+    batch: signatures, fees, UTXOs created and block size.
+
+    Args:
+        n (int): Number of receivers.
+        amount (int): Amount paid to each receiver, in base units.
+
+    Returns:
+        dict: Measurements for 'single' and 'batch'.
+    """
+    results = {}
+    for mode in ('single', 'batch'):
+        system = System(difficulty=1, seed=0)
+        payer = system.first_user
+        receivers = [system.create_user() for _ in range(n)]
+        utxos_before = system.index_utxo
+        profiler.reset()
+        profiler.enable()
+        start = time.perf_counter()
+        if mode == 'single':
+            for receiver in receivers:
+                system.send_transaction(payer, receiver, amount)
+        else:
+            system.send_many(payer, [(receiver, amount) for receiver in receivers])
+        elapsed = time.perf_counter() - start
+        profiler.disable()
+        block = system.mine_block(payer)
+        results[mode] = {
+            'seconds': elapsed,
+            'signatures': profiler.stages['signing'].count,
+            'fees': sum(system.mining_fees),
+            'utxos_created': system.index_utxo - utxos_before - 1,  # without the coinbase
+            'block_bytes': len(json.dumps(block.transactions)),
+        }
+
+    print(f"Payout to {n:,} receivers:")
+    print(f"  {'':<8} {'time (s)':>10} {'signatures':>11} {'fees':>14} {'UTXOs':>8} {'block bytes':>12}")
+    for mode, r in results.items():
+        print(f"  {mode:<8} {r['seconds']:10.3f} {r['signatures']:11} {format_amount(r['fees']):>14}"
+              f" {r['utxos_created']:8} {r['block_bytes']:12,}")
+    return results
+
+
+def bench_wallets(n_utxos, n_users=100):
+    """
+    Times the balances of every user and the construction of a transaction with the
+    wallets kept by the UTXO set, against scanning the set as before.
+
+    Args:
+        n_utxos (int): Number of unspent outputs in the set.
+        n_users (int): Number of users owning them.
+
+    Returns:
+        dict: Seconds for 'balances' and 'transaction', and the balances ('totals'),
+            keyed by (mode, step) with mode 'wallets' or 'scan'.
+    """
+    system = System(difficulty=1, seed=0)
+    users = [system.first_user] + [system.create_user() for _ in range(n_users - 1)]
+    txid = hashlib.sha256(b'wallets').digest()
+    amount = to_units(0.01)
+    system.UTXO_set.extend(UTXO(txid, system.get_index_utxo(), users[i % n_users].adress, amount) for i in range(n_utxos))
+
+    def balances():
+        return [user.get_balance(system.UTXO_set) for user in users]
+
+    def transaction():
+        return Transaction(system.index_transaction, users[1], users[2], amount, system)
+
+    results = {}
+    for mode in ('wallets', 'scan'):
+        if mode == 'scan':
+            wallets = dict(system.UTXO_set.wallets)
+            system.UTXO_set.wallets.clear()
+        start = time.perf_counter()
+        totals = balances()
+        results[(mode, 'balances')] = time.perf_counter() - start
+        start = time.perf_counter()
+        transaction()
+        results[(mode, 'transaction')] = time.perf_counter() - start
+        if mode == 'scan':
+            system.UTXO_set.wallets.update(wallets)
+        results[(mode, 'totals')] = totals
+    assert results[('wallets', 'totals')] == results[('scan', 'totals')]
+
+    print(f"{n_utxos:,} UTXOs, {n_users} users:")
+    print(f"  {'':<12} {'wallets (ms)':>13} {'scan (ms)':>11}")
+    for step in ('balances', 'transaction'):
+        print(f"  {step:<12} {results[('wallets', step)] * 1000:13.3f} {results[('scan', step)] * 1000:11.3f}")
+    return results
+
+
+def bench_validation(n_blocks, workers=(1, 2, 4), tx_per_block=5):
+    """
+    Validates and replays a chain with the staged ChainValidator pipeline for each
+    worker count and reports the throughput of every stage.
+
+    Args:
+        n_blocks (int): Length of the chain.
+        workers (tuple): Worker counts to compare.
+        tx_per_block (int): Payments attempted per block.
+
+    Returns:
+        dict: Validator report (stage to (seconds, items per second)) per worker count.
+    """
+    system = build_chain(n_blocks, tx_per_block=tx_per_block)
+    keys = {user.adress: user.public_key for user in system.users}
+    n_tx = sum(block.tx_count for block in system.blockchain)
+    results = {}
+    for count in workers:
+        target = System(difficulty=system.difficulty, genesis=False)
+        with ChainValidator(system.difficulty, keys, count) as validator:
+            for i in range(0, len(system.blockchain), 64 * count):
+                validator.apply(target, system.blockchain[i:i + 64 * count])
+            results[count] = validator.report()
+        assert target.blockchain[-1].hash == system.blockchain[-1].hash
+
+    print(f"Validation of {len(system.blockchain):,} blocks, {n_tx:,} transactions (on {os.cpu_count()} CPUs):")
+    print(f"  {'workers':>7} {'headers (blk/s)':>16} {'signatures (tx/s)':>18} {'utxo (blk/s)':>13} {'total (blk/s)':>14}")
+    for count, report in results.items():
+        print(f"  {count:>7} {report['headers'][1]:16,.0f} {report['transactions'][1]:18,.0f}"
+              f" {report['utxo'][1]:13,.0f} {report['total'][1]:14,.0f}")
+    return results
+
+
+def bench_headers(n_blocks, tx_per_block=5, repeat=10):
+    """
+    Compares a chain-wide scan (index, nonce and transaction count of every block, as
+    drawn by the interface) over Block objects with the same scan over the header
+    chain, and the bytes each representation holds.
+
+    Args:
+        n_blocks (int): Length of the chain.
+        tx_per_block (int): Payments attempted per block.
+        repeat (int): Number of scans timed.
+
+    Returns:
+        dict: (seconds per scan, bytes) for Block objects ('blocks'), BlockHeader
+            objects ('headers') and raw header records ('records').
+    """
+    system = build_chain(n_blocks, tx_per_block=tx_per_block)
+    blocks, headers = system.blockchain, system.headers
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scan = [(block.index, block.nonce, len(block.transactions)) for block in blocks]
+    block_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        header_scan = [(header.index, header.nonce, header.tx_count) for header in headers]
+    header_seconds = (time.perf_counter() - start) / repeat
+    assert scan == header_scan
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        record_scan = [(record[0], record[4], record[6]) for record in HEADER.iter_unpack(headers.data)]
+    record_seconds = (time.perf_counter() - start) / repeat
+    assert scan == record_scan
+
+    block_bytes = sum(len(json.dumps(block.to_dict())) for block in blocks)
+    results = {
+        'blocks': (block_seconds, block_bytes),
+        'headers': (header_seconds, len(headers.data)),
+        'records': (record_seconds, len(headers.data)),
+    }
+    print(f"Scan of {len(blocks):,} blocks:")
+    for name, (seconds, size) in results.items():
+        print(f"  {name:<8} {seconds * 1000:10.3f} ms  {size:>12,} bytes")
+    return results
+
+
+def bench_store(n_blocks, lookups=100):
+    """
+    Compares starting a node by importing a chain file (every block decoded and
+    validated) with opening a block store (indexes mapped, blocks after the last
+    snapshot replayed), and transaction lookups through the store (the txid hash
+    table alone, then with the block read from disk) with a scan of the chain.
+
+    Args:
+        n_blocks (int): Length of the chain.
+        lookups (int): Number of transactions looked up.
+
+    Returns:
+        dict: Seconds for 'import', 'open', and per lookup 'scan', 'index' and 'lookup'.
+    """
+    system = build_chain(n_blocks)
+    txids = [tx['txid'] for block in system.blockchain for tx in block.transactions]
+    txids = random.Random(0).sample(txids, min(lookups, len(txids)))
+    results = {}
+
+    with tempfile.TemporaryFile() as f:
+        export_system(system, f, snapshot=False)
+        f.seek(0)
+        start = time.perf_counter()
+        import_system(f)
+        results['import'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for txid in txids:
+        system.find_transaction(txid)
+    results['scan'] = (time.perf_counter() - start) / len(txids)
+
+    directory = tempfile.mkdtemp()
+    system.enable_store(directory)
+    system.store.close()
+    start = time.perf_counter()
+    stored = System.open(directory)
+    results['open'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for txid in txids:
+        stored.store.find_transaction(txid)
+    results['index'] = (time.perf_counter() - start) / len(txids)
+
+    start = time.perf_counter()
+    for txid in txids:
+        stored.find_transaction(txid)
+    results['lookup'] = (time.perf_counter() - start) / len(txids)
+
+    print(f"Startup of a {n_blocks}-block node:")
+    print(f"  import chain file   {results['import'] * 1000:10.2f} ms")
+    print(f"  open block store    {results['open'] * 1000:10.2f} ms")
+    print(f"Transaction lookup:")
+    print(f"  chain scan          {results['scan'] * 1e6:10.2f} µs")
+    print(f"  store index         {results['index'] * 1e6:10.2f} µs")
+    print(f"  store lookup        {results['lookup'] * 1e6:10.2f} µs")
+    return results
+
+
+def bench_ledger(sizes=(10_000, 1_000_000, 10_000_000), n_owners=1000, mutations=10_000):
+    """
+    Times the total supply and the balance of every address computed with Python loops
+    over the UTXO objects, as before, and with the columnar ledger of the UTXO set
+    (one vector sum and one grouped reduction), plus building the ledger once and the
+    cost it adds to every change of the set.
+
+    Args:
+        sizes (tuple): Numbers of unspent outputs.
+        n_owners (int): Number of addresses owning them.
+        mutations (int): Outputs removed and added back to time the upkeep.
+
+    Returns:
+        dict: Seconds keyed by (size, step), steps being 'loop_total', 'ledger_total',
+            'loop_balances', 'ledger_balances', 'build' and, per change, 'change_loop'
+            and 'change_ledger'.
+    """
+    rng = random.Random(0)
+    txid = hashlib.sha256(b'ledger').digest()
+    owners = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n_owners)]
+    results = {}
+    for n in sizes:
+        utxo_set = UTXOSet(UTXO(txid, i, owners[i % n_owners], rng.randint(1, to_units(10))) for i in range(n))
+        sample = [utxo_set.get(i) for i in rng.sample(range(n), min(mutations, n))]
+
+        def change():
+            start = time.perf_counter()
+            for utxo in sample:
+                utxo_set.discard(utxo.index)
+            utxo_set.extend(sample)
+            return (time.perf_counter() - start) / (2 * len(sample))
+
+        results[(n, 'change_loop')] = change()
+        start = time.perf_counter()
+        total = sum(utxo.amount for utxo in utxo_set)
+        results[(n, 'loop_total')] = time.perf_counter() - start
+        start = time.perf_counter()
+        balances = {}
+        for utxo in utxo_set:
+            balances[utxo.sender] = balances.get(utxo.sender, 0) + utxo.amount
+        results[(n, 'loop_balances')] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if utxo_set.ledger() is None:
+            print(f"  {n:,} UTXOs: below the ledger threshold or NumPy missing, skipped")
+            continue
+        results[(n, 'build')] = time.perf_counter() - start
+        results[(n, 'change_ledger')] = change()
+        start = time.perf_counter()
+        assert utxo_set.total() == total
+        results[(n, 'ledger_total')] = time.perf_counter() - start
+        start = time.perf_counter()
+        assert utxo_set.balances() == balances
+        results[(n, 'ledger_balances')] = time.perf_counter() - start
+
+        print(f"{n:,} UTXOs, {n_owners} addresses:")
+        print(f"  {'':<10} {'loop (ms)':>11} {'ledger (ms)':>12}")
+        for step in ('total', 'balances'):
+            print(f"  {step:<10} {results[(n, 'loop_' + step)] * 1000:11.3f} {results[(n, 'ledger_' + step)] * 1000:12.3f}")
+        print(f"  ledger built in {results[(n, 'build')] * 1000:.1f} ms; a change costs "
+              f"{results[(n, 'change_loop')] * 1e6:.2f} µs without it, {results[(n, 'change_ledger')] * 1e6:.2f} µs with it")
+        del utxo_set, sample
+        gc.collect()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Blockchain simulation benchmarks.")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    memory = subparsers.add_parser('memory', help="Bytes per UTXO and per transaction.")
+    memory.add_argument('-n', type=int, default=1_000_000)
+
+    bootstrap = subparsers.add_parser('bootstrap', help="Startup time from snapshots versus full replay.")
+    bootstrap.add_argument('-n', type=int, default=1000)
+
+    determinism = subparsers.add_parser('determinism', help="Checks seeded runs give identical chains and times them.")
+    determinism.add_argument('-n', type=int, default=50)
+    determinism.add_argument('--difficulty', type=int, default=3)
+
+    reorg = subparsers.add_parser('reorg', help="Reorganization time by depth versus full replay.")
+    reorg.add_argument('-n', type=int, default=300)
+    reorg.add_argument('--depths', type=int, nargs='+', default=[1, 10, 100])
+
+    transactions = subparsers.add_parser('transactions', help="Memoized versus recomputed transaction encoding and verification.")
+    transactions.add_argument('-n', type=int, default=1000)
+
+    batch = subparsers.add_parser('batch', help="Payout as single transactions versus one send_many batch.")
+    batch.add_argument('-n', type=int, default=1000)
+
+    wallets = subparsers.add_parser('wallets', help="User balances and coin selection with wallets versus scanning the UTXO set.")
+    wallets.add_argument('-n', type=int, default=1_000_000)
+    wallets.add_argument('--users', type=int, default=100)
+
+    validation = subparsers.add_parser('validation', help="Staged parallel validation throughput by worker count.")
+    validation.add_argument('-n', type=int, default=500)
+    validation.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+
+    headers = subparsers.add_parser('headers', help="Chain-wide scan over blocks versus the header chain.")
+    headers.add_argument('-n', type=int, default=1000)
+
+    store = subparsers.add_parser('store', help="Node startup from a chain file versus a block store, and transaction lookups.")
+    store.add_argument('-n', type=int, default=1000)
+
+    ledger = subparsers.add_parser('ledger', help="Supply and balances with loops versus the NumPy ledger of the UTXO set.")
+    ledger.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    ledger.add_argument('--owners', type=int, default=1000)
+
+    args = parser.parse_args()
+    if args.benchmark == 'memory':
+        bench_memory(args.n)
+    elif args.benchmark == 'bootstrap':
+        bench_bootstrap(args.n)
+    elif args.benchmark == 'determinism':
+        bench_determinism(args.n, args.difficulty)
+    elif args.benchmark == 'reorg':
+        bench_reorg(args.n, tuple(args.depths))
+    elif args.benchmark == 'transactions':
+        bench_transactions(args.n)
+    elif args.benchmark == 'batch':
+        bench_batch(args.n)
+    elif args.benchmark == 'wallets':
+        bench_wallets(args.n, args.users)
+    elif args.benchmark == 'validation':
+        bench_validation(args.n, tuple(args.workers))
+    elif args.benchmark == 'headers':
+        bench_headers(args.n)
+    elif args.benchmark == 'store':
+        bench_store(args.n)
+    elif args.benchmark == 'ledger':
+        bench_ledger(tuple(args.sizes), args.owners)
@@ -3,31 +3,123 @@ import json
 from datetime import datetime
 import random
 
+from Profiler import profiler
+
+
+NO_HASH = bytes(32)
+
+
+def merkle_root(txids):
+    """
+    Returns the Merkle root of a list of transaction ids: leaves are the raw txids,
+    each level hashes pairs with SHA-256 and an odd last node is paired with itself.
+
+    Args:
+        txids (list): Hex txids, in block order.
+
+    Returns:
+        bytes: The 32-byte root (zero bytes for an empty list).
+    """
+    level = [bytes.fromhex(txid) for txid in txids]
+    if not level:
+        return NO_HASH
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def header_data(index, timestamp, root, previous_hash, nonce, extranonce):
+    """
+    Returns the fields hashed into a block hash. The transactions enter only through
+    their Merkle root, so the hash can be checked from a header alone.
+
+    Args:
+        index (int): Height of the block.
+        timestamp (str): Timestamp of the block.
+        root (bytes): Merkle root of the transaction ids.
+        previous_hash (str): Hash of the previous block ('0' for the genesis block).
+        nonce (int): Nonce of the block.
+        extranonce (int): Extranonce of the block; only hashed when non-zero.
+
+    Returns:
+        dict: The hashed fields.
+    """
+    data = {
+        'index': index,
+        'timestamp': timestamp,
+        'merkle_root': root.hex(),
+        'previous_hash': previous_hash,
+        'nonce': nonce
+    }
+    if extranonce:
+        data['extranonce'] = extranonce
+    return data
+
+
+def hash_header(data):
+    """
+    Returns the hash of the output of `header_data`.
+
+    Returns:
+        str: The hexadecimal SHA-256 hash.
+    """
+    block_string = json.dumps(json.dumps(data, sort_keys=True), sort_keys=True)
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+
 class Block:
     """
     A class used to represent a single block in a blockchain.
 
     Attributes:
         index (int): The position of the block in the blockchain.
-        transactions (dict): A dictionary containing the transaction data.
+        transactions (list): The serialized transactions. For a pruned block they are
+            read back from the archive on every access.
+        tx_count (int): Number of transactions in the block, kept after pruning.
+        archive (BlockArchive or None): Archive holding the body of a pruned block.
         previous_hash (str): The hash of the previous block in the chain.
         timestamp (str): The timestamp of block creation.
         nonce (int): A number used for mining (proof of work).
-        hash (str): The SHA-256 hash of the block's data.
+        extranonce (int): Rolled when the 32-bit nonce space is exhausted; only part of
+            the hashed data when non-zero.
+        hash (str): The SHA-256 hash of the block header, which covers the
+            transactions through their Merkle root.
         mining_time (float or None): Time taken to mine the block (optional).
         miner_total_reward (float or None): Total reward earned by the miner (optional).
 
     Methods:
+        merkle_root():
+            Returns the Merkle root of the transaction ids.
+
         get_block_data():
-            Returns a dictionary of the block's data (excluding hash).
+            Returns the hashed header fields of the block.
         
         serialize_block():
-            Serializes the block data into a JSON-formatted string.
+            Serializes the header fields into a JSON-formatted string.
         
         compute_hash():
-            Computes and returns the SHA-256 hash of the serialized block data.
+            Computes and returns the SHA-256 hash of the serialized header.
+
+        hash_template():
+            Returns the hashed bytes before and after the nonce, for fast nonce search.
+
+        prune(archive):
+            Moves the transactions to an archive, keeping only the header in memory.
+
+        to_dict():
+            Returns every stored field as a dict.
+
+        from_dict(data):
+            Rebuilds a block from `to_dict` output without hashing it.
     """
-    def __init__(self, index, transactions, previous_hash):
+    __slots__ = (
+        'index', 'timestamp', '_transactions', 'tx_count', 'archive', 'previous_hash', 'nonce',
+        'extranonce', 'hash', 'mining_time', 'miner_total_reward'
+    )
+
+    def __init__(self, index, transactions, previous_hash, timestamp=None):
         """
         Initializes a new block.
 
@@ -35,36 +127,78 @@ class Block:
             index (int): The index of the block in the chain.
             transactions (dict): The transaction data contained in the block.
             previous_hash (str): The hash of the previous block in the chain.
+            timestamp (str or None): Creation time; the current time if not given.
         """
         self.index = index
-        self.timestamp = str(datetime.now())
+        self.timestamp = timestamp if timestamp is not None else str(datetime.now())
+        self.archive = None
         self.transactions = transactions # Solo una transaccion por bloque 
         self.previous_hash = previous_hash
         self.nonce = 0
+        self.extranonce = 0
         self.hash = self.compute_hash()
         self.mining_time = None
         self.miner_total_reward = None
 
+    @property
+    def transactions(self):
+        """
+        list: The serialized transactions, loaded from the archive if the block is pruned.
+        """
+        if self._transactions is None and self.archive is not None:
+            return self.archive.load(self.hash)
+        return self._transactions
+
+    @transactions.setter
+    def transactions(self, transactions):
+        self._transactions = transactions
+        self.tx_count = len(transactions)
+
+    @property
+    def is_pruned(self):
+        """
+        bool: True if only the header of the block is kept in memory.
+        """
+        return self._transactions is None
+
+    def prune(self, archive):
+        """
+        Stores the transactions in `archive` and drops them from memory.
+
+        Args:
+            archive (BlockArchive): The archive receiving the body.
+        """
+        if self.is_pruned:
+            return
+        archive.append(self.hash, self._transactions)
+        self.archive = archive
+        self._transactions = None
+
+    def merkle_root(self):
+        """
+        Computes the Merkle root of the transaction ids of the block.
+
+        Returns:
+            bytes: The 32-byte root.
+        """
+        return merkle_root([tx['txid'] for tx in self.transactions])
+
     def get_block_data(self):
         """
-        Retrieves the block's data as a dictionary, excluding the hash.
+        Retrieves the hashed header fields of the block (see `header_data`).
 
         Returns:
-            dict: A dictionary with the block's index, timestamp, transactions,
-                  previous hash, and nonce.
+            dict: The block's index, timestamp, Merkle root, previous hash and nonce
+                  (and extranonce when non-zero).
         """
-        return {
-            'index': self.index,
-            'timestamp': self.timestamp,
-            'transactions': self.transactions,
-            'previous_hash': self.previous_hash,
-            'nonce': self.nonce
-        }
+        return header_data(
+            self.index, self.timestamp, self.merkle_root(), self.previous_hash, self.nonce, self.extranonce
+        )
         
         
     def serialize_block(self):
         """
-        Serializes the block's data into a JSON-formatted string.
+        Serializes the header fields into a JSON-formatted string.
 
         Returns:
             str: JSON string of the block data, sorted by keys.
@@ -75,12 +209,77 @@ class Block:
 
     def compute_hash(self): 
         """
-        Computes the SHA-256 hash of the serialized block data.
+        Computes the SHA-256 hash of the serialized header.
 
         Returns:
             str: The hexadecimal hash of the block.
         """
-        block_data = self.serialize_block()
-        block_string = json.dumps(block_data , sort_keys=True) 
-        return hashlib.sha256(block_string.encode()).hexdigest()
-    
+        with profiler.timer('hashing'):
+            return hash_header(self.get_block_data())
+
+    def hash_template(self):
+        """
+        Splits the bytes hashed by `compute_hash` around the decimal digits of the nonce.
+
+        For any nonce n, `sha256(prefix + str(n).encode() + suffix)` equals the hash
+        `compute_hash` would return with `self.nonce = n`, so a nonce search only
+        has to serialize the block once.
+
+        Returns:
+            tuple: (prefix, suffix) bytes.
+        """
+        sentinel = 918273645546372819
+        nonce = self.nonce
+        self.nonce = sentinel
+        try:
+            block_string = json.dumps(self.serialize_block(), sort_keys=True).encode()
+        finally:
+            self.nonce = nonce
+        prefix, marker, suffix = block_string.partition(f'"nonce\\": {sentinel}'.encode())
+        if not marker:
+            raise ValueError("Nonce not found in the serialized block")
+        return prefix + marker[:-len(str(sentinel))], suffix
+
+    def to_dict(self):
+        """
+        Returns every stored field of the block as a JSON-serializable dict.
+
+        Returns:
+            dict: The fields, including the hash and the mining statistics.
+        """
+        return {
+            'index': self.index,
+            'timestamp': self.timestamp,
+            'transactions': self.transactions,
+            'previous_hash': self.previous_hash,
+            'nonce': self.nonce,
+            'extranonce': self.extranonce,
+            'hash': self.hash,
+            'mining_time': self.mining_time,
+            'miner_total_reward': self.miner_total_reward,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a block from `to_dict` output without hashing it; the stored hash is
+        trusted (see ChainValidator to check it).
+
+        Args:
+            data (dict): The fields written by `to_dict`.
+
+        Returns:
+            Block: The block.
+        """
+        block = cls.__new__(cls)
+        block.index = data['index']
+        block.timestamp = data['timestamp']
+        block.archive = None
+        block.transactions = data['transactions']
+        block.previous_hash = data['previous_hash']
+        block.nonce = data['nonce']
+        block.extranonce = data['extranonce']
+        block.hash = data['hash']
+        block.mining_time = data['mining_time']
+        block.miner_total_reward = data['miner_total_reward']
+        return block
@@ -0,0 +1,613 @@
+import json
+import mmap
+import os
+import struct
+from collections import OrderedDict
+
+from Block import Block
+from HeaderChain import HeaderChain, HEADER, pack_header
+
+
+# height, hash, offset and length of the body in blocks.dat, tx count, timestamp
+BLOCK_RECORD = struct.Struct('<I32sQII32s')
+# txid, height, position in the block
+TX_RECORD = struct.Struct('<32sII')
+# txid, position of its TX_RECORD plus one (0 for an empty slot)
+TXID_SLOT = struct.Struct('<32sI')
+# slots in use, TX_RECORDs indexed
+TXID_HEAD = struct.Struct('<QQ')
+MIN_SLOTS = 1024
+CACHE_SIZE = 64
+
+
+class RecordFile:
+    """
+    A file of fixed-size records, appended through the file and read through a
+    read-only memory map, so opening it costs nothing and a record is read with a
+    single slice of the map.
+
+    Attributes:
+        path (str): Path of the file.
+        record (struct.Struct): Layout of a record.
+        file (file): The file, opened for appending.
+        count (int): Number of records.
+        map (mmap or None): Map of the file, remapped when the file has grown.
+
+    Methods:
+        append(raw): Appends a packed record.
+        get(position): Returns the fields of a record.
+        raw(stop): Returns the first `stop` records as bytes.
+        truncate(count): Keeps the first `count` records.
+        flush(): Writes the appended records to the file.
+        close(): Closes the map and the file.
+    """
+    def __init__(self, path, record):
+        """
+        Opens (or creates) a record file. A record cut short, e.g. by a crash, is dropped.
+
+        Args:
+            path (str): Path of the file.
+            record (struct.Struct): Layout of a record.
+        """
+        self.path = path
+        self.record = record
+        self.file = open(path, 'a+b')
+        size = os.path.getsize(path)
+        self.count = size // record.size
+        if size % record.size:
+            self.file.truncate(self.count * record.size)
+        self.map = None
+
+    def __len__(self):
+        return self.count
+
+    def view(self):
+        """
+        Returns a map covering every record, or None if there is none.
+        """
+        size = self.count * self.record.size
+        if self.map is None or len(self.map) < size:
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        return self.map
+
+    def append(self, raw):
+        """
+        Appends a packed record. It can be read once the file is flushed.
+
+        Args:
+            raw (bytes): The record.
+        """
+        self.file.write(raw)
+        self.count += 1
+
+    def get(self, position):
+        """
+        Returns the fields of a record.
+
+        Args:
+            position (int): Position of the record.
+
+        Returns:
+            tuple: The unpacked fields.
+        """
+        return self.record.unpack_from(self.view(), position * self.record.size)
+
+    def raw(self, stop=None):
+        """
+        Returns the first `stop` records (all by default) as bytes.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        view = self.view()
+        return view[:stop * self.record.size] if view is not None else b''
+
+    def truncate(self, count):
+        """
+        Keeps the first `count` records.
+
+        Args:
+            count (int): Number of records to keep.
+        """
+        if count >= self.count:
+            return
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.flush()
+        self.file.truncate(count * self.record.size)
+        self.count = count
+
+    def flush(self):
+        """
+        Writes the appended records to the file.
+        """
+        self.file.flush()
+
+    def close(self):
+        """
+        Closes the map and the file.
+        """
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+class TxidIndex:
+    """
+    On-disk hash table from txid to the position of its record in the transaction
+    index, with open addressing and linear probing. The table is kept at most half
+    full, so a lookup reads one or two slots whatever the length of the chain.
+
+    The file is a TXID_HEAD (slots in use, records indexed) followed by the slots.
+    Records are indexed after they are flushed, and the ones a crash left out are
+    indexed when the table is opened. Cutting the transaction index leaves the slots
+    of the dropped records in place: a slot only counts if the record it points to
+    still holds its txid, and the table is rebuilt from the records when it grows.
+
+    Attributes:
+        path (str): Path of the file.
+        records (RecordFile): The transaction index.
+        file (file): The file.
+        slots (int): Number of slots, a power of two.
+        used (int): Number of slots in use, stale ones included.
+        indexed (int): Number of records of `records` indexed.
+
+    Methods:
+        update(): Indexes the records appended since the last update.
+        find(txid): Returns the position of the record of a txid.
+        truncate(count): Forgets the records from position `count` on.
+        close(): Closes the file.
+    """
+    def __init__(self, path, records):
+        """
+        Opens (or creates) the table and indexes the records it does not have yet.
+
+        Args:
+            path (str): Path of the file.
+            records (RecordFile): The transaction index.
+        """
+        self.path = path
+        self.records = records
+        self.file = None
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        slots = (size - TXID_HEAD.size) // TXID_SLOT.size
+        if size < TXID_HEAD.size + MIN_SLOTS * TXID_SLOT.size or slots & (slots - 1) \
+                or (size - TXID_HEAD.size) % TXID_SLOT.size:
+            self.rebuild()
+        else:
+            self.file = open(path, 'r+b')
+            self.slots = slots
+            self.used, self.indexed = TXID_HEAD.unpack(os.pread(self.file.fileno(), TXID_HEAD.size, 0))
+            self.indexed = min(self.indexed, len(records))
+        self.update()
+
+    def slot(self, txid):
+        """
+        Returns the position of the first slot to probe for a txid.
+        """
+        return int.from_bytes(txid[:8], 'little') & (self.slots - 1)
+
+    def read(self, slot):
+        return TXID_SLOT.unpack(os.pread(self.file.fileno(), TXID_SLOT.size, TXID_HEAD.size + slot * TXID_SLOT.size))
+
+    def write(self, slot, txid, position):
+        os.pwrite(self.file.fileno(), TXID_SLOT.pack(txid, position + 1), TXID_HEAD.size + slot * TXID_SLOT.size)
+
+    def write_head(self):
+        os.pwrite(self.file.fileno(), TXID_HEAD.pack(self.used, self.indexed), 0)
+
+    def rebuild(self):
+        """
+        Writes a new table, sized for twice the records, holding every record.
+        """
+        count = len(self.records)
+        slots = MIN_SLOTS
+        while slots < 4 * count:
+            slots *= 2
+        table = bytearray(TXID_HEAD.size + slots * TXID_SLOT.size)
+        mask = slots - 1
+        used = 0
+        for position, (txid, _, _) in enumerate(TX_RECORD.iter_unpack(self.records.raw(count))):
+            slot = int.from_bytes(txid[:8], 'little') & mask
+            while True:
+                found, stored = TXID_SLOT.unpack_from(table, TXID_HEAD.size + slot * TXID_SLOT.size)
+                if not stored:
+                    used += 1
+                    break
+                if found == txid:
+                    break
+                slot = (slot + 1) & mask
+            TXID_SLOT.pack_into(table, TXID_HEAD.size + slot * TXID_SLOT.size, txid, position + 1)
+        TXID_HEAD.pack_into(table, 0, used, count)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(table)
+        if self.file is not None:
+            self.file.close()
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, 'r+b')
+        self.slots = slots
+        self.used = used
+        self.indexed = count
+
+    def update(self):
+        """
+        Indexes the records appended (and flushed) since the last update.
+        """
+        count = len(self.records)
+        if self.indexed >= count:
+            return
+        if 2 * (self.used + count - self.indexed) > self.slots:
+            self.rebuild()
+            return
+        for position in range(self.indexed, count):
+            txid = self.records.get(position)[0]
+            slot = self.slot(txid)
+            while True:
+                found, stored = self.read(slot)
+                if not stored:
+                    self.used += 1
+                    break
+                if found == txid:
+                    break
+                slot = (slot + 1) & (self.slots - 1)
+            self.write(slot, txid, position)
+        self.indexed = count
+        self.write_head()
+
+    def find(self, txid):
+        """
+        Returns the position of the record of a txid.
+
+        Args:
+            txid (bytes): The raw txid.
+
+        Returns:
+            int or None: The position, or None if the txid is not indexed.
+        """
+        slot = self.slot(txid)
+        while True:
+            found, stored = self.read(slot)
+            if not stored:
+                return None
+            if found == txid:
+                position = stored - 1
+                if position < self.indexed and self.records.get(position)[0] == txid:
+                    return position
+                return None
+            slot = (slot + 1) & (self.slots - 1)
+
+    def truncate(self, count):
+        """
+        Forgets the records from position `count` on; their slots become stale.
+
+        Args:
+            count (int): Number of records kept.
+        """
+        if count < self.indexed:
+            self.indexed = count
+            self.write_head()
+
+    def close(self):
+        """
+        Closes the file.
+        """
+        self.file.close()
+
+
+class BlockStore:
+    """
+    On-disk store of a chain, opened without reading it.
+
+    A directory holds:
+
+        blocks.dat      the blocks as JSON (see `Block.to_dict`), appended one after the other
+        blocks.idx      one BLOCK_RECORD per block: height, hash, offset and length of the
+                        body, transaction count and timestamp
+        txs.idx         one TX_RECORD per transaction: txid, height and position
+        txids.idx       hash table from txid to TX_RECORD (see TxidIndex)
+        headers.dat     one HeaderChain record per block
+        users.jsonl     the users, one JSON object per line
+        config.json     the parameters of the system
+
+    The index files are memory-mapped, so the store opens in constant time and a
+    block body is only read and decoded when it is loaded. After a crash the files
+    are cut back to the blocks present in every one of them.
+
+    Attributes:
+        directory (str): Directory of the store.
+        data (file): The blocks.dat file.
+        size (int): Length of blocks.dat.
+        blocks (RecordFile): The block index.
+        transactions (RecordFile): The transaction index.
+        txids (TxidIndex): Hash table from txid to transaction record.
+        headers (RecordFile): The header records.
+        config (dict): Parameters of the system stored.
+
+    Methods:
+        append(block): Stores the next block.
+        load(height): Reads and decodes a block.
+        block_hash(height): Returns the hash of a block from the index.
+        truncate(length): Keeps the first `length` blocks.
+        find_transaction(txid): Returns the height and position of a transaction.
+        header_chain(length): Returns the first `length` headers as a HeaderChain.
+        set_config(config): Writes the parameters of the system.
+        add_user(data): Stores a user.
+        users(): Returns the stored users.
+        close(): Closes the files.
+    """
+    def __init__(self, directory):
+        """
+        Opens (or creates) the store in `directory`.
+
+        Args:
+            directory (str): Directory of the store.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.data = open(self.path('blocks.dat'), 'a+b')
+        self.size = os.path.getsize(self.path('blocks.dat'))
+        self.blocks = RecordFile(self.path('blocks.idx'), BLOCK_RECORD)
+        self.transactions = RecordFile(self.path('txs.idx'), TX_RECORD)
+        self.txids = TxidIndex(self.path('txids.idx'), self.transactions)
+        self.headers = RecordFile(self.path('headers.dat'), HEADER)
+        self.config = {}
+        if os.path.exists(self.path('config.json')):
+            with open(self.path('config.json')) as f:
+                self.config = json.load(f)
+        self.recover()
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def recover(self):
+        """
+        Cuts the files back to the blocks written completely to all of them.
+        """
+        length = min(len(self.blocks), len(self.headers))
+        end = 0
+        if length:
+            _, _, offset, size, _, _ = self.blocks.get(length - 1)
+            end = offset + size
+        if end > self.size:
+            length -= 1  # body cut short; the previous bodies were written before it
+        self.truncate(length, force=True)
+
+    def append(self, block):
+        """
+        Stores a block at height `len(self)`.
+
+        Args:
+            block (Block): The block.
+        """
+        body = json.dumps(block.to_dict(), separators=(',', ':')).encode()
+        self.data.write(body)
+        self.data.flush()
+        for position, tx in enumerate(block.transactions):
+            self.transactions.append(TX_RECORD.pack(bytes.fromhex(tx['txid']), block.index, position))
+        self.headers.append(pack_header(block))
+        self.blocks.append(BLOCK_RECORD.pack(
+            block.index, bytes.fromhex(block.hash), self.size, len(body), block.tx_count, block.timestamp.encode()
+        ))
+        self.transactions.flush()
+        self.headers.flush()
+        self.blocks.flush()
+        self.txids.update()
+        self.size += len(body)
+
+    def load(self, height):
+        """
+        Reads and decodes a block.
+
+        Args:
+            height (int): Height of the block.
+
+        Returns:
+            Block: The block.
+        """
+        _, _, offset, length, _, _ = self.blocks.get(height)
+        return Block.from_dict(json.loads(os.pread(self.data.fileno(), length, offset)))
+
+    def block_hash(self, height):
+        """
+        Returns the hash of a block, from the index.
+
+        Args:
+            height (int): Height of the block.
+
+        Returns:
+            str: The hash.
+        """
+        return self.blocks.get(height)[1].hex()
+
+    def truncate(self, length, force=False):
+        """
+        Keeps the first `length` blocks, e.g. when blocks are disconnected.
+
+        Args:
+            length (int): Number of blocks to keep.
+            force (bool): Cut every file even if the block index is already shorter.
+        """
+        if length >= len(self.blocks) and not force:
+            return
+        end = 0
+        if length:
+            _, _, offset, size, _, _ = self.blocks.get(length - 1)
+            end = offset + size
+        low, high = 0, len(self.transactions)
+        while low < high:  # transactions are indexed in height order
+            middle = (low + high) // 2
+            if self.transactions.get(middle)[1] < length:
+                low = middle + 1
+            else:
+                high = middle
+        self.transactions.truncate(low)
+        self.txids.truncate(low)
+        self.headers.truncate(length)
+        self.blocks.truncate(length)
+        self.data.flush()
+        self.data.truncate(end)
+        self.size = end
+
+    def find_transaction(self, txid):
+        """
+        Finds a transaction through the txid hash table.
+
+        Args:
+            txid (str): Hex txid.
+
+        Returns:
+            tuple or None: (height, position in the block), or None if it is not stored.
+        """
+        value = bytes.fromhex(txid)
+        position = self.txids.find(value) if len(value) == 32 else None
+        if position is None:
+            return None
+        _, height, index = self.transactions.get(position)
+        return height, index
+
+    def header_chain(self, length=None):
+        """
+        Returns the headers of the first `length` blocks (all by default).
+
+        Returns:
+            HeaderChain: The headers.
+        """
+        return HeaderChain.from_bytes(self.headers.raw(length))
+
+    def set_config(self, config):
+        """
+        Writes the parameters of the system.
+
+        Args:
+            config (dict): JSON-serializable parameters.
+        """
+        self.config = dict(config)
+        with open(self.path('config.json'), 'w') as f:
+            json.dump(self.config, f)
+
+    def add_user(self, data):
+        """
+        Stores a user.
+
+        Args:
+            data (dict): The user data (see `User.to_dict`).
+        """
+        with open(self.path('users.jsonl'), 'a') as f:
+            f.write(json.dumps(data) + '\n')
+
+    def users(self):
+        """
+        Returns the stored users.
+
+        Returns:
+            list: The user data, in creation order.
+        """
+        if not os.path.exists(self.path('users.jsonl')):
+            return []
+        with open(self.path('users.jsonl')) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def close(self):
+        """
+        Closes the files.
+        """
+        self.data.close()
+        self.blocks.close()
+        self.transactions.close()
+        self.txids.close()
+        self.headers.close()
+
+
+class StoredChain:
+    """
+    List-like view of the first `length` blocks of a BlockStore, used as
+    `System.blockchain` when the chain is stored on disk.
+
+    Blocks are decoded when they are accessed and the most recent ones are kept in
+    a small cache, so the tip is always at hand. Appending a block writes it to the
+    store, unless the store already has it at that height (e.g. when the blocks
+    after a snapshot are replayed on opening); popping one cuts the store.
+
+    Attributes:
+        store (BlockStore): The store.
+        length (int): Number of blocks in the chain.
+        cache (OrderedDict): Height to decoded block, least recently used first.
+        cache_size (int): Maximum number of cached blocks.
+    """
+    def __init__(self, store, length=None, cache_size=CACHE_SIZE):
+        """
+        Initializes the view.
+
+        Args:
+            store (BlockStore): The store.
+            length (int or None): Number of blocks in the chain; every stored block by default.
+            cache_size (int): Maximum number of cached blocks.
+        """
+        self.store = store
+        self.length = len(store) if length is None else length
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for height in range(self.length):
+            yield self[height]
+
+    def __getitem__(self, height):
+        if isinstance(height, slice):
+            return [self[i] for i in range(*height.indices(self.length))]
+        if height < 0:
+            height += self.length
+        if not 0 <= height < self.length:
+            raise IndexError(f"No block at height {height}")
+        block = self.cache.get(height)
+        if block is None:
+            block = self.store.load(height)
+            self.remember(block)
+        else:
+            self.cache.move_to_end(height)
+        return block
+
+    def remember(self, block):
+        """
+        Caches a block, evicting the least recently used one if the cache is full.
+        """
+        self.cache[block.index] = block
+        self.cache.move_to_end(block.index)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def append(self, block):
+        """
+        Appends a block to the chain, writing it to the store unless it is already stored.
+
+        Args:
+            block (Block): The block, at height `len(self)`.
+        """
+        store = self.store
+        if block.index >= len(store) or store.block_hash(block.index) != block.hash:
+            store.truncate(block.index)
+            store.append(block)
+        self.length = block.index + 1
+        self.remember(block)
+
+    def pop(self):
+        """
+        Removes the last block from the chain and the store.
+
+        Returns:
+            Block: The removed block.
+        """
+        block = self[-1]
+        self.length -= 1
+        self.store.truncate(self.length)
+        self.cache.pop(block.index, None)
+        return block
@@ -0,0 +1,196 @@
+def block_work(difficulty):
+    """
+    Returns the expected number of hashes needed to mine a block.
+
+    Args:
+        difficulty (int): Number of leading zero hex digits required.
+
+    Returns:
+        int: The work of one block.
+    """
+    return 16 ** difficulty
+
+
+class UndoRecord:
+    """
+    What a block changed in the system, so it can be disconnected without a replay.
+
+    Attributes:
+        spent (list): UTXOs spent by the block, restored when it is disconnected.
+        created (list): Indexes of the UTXOs created by the block, removed when it is
+            disconnected. Outputs created and spent inside the block appear in both lists.
+        issued (int): Net amount the block added to the issued supply (its reward).
+        fees (int): Number of entries the block appended to `System.mining_fees`.
+        index_utxo (int): UTXO counter before the block.
+        index_transaction (int): Transaction counter before the block.
+    """
+    __slots__ = ('spent', 'created', 'issued', 'fees', 'index_utxo', 'index_transaction')
+
+    def __init__(self, index_utxo, index_transaction):
+        """
+        Initializes an empty record.
+
+        Args:
+            index_utxo (int): UTXO counter before the block.
+            index_transaction (int): Transaction counter before the block.
+        """
+        self.spent = []
+        self.created = []
+        self.issued = 0
+        self.fees = 0
+        self.index_utxo = index_utxo
+        self.index_transaction = index_transaction
+
+
+class BlockNode:
+    """
+    A block in the block tree.
+
+    Attributes:
+        block (Block): The block.
+        parent (BlockNode or None): Node of the previous block.
+        height (int): Height of the block.
+        work (int): Cumulative work of the chain ending at this block.
+        undo (UndoRecord or None): How to disconnect the block; None if it is not on the
+            best chain or cannot be disconnected (genesis, pruned or snapshot blocks).
+        index_utxo (int or None): UTXO counter after the block, while it is on the best chain.
+        index_transaction (int or None): Transaction counter after the block.
+    """
+    __slots__ = ('block', 'parent', 'height', 'work', 'undo', 'index_utxo', 'index_transaction')
+
+    def __init__(self, block, parent, work):
+        """
+        Initializes a node.
+
+        Args:
+            block (Block): The block.
+            parent (BlockNode or None): Node of the previous block.
+            work (int): Work of the block alone.
+        """
+        self.block = block
+        self.parent = parent
+        if parent is None:
+            self.height = block.index
+            self.work = work * (block.index + 1)
+        else:
+            self.height = parent.height + 1
+            self.work = parent.work + work
+        self.undo = None
+        self.index_utxo = None
+        self.index_transaction = None
+
+
+class BlockTree:
+    """
+    Every known block, linked to its parent, with the tip of the chain with the most
+    cumulative work.
+
+    Finding the fork point of two chains walks back from both tips, so it costs
+    O(k) for branches of k blocks, whatever the length of the chain.
+
+    Attributes:
+        nodes (dict): Block hash to BlockNode.
+        tip (BlockNode or None): Tip of the best chain.
+
+    Methods:
+        add(block, work, parent): Adds a block to the tree.
+        get(block_hash): Returns the node of a block, or None.
+        fork_point(a, b): Returns the last common node of two chains.
+        branch(ancestor, node): Returns the nodes after `ancestor` up to `node`.
+        remove(node): Removes a node and its descendants.
+    """
+    def __init__(self):
+        """
+        Initializes an empty tree.
+        """
+        self.nodes = {}
+        self.tip = None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, block_hash):
+        return block_hash in self.nodes
+
+    def add(self, block, work, parent=None):
+        """
+        Adds a block to the tree. The tip is not changed.
+
+        Args:
+            block (Block): The block.
+            work (int): Work of the block alone.
+            parent (BlockNode or None): Node of the previous block; None for the root.
+
+        Returns:
+            BlockNode: The new node.
+        """
+        node = BlockNode(block, parent, work)
+        self.nodes[block.hash] = node
+        return node
+
+    def get(self, block_hash):
+        """
+        Returns the node of a block.
+
+        Args:
+            block_hash (str): Hash of the block.
+
+        Returns:
+            BlockNode or None: The node, or None if the block is unknown.
+        """
+        return self.nodes.get(block_hash)
+
+    def fork_point(self, a, b):
+        """
+        Returns the last node shared by the chains ending at `a` and `b`.
+
+        Args:
+            a (BlockNode): Tip of the first chain.
+            b (BlockNode): Tip of the second chain.
+
+        Returns:
+            BlockNode: The common ancestor.
+
+        Raises:
+            ValueError: If the chains share no node.
+        """
+        while a is not b:
+            if a is None or b is None:
+                raise ValueError("The chains have no common block")
+            if a.height >= b.height:
+                a = a.parent
+            else:
+                b = b.parent
+        return a
+
+    def branch(self, ancestor, node):
+        """
+        Returns the nodes after `ancestor` up to and including `node`, oldest first.
+
+        Args:
+            ancestor (BlockNode): A node on the chain of `node`.
+            node (BlockNode): The last node.
+
+        Returns:
+            list: The nodes.
+        """
+        nodes = []
+        while node is not ancestor:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+    def remove(self, node):
+        """
+        Removes a node and every node built on it, e.g. after finding an invalid block.
+
+        Args:
+            node (BlockNode): The node.
+        """
+        removed = {node}
+        for other in list(self.nodes.values()):
+            if other.parent in removed:
+                removed.add(other)
+        for other in removed:
+            self.nodes.pop(other.block.hash, None)
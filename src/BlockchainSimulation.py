@@ -5,24 +5,41 @@ from graphviz import Digraph
 import plotly.express as px
 import plotly.graph_objects as go
 import os
-import pickle
+import tempfile
 from pyvis.network import Network
 from streamlit.components.v1 import html
 import io
 
 from System import System
+from Amount import COIN, DECIMALS, to_units, to_coins, format_amount
+from Profiler import profiler
+from Analytics import ChainAnalytics
+from ChainFile import export_system, import_system, ChainFileError
 
 
 
-def save_system(filepath="session.pkl"):
+# Amount inputs show and accept at most DECIMALS decimals
+AMOUNT_FORMAT = f"%.{DECIMALS}f"
+
+def input_units(coins):
+    # st.number_input returns floats; rounding to DECIMALS drops binary noise such as 3.3000000000000003
+    return to_units(round(coins, DECIMALS))
+
+def show_progress(bar, label):
+    # Progress callback for export_system / import_system
+    def update(done, total):
+        bar.progress(done / total if total else 1.0, text=f"{label}: bloque {done} de {total}")
+    return update
+
+def save_system(filepath="session.chain"):
     with open(filepath, 'wb') as f:
-        pickle.dump(st.session_state.system, f)
+        export_system(st.session_state.system, f, private_keys=True)
     st.success("✅ System saved successfully.")
 
-def load_system(filepath="session.pkl"):
+def load_system(filepath="session.chain"):
     if os.path.exists(filepath):
         with open(filepath, 'rb') as f:
-            system = pickle.load(f)
+            system = import_system(f)
         st.session_state.system = system
         st.session_state['loaded'] = True
         st.success("✅ System loaded successfully.")
@@ -31,22 +48,31 @@ def load_system(filepath="session.pkl"):
         st.warning("⚠️ File not found.")
 
 
-def draw_snaking_blockchain(blocks, row_length=4):
+def get_analytics():
+    # Columnar history kept across reruns; only new blocks are ingested
+    if 'analytics' not in st.session_state:
+        st.session_state.analytics = ChainAnalytics()
+    st.session_state.analytics.update(st.session_state.system)
+    return st.session_state.analytics
+
+
+def draw_snaking_blockchain(headers, row_length=4):
+    # Only reads the header records (index, nonce, tx count), never the block bodies
     import graphviz
     dot = graphviz.Digraph(format="png")
     dot.attr(rankdir="LR", splines="line", nodesep="0.6", ranksep="0.8")
 
-    for i, block in enumerate(blocks):
+    for i, block in enumerate(headers):
         # Choose fill color
         if block.index == 0:
             color = "#FF4B4B"  # Primary red
         else:
             color = "#393B41"  # Block gray
 
-        label = f"Block {block.index}\nNonce: {block.nonce}\nTransactions: {len(block.transactions)}"
+        label = f"Block {block.index}\nNonce: {block.nonce}\nTransactions: {block.tx_count}"
         dot.node(str(block.index), label=label, shape="box", style="filled", fillcolor=color, fontcolor="#FAFAFA")
 
-    for i in range(1, len(blocks)):
+    for i in range(1, len(headers)):
         row = i // row_length
         direction = "left" if row % 2 == 1 else "right"
         if direction == "right":
@@ -59,7 +85,7 @@ def draw_snaking_blockchain(blocks, row_length=4):
 
 # Sidebar navigation
 st.sidebar.title("Simulador de Blockchain")
-menu = st.sidebar.selectbox("Ir a", ["Inicio", "Resumen", "Usuarios", "Transacciones", "Minería", "Blockchain", "Balances", 'Guardar Estado'])
+menu = st.sidebar.selectbox("Ir a", ["Inicio", "Resumen", "Usuarios", "Transacciones", "Minería", "Blockchain", "Balances", "Rendimiento", 'Guardar Estado'])
 
 if st.session_state.get('loaded'):
     st.sidebar.success("Sistema cargado ✅")
@@ -83,24 +109,41 @@ if menu == "Inicio":
 
     with col1:
         st.markdown("### 🆕 Nuevo sistema")
+        seed = st.text_input("🎲 Semilla (opcional, para simulaciones reproducibles)")
         if st.button("Crear nuevo sistema"):
-            st.session_state.system = System()
+            st.session_state.system = System(seed=seed or None)
             st.session_state['new'] = True
             st.success("✅ Sistema nuevo creado.")
 
     with col2:
         st.markdown("### 📂 Cargar sistema")
-        uploaded_file = st.file_uploader("Sube un archivo `.pkl` con el sistema guardado", type="pkl")
+        uploaded_file = st.file_uploader("Sube un archivo `.chain` con el sistema guardado", type="chain")
+        workers = st.number_input("⚙️ Procesos de validación", min_value=1, max_value=os.cpu_count() or 1, value=1)
 
-        if uploaded_file is not None:
+        if uploaded_file is not None and st.session_state.get('uploaded_id') != uploaded_file.file_id:
             try:
-                system = pickle.load(uploaded_file)
+                bar = st.progress(0.0, text="Verificando archivo")
+                system = import_system(uploaded_file, progress=show_progress(bar, "Validando"), workers=workers)
                 st.session_state.system = system
                 st.session_state['loaded'] = True
-                st.success("✅ Sistema cargado desde archivo.")
-                # st.experimental_rerun()  # Optional: reload app to refresh state
+                st.session_state['uploaded_id'] = uploaded_file.file_id
+                st.success("✅ Sistema cargado y verificado desde archivo.")
+                if any(user.sk is None for user in system.users):
+                    st.info("ℹ️ El archivo no incluye claves privadas: los usuarios son de solo lectura.")
+            except ChainFileError as e:
+                st.error(f"❌ Archivo inválido o corrupto: {e}")
             except Exception as e:
-                st.error(f"❌ Error al cargar el archivo: {e}")
+                st.error(f"❌ No se pudo cargar el archivo: {e}")
+
+        st.markdown("### 🗄️ Abrir nodo")
+        directorio = st.text_input("Directorio del almacén de bloques", value="nodo")
+        if st.button("Abrir nodo"):
+            try:
+                st.session_state.system = System.open(directorio)
+                st.session_state['loaded'] = True
+                st.success(f"✅ Nodo abierto desde `{directorio}` ({len(st.session_state.system.blockchain)} bloques).")
+            except (ValueError, OSError) as e:
+                st.error(f"❌ No se pudo abrir el nodo: {e}")
 
 # Resumen
 if menu == "Resumen":
@@ -113,8 +156,8 @@ if menu == "Resumen":
         st.text("")
         
         col1, col2, col3 = st.columns(3)
-        col1.metric("💵 Recompensa de Minería", st.session_state.system.mining_reward)
-        col2.metric("🧾 Tarifa de Minería", st.session_state.system.mining_fee)
+        col1.metric("💵 Recompensa de Minería", format_amount(st.session_state.system.mining_reward))
+        col2.metric("🧾 Tarifa de Minería", format_amount(st.session_state.system.mining_fee))
         col3.metric("🛠️ Dificultad de Minería", st.session_state.system.difficulty)
 
         col4, col5, col6 = st.columns(3)
@@ -122,33 +165,21 @@ if menu == "Resumen":
         col5.metric("📦 Bloques en la cadena", len(st.session_state.system.blockchain))
         col6.metric("🔄 Transacciones pendientes", len(st.session_state.system.mempool))
 
+        analytics = get_analytics()
+        frames = analytics.to_pandas()
+        df_blocks = frames['blocks']
+
         col7, col8, col9 = st.columns(3)
-        col7.metric("✅ Transacciones confirmadas", sum(len(block.transactions) for block in st.session_state.system.blockchain)) #sum(len(block.transactions) for block in system.blockchain)
+        col7.metric("✅ Transacciones confirmadas", int(df_blocks['tx_count'].sum()))
         col8.metric("🧱 UTXOs disponibles", len(st.session_state.system.UTXO_set))
-        col9.metric("🏆 Recompensas totales", sum(utxo.amount for utxo in st.session_state.system.rewards))
+        col9.metric("🏆 Recompensas totales", format_amount(int(df_blocks['reward'].iloc[1:].sum())))
 
         col10, col11, col13 = st.columns(3)
         with col11:
-            balances_dict = st.session_state.system.get_balances()
-            total = sum(user_info[1] for user_info in balances_dict.values())
-            col11.metric(f"### 💰 Total en circulación", round(total, 4))
+            col11.metric(f"### 💰 Total en circulación", format_amount(int(df_blocks['supply'].iloc[-1])))
 
-        
-        money_in_circulation = st.session_state.system.money_in_circulation  
-        if money_in_circulation:
-
-    
-            money_in_circulation_data = []
-            for key, value in money_in_circulation.items():
-                date = key
-                money = value  
-                money_in_circulation_data.append({
-                    'Index': date,  
-                    'Amount': money
-                })
-
-            df_money_in_circulation = pd.DataFrame(money_in_circulation_data)
-            df_money_in_circulation['Index'] = pd.to_datetime(df_money_in_circulation['Index'])
+        if not df_blocks.empty:
+            df_money_in_circulation = pd.DataFrame({'Index': df_blocks['time'], 'Amount': df_blocks['supply'] / COIN})
 
             # Plot line chart
             fig = px.line(df_money_in_circulation, x='Index', y='Amount', title="💸 Dinero en Circulación",
@@ -164,21 +195,16 @@ if menu == "Resumen":
             st.plotly_chart(fig)
 
 
+        df_rewards = df_blocks.iloc[1:]  # the genesis block has no mining reward
+        if not df_rewards.empty:
+            df_rewards = pd.DataFrame({
+                'Index': df_rewards['height'],
+                'Recompensa': df_rewards['reward'] / COIN,
+                'Tarifas': df_rewards['fees'] / COIN,
+            })
 
-        rewards = st.session_state.system.rewards  
-        if rewards:
-
-            reward_data = []
-            for i, utxo in enumerate(rewards):
-                reward_data.append({
-                    'Index': i,  
-                    'Amount': utxo.amount
-                })
-
-            df_rewards = pd.DataFrame(reward_data)
-
-            fig = px.line(df_rewards, x="Index", y="Amount", title="🏆 Recompensas por Bloque",
-                        labels={"Index": "Bloque", "Amount": "Recompensa"}, markers=True)
+            fig = px.line(df_rewards, x="Index", y=["Recompensa", "Tarifas"], title="🏆 Recompensas y Tarifas por Bloque",
+                        labels={"Index": "Bloque", "value": "Cantidad", "variable": ""}, markers=True)
             fig.update_layout(
                         xaxis=dict(
                             range=[-1, df_rewards["Index"].max() + 1],
@@ -188,7 +214,6 @@ if menu == "Resumen":
                     )
 
 
-            total = sum(utxo.amount for utxo in rewards)
             st.plotly_chart(fig)
 
     except AttributeError:
@@ -217,8 +242,11 @@ elif menu == "Usuarios":
             for user in st.session_state.system.users:
                 with st.expander(f"👤 Usuario {user.index}"):
                     st.text(f"📍 Dirección:\n{user.adress}")
-                    balance = user.get_balance(st.session_state.system.UTXO_set)
-                    st.metric("💰 Saldo", balance)
+                    wallet = user.wallet
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("💰 Saldo", format_amount(wallet.balance))
+                    col2.metric("✅ Saldo confirmado", format_amount(wallet.confirmed_balance()))
+                    col3.metric("🧱 UTXOs", len(wallet))
     except AttributeError:
         st.error("⚠️ No se ha cargado un sistema. Por favor, crea un nuevo sistema o carga uno existente.")
 
@@ -232,12 +260,16 @@ elif menu == "Transacciones":
         users = st.session_state.system.users
         utxo_set = st.session_state.system.UTXO_set
 
+        signers = [u for u in users if u.sk is not None]  # users loaded without private keys cannot sign
+
         if len(users) < 2:
             st.warning("❌ Necesitas al menos 2 usuarios para enviar transacciones.")
+        elif not signers:
+            st.warning("❌ Ningún usuario tiene clave privada para firmar transacciones.")
         else:
-            sender = st.selectbox("👤 Remitente", users, format_func=lambda x: f"Usuario {x.index}")
-            balance = float(sender.get_balance(utxo_set))
-            max_value = balance - st.session_state.system.mining_fee
+            sender = st.selectbox("👤 Remitente", signers, format_func=lambda x: f"Usuario {x.index}")
+            balance = sender.get_balance(utxo_set)
+            max_value = to_coins(balance - st.session_state.system.mining_fee)
             receiver = st.selectbox("👥 Receptor", [u for u in users if u.adress != sender.adress], format_func=lambda x: f"Usuario {x.index}")
 
             col1, col2 = st.columns([2, 1])
@@ -245,20 +277,38 @@ elif menu == "Transacciones":
                 if max_value <= 0:
                     st.warning("⚠️ El remitente no tiene saldo suficiente para enviar transacciones.")
                 else:
-                    amount = st.number_input("💸 Cantidad a enviar", min_value=0.1, max_value=max_value, step=5.0)
+                    amount = st.number_input("💸 Cantidad a enviar", min_value=0.1, max_value=max_value, step=5.0, format=AMOUNT_FORMAT)
 
             with col2:
-                st.metric("💰 Saldo del remitente", round(balance, 2))
+                st.metric("💰 Saldo del remitente", format_amount(balance))
 
             if max_value > 0 and sender.adress != receiver.adress:
                 if st.button("📨 Enviar"):
-                    success = st.session_state.system.send_transaction(sender, receiver, amount)
-                    if success:
-                        st.success("✅ Transacción enviada correctamente.")
+                    try:
+                        success = st.session_state.system.send_transaction(sender, receiver, input_units(amount))
+                    except ValueError as e:
+                        st.error(f"❌ Cantidad inválida: {e}")
                     else:
-                        st.error("❌ Falló el envío de la transacción.")
+                        if success:
+                            st.success("✅ Transacción enviada correctamente.")
+                        else:
+                            st.error("❌ Falló el envío de la transacción.")
             elif sender.adress == receiver.adress:
                 st.warning("⚠️ El remitente y el receptor no pueden ser la misma persona.")
+
+            with st.expander("📦 Pago múltiple (una sola transacción)"):
+                receivers = st.multiselect("👥 Receptores", [u for u in users if u.adress != sender.adress], format_func=lambda x: f"Usuario {x.index}")
+                amounts = [st.number_input(f"💸 Cantidad para Usuario {u.index}", min_value=0.1, step=1.0, format=AMOUNT_FORMAT, key=f"batch_{u.index}") for u in receivers]
+                if receivers and st.button("📨 Enviar pago múltiple"):
+                    try:
+                        payments = [(u, input_units(value)) for u, value in zip(receivers, amounts)]
+                    except ValueError as e:
+                        st.error(f"❌ Cantidad inválida: {e}")
+                    else:
+                        if st.session_state.system.send_many(sender, payments):
+                            st.success(f"✅ Pago a {len(payments)} receptores enviado en una sola transacción.")
+                        else:
+                            st.error("❌ Falló el envío del pago múltiple.")
     except AttributeError:
         st.error("⚠️ No se ha cargado un sistema. Por favor, crea un nuevo sistema o carga uno existente.")
 
@@ -278,7 +328,7 @@ elif menu == "Minería":
                     block = st.session_state.system.mine_block(minero)
                     st.success("Bloque minado y añadido a la cadena")
                     st.write(f"⏱️ Tiempo de minería: {block.mining_time:.2f} segundos")
-                    st.write(f"💰 Recompensa total del minero: {block.miner_total_reward}")
+                    st.write(f"💰 Recompensa total del minero: {format_amount(block.miner_total_reward)}")
             with col3:
                 col3.metric("🔄 Transacciones pendientes", len(st.session_state.system.mempool))
     except AttributeError:
@@ -289,25 +339,29 @@ elif menu == "Blockchain":
     try:
         st.title("🔗 Blockchain Viewer")
         blockchain = st.session_state.system.blockchain  # your blockchain object
+        headers = st.session_state.system.headers
+
 
+        for header in headers:
+            with st.expander(f"🧱 Block {header.index}"):
+                st.markdown(f"**Index:** {header.index}")
+                st.markdown(f"**Timestamp:** {header.timestamp}")
+                st.markdown(f"**Previous Hash:** `{header.previous_hash}`")
+                st.markdown(f"**Hash:** `{header.hash}`")
+                st.markdown(f"**Merkle Root:** `{header.merkle_root.hex()}`")
+                st.markdown(f"**Nonce:** {header.nonce}")
 
-        for block in blockchain:
-            with st.expander(f"🧱 Block {block.index}"):
-                st.markdown(f"**Index:** {block.index}")
-                st.markdown(f"**Timestamp:** {block.timestamp}")
-                st.markdown(f"**Previous Hash:** `{block.previous_hash}`")
-                st.markdown(f"**Hash:** `{block.hash}`")
-                st.markdown(f"**Nonce:** {block.nonce}")
-                st.markdown(f"**Miner Reward:** {block.miner_total_reward}")
-                st.markdown(f"**Mining Time:** {block.mining_time}")
-                
-                st.markdown("**Transactions:**")
-                for tx in block.transactions:
-                    st.code(json.dumps(tx, indent=2), language="json")
+                # The body is only decoded (or read from disk) on request
+                if st.checkbox(f"Ver {header.tx_count} transacciones", key=f"txs_{header.index}"):
+                    block = blockchain[header.index]
+                    st.markdown(f"**Miner Reward:** {format_amount(block.miner_total_reward) if block.miner_total_reward is not None else None}")
+                    st.markdown(f"**Mining Time:** {block.mining_time}")
+                    for tx in block.transactions:
+                        st.code(json.dumps(tx, indent=2), language="json")
 
 
 
-        dot = draw_snaking_blockchain(st.session_state.system.blockchain, row_length=4)
+        dot = draw_snaking_blockchain(headers, row_length=4)
         st.graphviz_chart(dot.source)
     except AttributeError:
         st.error("⚠️ No se ha cargado un sistema. Por favor, crea un nuevo sistema o carga uno existente.")
@@ -323,9 +377,9 @@ elif menu == "Balances":
 
         data = []
         for user, info in balances_dict.items():
-            balance = float(info[1])
+            balance = to_coins(info[1])
             address = info[0]
-            data.append({"Usuario": user, "Dirección": address, "Saldo": round(balance, 4)})
+            data.append({"Usuario": user, "Dirección": address, "Saldo": balance})
 
         df = pd.DataFrame(data)
         df = df.sort_values(by="Saldo", ascending=False)
@@ -334,31 +388,135 @@ elif menu == "Balances":
 
         a, b, c = st.columns(3)
         with b:
-            total = sum(user_info[1] for user_info in balances_dict.values())
-            st.metric(f"### 💰 Total en circulación", round(total, 4))
+            total = st.session_state.system.UTXO_set.total()
+            st.metric(f"### 💰 Total en circulación", format_amount(total))
+
+        analytics = get_analytics()
+        history = analytics.balance_history()
+        if len(history):
+            df_history = pd.DataFrame(history / COIN, columns=analytics.adresses)
+            df_history.insert(0, "Bloque", analytics.columns()['block_height'])
+            df_history = df_history.melt(id_vars="Bloque", var_name="Dirección", value_name="Saldo")
+            fig = px.line(df_history, x="Bloque", y="Saldo", color="Dirección", title="📈 Saldo por Dirección")
+            fig.update_layout(showlegend=False)
+            st.plotly_chart(fig)
+
+        counts, edges = analytics.utxo_age_histogram(st.session_state.system.UTXO_set, bins=10)
+        if counts.sum():
+            df_ages = pd.DataFrame({
+                "Antigüedad (bloques)": [f"{edges[i]:.0f}-{edges[i + 1]:.0f}" for i in range(len(counts))],
+                "UTXOs": counts,
+            })
+            fig = px.bar(df_ages, x="Antigüedad (bloques)", y="UTXOs", title="⏳ Antigüedad de los UTXOs")
+            st.plotly_chart(fig)
+
+        buffer = io.BytesIO()
+        analytics.save(buffer)
+        st.download_button("⬇️ Exportar historial (.npz)", data=buffer.getvalue(), file_name="historial.npz", mime="application/octet-stream")
     except AttributeError:
         st.error("⚠️ No se ha cargado un sistema. Por favor, crea un nuevo sistema o carga uno existente.")
 
 
+# Rendimiento
+elif menu == "Rendimiento":
+    st.title("📈 Rendimiento")
+
+    activo = st.checkbox("Instrumentación activa", value=profiler.enabled)
+    if activo and not profiler.enabled:
+        profiler.enable()
+    elif not activo and profiler.enabled:
+        profiler.disable()
+    if st.button("🔄 Reiniciar métricas"):
+        profiler.reset()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("📦 Bloques minados", profiler.counters.get('blocks', 0))
+    col2.metric("🔢 Intentos de PoW", profiler.counters.get('pow_attempts', 0))
+    col3.metric("📨 Transacciones", profiler.counters.get('transactions', 0))
+    last_hashrate = profiler.hashrates[-1][1] if profiler.hashrates else None
+    col4.metric("⚡ Hashrate (H/s)", f"{last_hashrate:,.0f}" if last_hashrate else "-")
+
+    if not profiler.stages:
+        st.info("Activa la instrumentación y envía transacciones o mina bloques para ver métricas.")
+    else:
+        stage_data = []
+        for stage, stats in profiler.stages.items():
+            stage_data.append({
+                "Etapa": stage,
+                "Llamadas": stats.count,
+                "Total (ms)": round(stats.total * 1000, 3),
+                "Media (µs)": round(stats.total / stats.count * 1_000_000, 2),
+                "Mín (µs)": round(stats.min * 1_000_000, 2),
+                "Máx (µs)": round(stats.max * 1_000_000, 2),
+            })
+        df_stages = pd.DataFrame(stage_data).sort_values(by="Total (ms)", ascending=False)
+        st.dataframe(df_stages, use_container_width=True, hide_index=True)
+
+        hashrates = [{"Bloque": index, "Hashrate": rate} for index, rate in profiler.hashrates if rate is not None]
+        if hashrates:
+            fig = px.line(pd.DataFrame(hashrates), x="Bloque", y="Hashrate", title="⚡ Hashrate por Bloque",
+                        labels={"Hashrate": "Hashes por segundo"}, markers=True)
+            st.plotly_chart(fig)
+
+        latencies = profiler.samples('send_transaction')
+        if latencies:
+            df_latencies = pd.DataFrame({"Latencia (ms)": [seconds * 1000 for seconds in latencies]})
+            fig = px.histogram(df_latencies, x="Latencia (ms)", nbins=30, title="⏱️ Latencia de Transacciones")
+            st.plotly_chart(fig)
+
+    col5, col6 = st.columns(2)
+    with col5:
+        st.download_button("⬇️ Exportar JSON", data=profiler.to_json(), file_name="rendimiento.json", mime="application/json")
+    with col6:
+        st.download_button("⬇️ Exportar Prometheus", data=profiler.to_prometheus(), file_name="rendimiento.prom", mime="text/plain")
+
+
 elif menu == 'Guardar Estado':
     try:
         st.header("💾 Guardar el sistema actual")
         x = st.session_state.system
 
-        buffer = io.BytesIO()
-        pickle.dump(x, buffer)
-        buffer.seek(0)
-
-        download_clicked = st.download_button(
-            label="⬇️ Descargar sistema como .pkl",
-            data=buffer,
-            file_name="sistema.pkl",
-            mime="application/octet-stream"
-        )
-
-        if download_clicked:
-            st.success("✅ Archivo descargado con éxito como sistema.pkl")
+        incluir_snapshot = st.checkbox("Incluir snapshot del conjunto UTXO (carga más rápida)", value=True)
+        incluir_claves = st.checkbox("Incluir claves privadas de los usuarios", value=False)
+        if x.mempool:
+            st.warning("⚠️ Las transacciones pendientes no se guardan; mina un bloque antes para conservarlas.")
+
+        if st.button("📦 Preparar archivo"):
+            bar = st.progress(0.0, text="Exportando")
+            # Streamed to disk, so the chain is never held in memory; the previous export is removed
+            anterior = st.session_state.pop('export_path', None)
+            if anterior and os.path.exists(anterior):
+                os.remove(anterior)
+            with tempfile.NamedTemporaryFile(suffix=".chain", delete=False) as f:
+                export_system(x, f, snapshot=incluir_snapshot, private_keys=incluir_claves,
+                              progress=show_progress(bar, "Exportando"))
+            st.session_state['export_path'] = f.name
+
+        export_path = st.session_state.get('export_path')
+        if export_path and os.path.exists(export_path):
+            with open(export_path, 'rb') as f:
+                download_clicked = st.download_button(
+                    label="⬇️ Descargar sistema como .chain",
+                    data=f,
+                    file_name="sistema.chain",
+                    mime="application/octet-stream"
+                )
+
+            if download_clicked:
+                st.success("✅ Archivo descargado con éxito como sistema.chain")
+
+        st.header("🗄️ Guardar en disco")
+        if x.store is not None:
+            st.info(f"ℹ️ La cadena se guarda en `{x.store.directory}` a medida que se minan bloques.")
+        else:
+            directorio = st.text_input("Directorio del almacén de bloques", value="nodo")
+            intervalo = st.number_input("Bloques entre snapshots", min_value=1, value=100)
+            claves_disco = st.checkbox("Guardar claves privadas en disco", value=True)
+            if st.button("🗄️ Activar almacén"):
+                try:
+                    x.enable_store(directorio, snapshot_interval=intervalo, private_keys=claves_disco)
+                    st.success(f"✅ Cadena guardada en `{directorio}`; ábrela desde Inicio.")
+                except ValueError as e:
+                    st.error(f"❌ {e}")
     except AttributeError:
         st.error("⚠️ No se ha cargado un sistema. Por favor, crea un nuevo sistema o carga uno existente.")
-    except pickle.PicklingError as e:
-        st.error("Pickling fallid. Refresca el sistema.")
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import struct
+
+from Block import Block
+from User import User
+from Snapshot import UTXOSnapshot, SnapshotError
+from ChainValidator import ChainValidator, ValidationError
+from System import System
+
+
+MAGIC = b'CHAINEXP'
+VERSION = 2
+PREAMBLE = struct.Struct('<8sH')
+SEGMENT = struct.Struct('<4sI')
+COUNT = struct.Struct('<Q')
+HASH_SIZE = 32
+SUFFIX = '.chain'
+REPLAY_BATCH = 64
+
+HEAD = b'HEAD'
+USER = b'USER'
+BLOCK = b'BLCK'
+SNAPSHOT = b'SNAP'
+END = b'END.'
+
+
+class ChainFileError(Exception):
+    """
+    Raised when a chain file is malformed, truncated or fails an integrity check.
+    """
+    pass
+
+
+class ChainWriter:
+    """
+    Writes a chain file one segment at a time.
+
+    A chain file is a preamble (magic, version) followed by segments:
+
+        kind        4 bytes: HEAD, USER, BLCK, SNAP or END.
+        length      uint32, length of the payload
+        payload     JSON for HEAD, USER and BLCK; an encoded UTXOSnapshot for SNAP;
+                    the number of previous segments (uint64) for END.
+        digest      SHA-256 of the previous digest, the kind and the payload
+
+    Digests are chained from a hash of the preamble, so a segment that is altered,
+    dropped or moved fails the check of its own digest or of the next one, and a
+    file cut short has no END segment. All integers are little-endian.
+
+    Attributes:
+        file (file): Binary file object being written.
+        digest (bytes): Digest of the last segment.
+        count (int): Number of segments written.
+
+    Methods:
+        write(kind, payload): Writes a segment.
+        write_json(kind, data): Writes a segment with a JSON payload.
+        close(): Writes the END segment.
+    """
+    def __init__(self, file):
+        """
+        Initializes the writer and writes the preamble.
+
+        Args:
+            file (file): Binary file object.
+        """
+        self.file = file
+        preamble = PREAMBLE.pack(MAGIC, VERSION)
+        self.file.write(preamble)
+        self.digest = hashlib.sha256(preamble).digest()
+        self.count = 0
+
+    def write(self, kind, payload):
+        """
+        Writes a segment.
+
+        Args:
+            kind (bytes): The 4-byte segment kind.
+            payload (bytes): The payload.
+        """
+        self.digest = hashlib.sha256(self.digest + kind + payload).digest()
+        self.file.write(SEGMENT.pack(kind, len(payload)))
+        self.file.write(payload)
+        self.file.write(self.digest)
+        self.count += 1
+
+    def write_json(self, kind, data):
+        """
+        Writes a segment with a JSON payload.
+
+        Args:
+            kind (bytes): The 4-byte segment kind.
+            data (dict): The payload.
+        """
+        self.write(kind, json.dumps(data, separators=(',', ':')).encode())
+
+    def close(self):
+        """
+        Writes the END segment. The file object is left open.
+        """
+        self.write(END, COUNT.pack(self.count))
+
+
+class ChainReader:
+    """
+    Reads and verifies a chain file one segment at a time (see ChainWriter).
+
+    Iterating yields (kind, payload) pairs, each checked against its digest before it
+    is returned, and stops after a valid END segment.
+
+    Attributes:
+        file (file): Binary file object being read.
+        digest (bytes): Digest of the last segment.
+        count (int): Number of segments read.
+    """
+    def __init__(self, file):
+        """
+        Initializes the reader and checks the preamble.
+
+        Args:
+            file (file): Binary file object.
+
+        Raises:
+            ChainFileError: If the file is not a chain file of a supported version.
+        """
+        self.file = file
+        preamble = self.read_exactly(PREAMBLE.size)
+        magic, version = PREAMBLE.unpack(preamble)
+        if magic != MAGIC or version != VERSION:
+            raise ChainFileError(f"Not a version {VERSION} chain file")
+        self.digest = hashlib.sha256(preamble).digest()
+        self.count = 0
+
+    def read_exactly(self, size):
+        """
+        Reads `size` bytes.
+
+        Raises:
+            ChainFileError: If the file ends first.
+        """
+        data = self.file.read(size)
+        if len(data) != size:
+            raise ChainFileError("Chain file is truncated")
+        return data
+
+    def __iter__(self):
+        while True:
+            kind, length = SEGMENT.unpack(self.read_exactly(SEGMENT.size))
+            payload = self.read_exactly(length)
+            digest = self.read_exactly(HASH_SIZE)
+            self.digest = hashlib.sha256(self.digest + kind + payload).digest()
+            if digest != self.digest:
+                raise ChainFileError(f"Segment {self.count} ({kind.decode(errors='replace')}) failed its integrity check")
+            if kind == END:
+                if COUNT.unpack(payload)[0] != self.count:
+                    raise ChainFileError("Chain file has a wrong segment count")
+                return
+            self.count += 1
+            yield kind, payload
+
+
+def export_system(system, file, snapshot=True, private_keys=False, progress=None):
+    """
+    Writes a system to a chain file, block by block.
+
+    Pending transactions are not exported. The UTXO snapshot is only written when
+    the mempool is empty, since pending transactions have already changed the UTXO set.
+
+    Args:
+        system (System): The system.
+        file (file): Binary file object.
+        snapshot (bool): Whether to append a UTXO snapshot of the last block, which
+            lets the import skip the replay of the chain.
+        private_keys (bool): Whether to include the private keys of the users; only
+            their public data is written otherwise.
+        progress (callable or None): Called as `progress(blocks_done, blocks_total)`.
+
+    Returns:
+        int: Number of segments written.
+    """
+    snapshot = snapshot and not system.mempool and bool(system.blockchain)
+    writer = ChainWriter(file)
+    writer.write_json(HEAD, {
+        'mining_fee': system.mining_fee,
+        'mining_reward': system.mining_reward,
+        'difficulty': system.difficulty,
+        'seed': system.seed,
+        'users': len(system.users),
+        'blocks': len(system.blockchain),
+        'snapshot': snapshot,
+    })
+
+    for user in system.users:
+        writer.write_json(USER, user.to_dict(private_keys))
+
+    total = len(system.blockchain)
+    for done, block in enumerate(system.blockchain, 1):
+        writer.write_json(BLOCK, block.to_dict())
+        if progress is not None:
+            progress(done, total)
+
+    if snapshot:
+        utxo_snapshot = UTXOSnapshot.from_system(system)
+        data = utxo_snapshot.to_bytes()
+        writer.write(SNAPSHOT, data + hashlib.sha256(data).digest())
+
+    writer.close()
+    return writer.count
+
+
+def import_system(file, progress=None, workers=1):
+    """
+    Reads a system from a chain file, verifying every segment as it is read.
+
+    Blocks are validated in batches as they arrive (hashes, links, proof-of-work,
+    txids and signatures, see ChainValidator), on `workers` processes. Without a
+    snapshot they are then replayed; with one they are only linked, and the UTXO set
+    comes from the snapshot. Users get their private key back when the file has it,
+    or derive it again from the seed of a deterministic system; otherwise they are
+    watch-only. The virtual clock of a deterministic system resumes after the last block.
+
+    Args:
+        file (file): Binary file object.
+        progress (callable or None): Called as `progress(blocks_done, blocks_total)`.
+        workers (int): Number of processes validating blocks.
+
+    Returns:
+        System: The restored system.
+
+    Raises:
+        ChainFileError: If the file is malformed, truncated or corrupted.
+    """
+    segments = iter(ChainReader(file))
+    kind, payload = next(segments, (None, None))
+    if kind != HEAD:
+        raise ChainFileError("Chain file does not start with a header")
+    head = json.loads(payload)
+
+    system = System(difficulty=head['difficulty'], genesis=False, seed=head['seed'])
+    system.mining_fee = head['mining_fee']
+    system.mining_reward = head['mining_reward']
+
+    blocks = []
+    batch = []
+    batch_size = REPLAY_BATCH * workers
+    previous = None
+    validator = None
+
+    def flush():
+        if head['snapshot']:
+            validator.validate(batch)
+            blocks.extend(batch)
+        else:
+            validator.apply(system, batch)
+        if progress is not None:
+            progress(batch[-1].index + 1, head['blocks'])
+
+    try:
+        for kind, payload in segments:
+            if kind == USER:
+                user = User.from_dict(json.loads(payload), system.seed)
+                system.add_user(user)
+                system.index_user = max(system.index_user, user.index + 1)
+
+            elif kind == BLOCK:
+                if validator is None:
+                    keys = {user.adress: user.public_key for user in system.users}
+                    validator = ChainValidator(system.difficulty, keys, workers)
+                previous = Block.from_dict(json.loads(payload))
+                batch.append(previous)
+                if len(batch) == batch_size:
+                    flush()
+                    batch = []
+
+            elif kind == SNAPSHOT:
+                if batch:
+                    flush()
+                    batch = []
+                try:
+                    snapshot = UTXOSnapshot.from_bytes(payload)
+                except SnapshotError as e:
+                    raise ChainFileError(str(e))
+                if previous is None or snapshot.block_hash != previous.hash:
+                    raise ChainFileError("Snapshot does not belong to the last block")
+                system.restore_snapshot(snapshot, blocks)
+                system.get_money_circulation(previous)
+                blocks = None
+
+            else:
+                raise ChainFileError(f"Unknown segment kind {kind!r}")
+
+        if batch:
+            flush()
+        if head['snapshot'] and blocks is not None:
+            raise ChainFileError("Chain file announces a snapshot but has none")
+        if len(system.blockchain) != head['blocks'] or len(system.users) != head['users']:
+            raise ChainFileError("Chain file does not have the announced number of blocks and users")
+    except ValidationError as e:
+        raise ChainFileError(str(e)) from e
+    except (KeyError, TypeError, ValueError, RuntimeError) as e:
+        raise ChainFileError(f"Invalid chain file: {e}") from e
+    finally:
+        if validator is not None:
+            validator.close()
+
+    if system.users:
+        system.first_user = system.users[0]
+    if system.blockchain:
+        system.clock.resume(system.blockchain[-1].timestamp)
+    return system
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ecdsa import VerifyingKey, SECP256k1, BadSignatureError
+
+from Block import Block
+from NonceSearch import difficulty_target
+from Transaction import funding_shares
+
+
+BLOCK_CHUNK = 16
+TX_CHUNK = 64
+SIGNATURE_FIELDS = ('txid', 'signature', 'cosignatures')
+
+
+class ValidationError(ValueError):
+    """
+    Raised when a block or a transaction of an imported chain or a competing branch
+    is invalid.
+    """
+    pass
+
+
+def check_headers(headers, previous_hash, previous_index, target):
+    """
+    Checks the hash, the link to the previous block and the proof-of-work of
+    consecutive blocks. The genesis block has no proof-of-work.
+
+    Module-level so it can run in worker processes.
+
+    Args:
+        headers (list): (index, timestamp, transactions, previous_hash, nonce,
+            extranonce, hash) tuples of consecutive blocks.
+        previous_hash (str): Hash of the block before the first one ('0' for the genesis block).
+        previous_index (int): Index of the block before the first one (-1 for the genesis block).
+        target (int): Exclusive upper bound for a valid hash.
+
+    Returns:
+        list: Error messages, empty if every block is valid.
+    """
+    errors = []
+    for index, timestamp, transactions, previous, nonce, extranonce, block_hash in headers:
+        block = Block.__new__(Block)
+        block.index = index
+        block.timestamp = timestamp
+        block.archive = None
+        block.transactions = transactions
+        block.previous_hash = previous
+        block.nonce = nonce
+        block.extranonce = extranonce
+        if block.compute_hash() != block_hash:
+            errors.append(f"Block {index} does not match its hash")
+        elif index != previous_index + 1 or previous != previous_hash:
+            errors.append(f"Block {index} does not follow block {previous_index}")
+        elif index > 0 and int(block_hash, 16) >= target:
+            errors.append(f"Block {index} has an invalid proof-of-work")
+        previous_hash, previous_index = block_hash, index
+    return errors
+
+
+def check_transactions(transactions, keys):
+    """
+    Checks the txid, the amounts, the cosigner contributions and the signatures of
+    transactions. Coinbase transactions carry no signature.
+
+    Module-level so it can run in worker processes.
+
+    Args:
+        transactions (list): Serialized transactions.
+        keys (dict): Address to hex public key of every known user.
+
+    Returns:
+        list: Error messages, empty if every transaction is valid.
+    """
+    errors = []
+    verifying_keys = {}
+
+    def verify(adress, signature, txid):
+        vk = verifying_keys.get(adress)
+        if vk is None:
+            public_key = keys.get(adress)
+            if public_key is None:
+                return False
+            vk = verifying_keys[adress] = VerifyingKey.from_string(bytes.fromhex(public_key), SECP256k1, hashfunc=hashlib.sha256)
+        try:
+            return vk.verify(bytes.fromhex(signature), txid.encode())
+        except BadSignatureError:
+            return False
+
+    for tx in transactions:
+        data = {key: value for key, value in tx.items() if key not in SIGNATURE_FIELDS}
+        txid = tx.get('txid')
+        if hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest() != txid:
+            errors.append(f"Transaction {tx.get('index')} does not match its txid")
+            continue
+        if tx['sender'] is None:
+            continue
+        amounts = [value for _, value in tx.get('outputs', [(tx['receiver'], tx['amount'])])]
+        if not all(isinstance(value, int) and value > 0 for value in amounts):
+            errors.append(f"Transaction {tx['index']} has an invalid amount")
+            continue
+
+        try:
+            cosigners = [adress for adress, _ in funding_shares(tx)[1:]]
+        except (TypeError, ValueError):
+            errors.append(f"Transaction {tx['index']} has invalid cosigner contributions")
+            continue
+        cosignatures = tx.get('cosignatures', [])
+        if 'signature' not in tx or len(cosignatures) != len(cosigners):
+            errors.append(f"Transaction {tx['index']} is not signed")
+        elif not (verify(tx['sender'], tx['signature'], txid)
+                  and all(verify(a, s, txid) for a, s in zip(cosigners, cosignatures))):
+            errors.append(f"Transaction {tx['index']} has an invalid signature")
+    return errors
+
+
+class ChainValidator:
+    """
+    Validates blocks received from a file or a peer before they are applied, in stages:
+
+        headers         hash, link to the previous block and proof-of-work, in parallel
+                        across chunks of blocks (each chunk is told the hash of the block
+                        before it, so no stage waits for another chunk)
+        transactions    txid, amounts and signatures, in parallel across chunks of
+                        transactions of every block
+        utxo            spending the inputs and creating the outputs, sequentially,
+                        since every block depends on the UTXO set left by the previous one
+
+    With one worker the stages run in the calling process. Time and item counts are
+    accumulated per stage so the throughput can be reported.
+
+    Attributes:
+        difficulty (int): Proof-of-work difficulty of the chain.
+        keys (dict): Address to hex public key of the users allowed to sign.
+        workers (int): Number of worker processes.
+        executor (ProcessPoolExecutor or None): The pool, None with one worker.
+        timings (dict): Stage to seconds spent.
+        counts (dict): Stage to number of items (blocks or transactions) checked.
+        last (tuple): (hash, index) of the last validated block.
+
+    Methods:
+        validate(blocks): Checks the headers and transactions of consecutive blocks.
+        apply(system, blocks): Validates blocks and replays them on a system.
+        report(): Returns the throughput of each stage.
+        close(): Shuts the pool down.
+    """
+    def __init__(self, difficulty, keys, workers=1, previous=None):
+        """
+        Initializes the validator.
+
+        Args:
+            difficulty (int): Proof-of-work difficulty of the chain.
+            keys (dict): Address to hex public key of the users allowed to sign.
+            workers (int): Number of worker processes.
+            previous (Block or None): Block the first validated block must follow; None
+                to start at the genesis block.
+        """
+        self.difficulty = difficulty
+        self.keys = keys
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(workers) if workers > 1 else None
+        self.timings = {'headers': 0.0, 'transactions': 0.0, 'utxo': 0.0}
+        self.counts = {'headers': 0, 'transactions': 0, 'utxo': 0}
+        self.last = (previous.hash, previous.index) if previous is not None else ('0', -1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, function, tasks):
+        """
+        Runs `function` over argument tuples, in the pool if there is one, and returns
+        every error message.
+        """
+        if self.executor is None:
+            results = [function(*args) for args in tasks]
+        else:
+            results = self.executor.map(function, *zip(*tasks)) if tasks else []
+        return [error for errors in results for error in errors]
+
+    def validate(self, blocks):
+        """
+        Checks the headers and transactions of blocks following the last validated one.
+
+        Args:
+            blocks (list): Consecutive blocks.
+
+        Raises:
+            ValidationError: With the first error found, in chain order.
+        """
+        if not blocks:
+            return
+        target = difficulty_target(self.difficulty)
+
+        start = time.perf_counter()
+        tasks = []
+        previous_hash, previous_index = self.last
+        for i in range(0, len(blocks), BLOCK_CHUNK):
+            chunk = blocks[i:i + BLOCK_CHUNK]
+            headers = [
+                (b.index, b.timestamp, b.transactions, b.previous_hash, b.nonce, b.extranonce, b.hash)
+                for b in chunk
+            ]
+            tasks.append((headers, previous_hash, previous_index, target))
+            previous_hash, previous_index = chunk[-1].hash, chunk[-1].index
+        errors = self.run(check_headers, tasks)
+        self.timings['headers'] += time.perf_counter() - start
+        self.counts['headers'] += len(blocks)
+        if errors:
+            raise ValidationError(errors[0])
+
+        start = time.perf_counter()
+        transactions = [tx for block in blocks for tx in block.transactions]
+        tasks = [(transactions[i:i + TX_CHUNK], self.keys) for i in range(0, len(transactions), TX_CHUNK)]
+        errors = self.run(check_transactions, tasks)
+        self.timings['transactions'] += time.perf_counter() - start
+        self.counts['transactions'] += len(transactions)
+        if errors:
+            raise ValidationError(errors[0])
+
+        self.last = (blocks[-1].hash, blocks[-1].index)
+
+    def apply(self, system, blocks):
+        """
+        Validates blocks, then replays them on a system (see `System.replay_blocks`).
+
+        Args:
+            system (System): The system; its chain must end at the last validated block.
+            blocks (list): Consecutive blocks.
+
+        Raises:
+            ValidationError: If a block is invalid or spends an output that is not unspent.
+        """
+        self.validate(blocks)
+        start = time.perf_counter()
+        try:
+            system.replay_blocks(blocks)
+        except ValueError as e:
+            raise ValidationError(str(e)) from e
+        self.timings['utxo'] += time.perf_counter() - start
+        self.counts['utxo'] += len(blocks)
+
+    def report(self):
+        """
+        Returns the throughput of each stage and of the whole validation.
+
+        Returns:
+            dict: Stage to (seconds, items per second); 'total' is in blocks per second.
+        """
+        report = {}
+        for stage, seconds in self.timings.items():
+            report[stage] = (seconds, self.counts[stage] / seconds if seconds else 0.0)
+        total = sum(self.timings.values())
+        report['total'] = (total, self.counts['headers'] / total if total else 0.0)
+        return report
+
+    def close(self):
+        """
+        Shuts the worker pool down.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """
+    Clock returning the current wall-clock time.
+
+    Methods:
+        now(): Returns the current time as a string.
+        resume(timestamp): Does nothing; wall-clock time is always after the chain.
+    """
+    def now(self):
+        """
+        Returns the current time.
+
+        Returns:
+            str: The time, formatted like `str(datetime)`.
+        """
+        return str(datetime.now())
+
+    def resume(self, timestamp):
+        """
+        Does nothing: the wall clock is already past any stored timestamp.
+
+        Args:
+            timestamp (str): Timestamp of the last block of a restored chain.
+        """
+        pass
+
+
+class VirtualClock:
+    """
+    Deterministic clock for reproducible runs: every reading advances time by a fixed step.
+
+    Attributes:
+        start (datetime): Time of the first reading.
+        step (timedelta): Time added after each reading.
+        ticks (int): Number of readings so far.
+
+    Methods:
+        now(): Returns the current virtual time and advances the clock.
+        resume(timestamp): Moves the clock past a timestamp of a restored chain.
+    """
+    def __init__(self, start=datetime(2024, 1, 1), step=timedelta(minutes=10)):
+        """
+        Initializes the clock.
+
+        Args:
+            start (datetime): Time of the first reading.
+            step (timedelta): Time added after each reading.
+        """
+        self.start = start
+        self.step = step
+        self.ticks = 0
+
+    def now(self):
+        """
+        Returns the current virtual time and advances the clock by one step.
+
+        Returns:
+            str: The time, formatted like `str(datetime)`.
+        """
+        moment = self.start + self.step * self.ticks
+        self.ticks += 1
+        return str(moment)
+
+    def resume(self, timestamp):
+        """
+        Moves the clock to the first reading after `timestamp`, e.g. the timestamp of
+        the last block of a restored chain, so the next block is not stamped before
+        the blocks already in the chain. The clock never goes back.
+
+        Args:
+            timestamp (str): The time, formatted like `str(datetime)`.
+        """
+        elapsed = datetime.fromisoformat(timestamp) - self.start
+        self.ticks = max(self.ticks, elapsed // self.step + 1)
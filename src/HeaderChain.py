@@ -0,0 +1,287 @@
+import hashlib
+import struct
+
+from Block import NO_HASH, merkle_root, header_data, hash_header
+from NonceSearch import difficulty_target
+from ChainValidator import ValidationError
+
+
+# height, hash, previous hash, Merkle root, nonce, extranonce, tx count, timestamp
+HEADER = struct.Struct('<I32s32s32sQII32s')
+
+
+def merkle_proof(txids, position):
+    """
+    Returns the sibling hashes linking a transaction to the Merkle root of its block.
+
+    Args:
+        txids (list): Hex txids of the block, in order.
+        position (int): Position of the transaction in the block.
+
+    Returns:
+        list: (sibling (bytes), sibling_is_left (bool)) pairs, from the leaf up.
+    """
+    level = [bytes.fromhex(txid) for txid in txids]
+    proof = []
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        sibling = position ^ 1
+        proof.append((level[sibling], sibling < position))
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+        position //= 2
+    return proof
+
+
+def verify_merkle_proof(txid, proof, root):
+    """
+    Checks that a transaction belongs to the block with the given Merkle root.
+
+    Args:
+        txid (str): Hex txid.
+        proof (list): Output of `merkle_proof`.
+        root (bytes): Merkle root of the block.
+
+    Returns:
+        bool: True if the proof leads to the root.
+    """
+    node = bytes.fromhex(txid)
+    for sibling, is_left in proof:
+        node = hashlib.sha256(sibling + node if is_left else node + sibling).digest()
+    return node == root
+
+
+def pack_header(block):
+    """
+    Returns the header record of a block.
+
+    Args:
+        block (Block): The block.
+
+    Returns:
+        bytes: The record, packed with HEADER.
+
+    Raises:
+        ValueError: If the timestamp does not fit in a record.
+    """
+    if len(block.timestamp.encode()) > 32:
+        raise ValueError(f"Timestamp of block {block.index} does not fit in a header")
+    previous_hash = bytes.fromhex(block.previous_hash) if block.previous_hash != '0' else NO_HASH
+    root = block.merkle_root()
+    return HEADER.pack(
+        block.index, bytes.fromhex(block.hash), previous_hash, root,
+        block.nonce, block.extranonce, block.tx_count, block.timestamp.encode()
+    )
+
+
+class BlockHeader:
+    """
+    One record of a HeaderChain. Hashes and the timestamp are decoded on access.
+
+    Attributes:
+        index (int): Height of the block.
+        hash (str): Hash of the block.
+        previous_hash (str): Hash of the previous block ('0' for the genesis block).
+        merkle_root (bytes): Merkle root of the transaction ids of the block.
+        nonce (int): Nonce of the block.
+        extranonce (int): Extranonce of the block.
+        tx_count (int): Number of transactions in the block.
+        timestamp (str): Timestamp of the block.
+    """
+    __slots__ = ('index', 'raw_hash', 'raw_previous_hash', 'merkle_root', 'nonce', 'extranonce', 'tx_count', 'raw_timestamp')
+
+    def __init__(self, record):
+        """
+        Wraps a record.
+
+        Args:
+            record (tuple): Fields unpacked with HEADER.
+        """
+        (self.index, self.raw_hash, self.raw_previous_hash, self.merkle_root,
+         self.nonce, self.extranonce, self.tx_count, self.raw_timestamp) = record
+
+    @property
+    def hash(self):
+        """
+        str: Hash of the block.
+        """
+        return self.raw_hash.hex()
+
+    @property
+    def previous_hash(self):
+        """
+        str: Hash of the previous block ('0' for the genesis block).
+        """
+        return self.raw_previous_hash.hex() if self.raw_previous_hash != NO_HASH else '0'
+
+    @property
+    def timestamp(self):
+        """
+        str: Timestamp of the block.
+        """
+        return self.raw_timestamp.rstrip(b'\0').decode()
+
+
+class HeaderChain:
+    """
+    The headers of the best chain as fixed-size records in one contiguous bytearray.
+
+    Each record (HEADER, 148 bytes) holds the height, hash, previous hash, Merkle
+    root, nonce, extranonce, transaction count and timestamp of a block, so views
+    and chain-wide scans read a few bytes per block instead of walking Block objects
+    and their transaction lists, and the whole chain can be sent to a light client
+    as one bytes object.
+
+    The block hash is the hash of the header fields (see `Block.header_data`), which
+    cover the body through the Merkle root, so headers alone prove the links and the
+    proof-of-work of the chain, and a light client checks that a transaction is in a
+    block with a proof of O(log n) hashes against an authenticated root.
+
+    Attributes:
+        data (bytearray): The records, indexed by height.
+
+    Methods:
+        append(block): Appends the header of a block.
+        truncate(length): Drops the headers from height `length` on.
+        record(height): Returns the raw fields of a header.
+        column(field): Returns one field of every header.
+        verify(difficulty): Checks the hashes, links and proof-of-work of the chain.
+        verify_transaction(height, txid, proof): Checks a Merkle proof against a header.
+        to_bytes(): Returns the records.
+        from_bytes(data): Builds a header chain from records.
+    """
+    FIELDS = ('index', 'hash', 'previous_hash', 'merkle_root', 'nonce', 'extranonce', 'tx_count', 'timestamp')
+
+    def __init__(self):
+        """
+        Initializes an empty header chain.
+        """
+        self.data = bytearray()
+
+    def __len__(self):
+        return len(self.data) // HEADER.size
+
+    def __iter__(self):
+        return map(BlockHeader, HEADER.iter_unpack(self.data))
+
+    def __getitem__(self, height):
+        return BlockHeader(self.record(height))
+
+    def append(self, block):
+        """
+        Appends the header of a block, which must follow the last header.
+
+        Args:
+            block (Block): The block.
+        """
+        self.data += pack_header(block)
+
+    def truncate(self, length):
+        """
+        Drops the headers from height `length` on, e.g. when blocks are disconnected.
+
+        Args:
+            length (int): Number of headers to keep.
+        """
+        del self.data[length * HEADER.size:]
+
+    def record(self, height):
+        """
+        Returns the raw fields of a header.
+
+        Args:
+            height (int): Height of the block; negative values count from the tip.
+
+        Returns:
+            tuple: The fields, in HEADER order.
+        """
+        if height < 0:
+            height += len(self)
+        if not 0 <= height < len(self):
+            raise IndexError(f"No header at height {height}")
+        return HEADER.unpack_from(self.data, height * HEADER.size)
+
+    def column(self, field):
+        """
+        Returns one field of every header, as stored (hashes as raw bytes).
+
+        Args:
+            field (str): One of FIELDS.
+
+        Returns:
+            list: The values, indexed by height.
+        """
+        position = self.FIELDS.index(field)
+        return [record[position] for record in HEADER.iter_unpack(self.data)]
+
+    def verify(self, difficulty):
+        """
+        Checks, from the headers alone, that every hash is the hash of its header
+        fields, that heights are consecutive, that every header links to the previous
+        one and that every hash but the genesis one meets the proof-of-work target.
+
+        Args:
+            difficulty (int): Proof-of-work difficulty of the chain.
+
+        Raises:
+            ValidationError: With the first invalid header.
+        """
+        target = difficulty_target(difficulty)
+        previous = NO_HASH
+        for height, record in enumerate(HEADER.iter_unpack(self.data)):
+            index, block_hash, previous_hash, root, nonce, extranonce, _, timestamp = record
+            data = header_data(
+                index, timestamp.rstrip(b'\0').decode(), root,
+                previous_hash.hex() if previous_hash != NO_HASH else '0', nonce, extranonce
+            )
+            if hash_header(data) != block_hash.hex():
+                raise ValidationError(f"Header {height} does not match its hash")
+            if index != height or previous_hash != previous:
+                raise ValidationError(f"Header {height} does not follow header {height - 1}")
+            if height > 0 and int.from_bytes(block_hash, 'big') >= target:
+                raise ValidationError(f"Header {height} has an invalid proof-of-work")
+            previous = block_hash
+
+    def verify_transaction(self, height, txid, proof):
+        """
+        Checks that a transaction is in the block at `height` with a Merkle proof. The
+        root is authenticated by the block hash once the chain passes `verify`.
+
+        Args:
+            height (int): Height of the block.
+            txid (str): Hex txid.
+            proof (list): Output of `merkle_proof`.
+
+        Returns:
+            bool: True if the transaction is in the block.
+        """
+        return verify_merkle_proof(txid, proof, self.record(height)[3])
+
+    def to_bytes(self):
+        """
+        Returns the records, e.g. to send the chain to a light client.
+
+        Returns:
+            bytes: The records.
+        """
+        return bytes(self.data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Builds a header chain from records.
+
+        Args:
+            data (bytes): Output of `to_bytes`.
+
+        Returns:
+            HeaderChain: The header chain.
+
+        Raises:
+            ValidationError: If the length is not a whole number of records.
+        """
+        if len(data) % HEADER.size:
+            raise ValidationError("Header data is not a whole number of records")
+        headers = cls()
+        headers.data = bytearray(data)
+        return headers
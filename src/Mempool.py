@@ -0,0 +1,200 @@
+class MempoolEntry:
+    """
+    A pending transaction with the outputs it spends and creates.
+
+    Attributes:
+        transaction (Transaction): The pending transaction.
+        data (dict): Its serialized form, computed once when it entered the mempool.
+        inputs (list): The UTXOs it spends, restored if it leaves the pool unmined.
+        outputs (list): The UTXOs it creates.
+        spends (list): Indexes of the UTXOs it spends.
+        creates (list): Indexes of the UTXOs it creates.
+    """
+    __slots__ = ('transaction', 'data', 'inputs', 'outputs', 'spends', 'creates')
+
+    def __init__(self, transaction, spends, creates):
+        """
+        Initializes an entry.
+
+        Args:
+            transaction (Transaction): The pending transaction.
+            spends (list): UTXOs it spends.
+            creates (list): UTXOs it creates.
+        """
+        self.transaction = transaction
+        self.data = transaction.serialize_transaction()
+        self.inputs = list(spends)
+        self.outputs = list(creates)
+        self.spends = [utxo.index for utxo in spends]
+        self.creates = [utxo.index for utxo in creates]
+
+
+class Mempool:
+    """
+    Pool of validated transactions waiting to be mined.
+
+    Every entry records the outputs it spends in a conflict index (UTXO index to the
+    spending txid), so a double spend is rejected with one dict lookup per input.
+    Outputs created by pending transactions are indexed too, which lets a transaction
+    spend unconfirmed outputs: it is simply mined after its parent, since entries keep
+    their arrival order.
+
+    Transactions are validated once on admission and the result is cached by txid
+    (a txid covers the spent outputs, so the result cannot change), so assembling a
+    block only concatenates the serialized entries.
+
+    Iterating over the mempool yields the serialized transactions, like the list it
+    replaces.
+
+    The wallets of the addresses involved are told which of their outputs are spent
+    or created by pending transactions, until the transactions are mined or unwound.
+
+    Attributes:
+        entries (dict): Txid to MempoolEntry, in arrival order.
+        spent (dict): UTXO index to the txid of the pending transaction spending it.
+        unconfirmed (dict): UTXO index to the txid of the pending transaction creating it.
+        validated (dict): Txid to the cached validation result.
+        total_fees (int): Sum of the fees of the pending transactions, in base units.
+        wallets (dict): Address to Wallet, shared with the UTXO set.
+
+    Methods:
+        conflicts(utxos, utxo_set): Returns why the outputs cannot be spent, or None.
+        validate(transaction): Validates a transaction, using the cache.
+        add(transaction, spends, creates): Admits a processed transaction.
+        block_transactions(): Returns the serialized transactions to put in a block.
+        clear(): Empties the pool once its transactions are mined.
+        unwind(utxo_set): Reverts the pending transactions and empties the pool.
+    """
+    def __init__(self, wallets=None):
+        """
+        Initializes an empty mempool.
+
+        Args:
+            wallets (dict or None): Wallets to notify of pending spends, by address.
+        """
+        self.wallets = wallets if wallets is not None else {}
+        self.entries = {}
+        self.spent = {}
+        self.unconfirmed = {}
+        self.validated = {}
+        self.total_fees = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return (entry.data for entry in self.entries.values())
+
+    def __contains__(self, txid):
+        return txid in self.entries
+
+    def conflicts(self, utxos, utxo_set):
+        """
+        Checks whether outputs can be spent by a new transaction.
+
+        Args:
+            utxos (list): The outputs to spend.
+            utxo_set (UTXOSet): The current unspent outputs.
+
+        Returns:
+            str or None: Description of the conflict, or None if every output is spendable.
+        """
+        for utxo in utxos:
+            txid = self.spent.get(utxo.index)
+            if txid is not None:
+                return f"UTXO {utxo.index} is already spent by pending transaction {txid}"
+            if utxo not in utxo_set:
+                return f"UTXO {utxo.index} is already spent"
+        return None
+
+    def validate(self, transaction):
+        """
+        Validates a transaction, reusing the cached result for a known txid.
+
+        Args:
+            transaction (Transaction): The transaction.
+
+        Returns:
+            bool: True if the transaction is valid.
+        """
+        valid = self.validated.get(transaction.txid)
+        if valid is None:
+            valid = self.validated[transaction.txid] = transaction.validate_transaction()
+        return valid
+
+    def add(self, transaction, spends, creates):
+        """
+        Admits a transaction whose inputs were checked with `conflicts`.
+
+        Args:
+            transaction (Transaction): The transaction.
+            spends (list): UTXOs it spends.
+            creates (list): UTXOs it creates.
+        """
+        entry = MempoolEntry(transaction, spends, creates)
+        self.entries[transaction.txid] = entry
+        for index in entry.spends:
+            self.spent[index] = transaction.txid
+        for index in entry.creates:
+            self.unconfirmed[index] = transaction.txid
+        self.total_fees += transaction.mining_fee
+
+        if self.wallets:
+            for utxo in entry.inputs:
+                wallet = self.wallets.get(utxo.sender)
+                if wallet is not None:
+                    wallet.pending[utxo.index] = utxo
+            for utxo in entry.outputs:
+                wallet = self.wallets.get(utxo.sender)
+                if wallet is not None:
+                    wallet.unconfirmed.add(utxo.index)
+
+    def block_transactions(self):
+        """
+        Returns the serialized pending transactions in arrival order, parents before children.
+
+        Returns:
+            list: The serialized transactions.
+        """
+        return [entry.data for entry in self.entries.values()]
+
+    def clear(self):
+        """
+        Empties the pool after its transactions were mined. Cached validation results
+        are dropped with it.
+        """
+        if self.wallets:
+            for entry in self.entries.values():
+                for utxo in entry.inputs:
+                    wallet = self.wallets.get(utxo.sender)
+                    if wallet is not None:
+                        wallet.pending.pop(utxo.index, None)
+                for utxo in entry.outputs:
+                    wallet = self.wallets.get(utxo.sender)
+                    if wallet is not None:
+                        wallet.unconfirmed.discard(utxo.index)
+        self.entries = {}
+        self.spent = {}
+        self.unconfirmed = {}
+        self.validated = {}
+        self.total_fees = 0
+
+    def unwind(self, utxo_set):
+        """
+        Reverts the effect of the pending transactions on the UTXO set and empties the
+        pool, e.g. before a chain reorganization. The transactions can be processed again
+        afterwards if their inputs are still unspent.
+
+        Args:
+            utxo_set (UTXOSet): The UTXO set the transactions were applied to.
+
+        Returns:
+            list: The pending transactions, in arrival order.
+        """
+        entries = list(self.entries.values())
+        for entry in reversed(entries):
+            for index in entry.creates:
+                utxo_set.discard(index)
+            utxo_set.extend(entry.inputs)
+        self.clear()
+        return [entry.transaction for entry in entries]
@@ -0,0 +1,385 @@
+import http.client
+import itertools
+import json
+import queue
+import socket
+import threading
+from urllib.parse import urlsplit
+
+from HeaderChain import HeaderChain
+
+
+# Methods that do not change the node, safe to send again
+READ_METHODS = frozenset({
+    'get_balance', 'get_block', 'get_utxos', 'get_block_count', 'get_headers',
+    'get_transaction_proof', 'get_transaction', 'get_metrics',
+})
+RETRIED_ERRORS = (http.client.RemoteDisconnected, ConnectionError, http.client.BadStatusLine)
+
+
+class NodeClientError(Exception):
+    """
+    Error returned by the node for a JSON-RPC call.
+
+    Attributes:
+        code (int): JSON-RPC error code.
+        message (str): Description sent by the node.
+    """
+    def __init__(self, code, message):
+        """
+        Initializes the error with the code and message sent by the node.
+
+        Args:
+            code (int): JSON-RPC error code.
+            message (str): Description sent by the node.
+        """
+        super().__init__(f"[{code}] {message}")
+        self.code = code
+        self.message = message
+
+
+class ConnectionPool:
+    """
+    A bounded pool of persistent HTTP connections to a single host.
+
+    Connections are created lazily, handed out one per caller, and returned
+    to the pool after each request so the underlying keep-alive socket is reused.
+
+    Attributes:
+        host (str): Host of the node.
+        port (int): Port of the node.
+        timeout (float): Socket timeout in seconds.
+        size (int): Maximum number of idle connections kept.
+
+    Methods:
+        get(): Takes a connection from the pool, creating one if none is idle.
+        put(conn): Returns a connection to the pool.
+        close(): Closes every idle connection.
+    """
+    def __init__(self, host, port, size=8, timeout=30.0):
+        """
+        Initializes an empty pool.
+
+        Args:
+            host (str): Host of the node.
+            port (int): Port of the node.
+            size (int): Maximum number of idle connections kept.
+            timeout (float): Socket timeout in seconds.
+        """
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    def get(self):
+        """
+        Takes an idle connection, or opens a new one.
+
+        Returns:
+            http.client.HTTPConnection: A connection to the node.
+        """
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def put(self, conn):
+        """
+        Returns a connection to the pool, closing it if the pool is full.
+
+        Args:
+            conn (http.client.HTTPConnection): The connection to return.
+        """
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        """
+        Closes every idle connection.
+        """
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class NodeClient:
+    """
+    Python client for a NodeServer.
+
+    Single calls and batches go through a pool of keep-alive connections, so
+    the client can be shared between threads. `pipeline()` writes several
+    requests on one socket before reading any response.
+
+    Attributes:
+        url (str): Base URL of the node.
+        pool (ConnectionPool): Pool of persistent connections.
+
+    Methods:
+        call(method, *params): Performs a single call and returns its result.
+        batch(calls): Sends several calls in one JSON-RPC batch.
+        pipeline(calls): Sends one HTTP request per call back to back on one socket.
+        close(): Closes pooled connections.
+    """
+    def __init__(self, url, pool_size=8, timeout=30.0):
+        """
+        Initializes a client for the node at `url`.
+
+        Args:
+            url (str): Base URL of the node, e.g. "http://127.0.0.1:8545/".
+            pool_size (int): Maximum number of idle connections kept.
+            timeout (float): Socket timeout in seconds.
+        """
+        parts = urlsplit(url)
+        self.url = url
+        self.path = parts.path or '/'
+        self.pool = ConnectionPool(parts.hostname, parts.port or 80, pool_size, timeout)
+        self.ids = itertools.count()
+        self.ids_lock = threading.Lock()
+
+    def next_id(self):
+        """
+        Returns a fresh request id.
+        """
+        with self.ids_lock:
+            return next(self.ids)
+
+    def make_call(self, method, params):
+        """
+        Builds a JSON-RPC call object.
+
+        Args:
+            method (str): Name of the method.
+            params (list or dict): Positional or named parameters.
+
+        Returns:
+            dict: The call object.
+        """
+        return {'jsonrpc': '2.0', 'method': method, 'params': params, 'id': self.next_id()}
+
+    def post(self, body):
+        """
+        Posts a body on a pooled connection and returns the decoded response.
+
+        A request that fails on a reused keep-alive connection, which the server may
+        have closed in the meantime, is sent once more on a new socket, but only if it
+        cannot have reached the node (sending it failed) or if it only calls read
+        methods: a transaction or a mined block is never submitted twice.
+
+        Args:
+            body (dict or list): The request to send.
+
+        Returns:
+            dict, list or None: The decoded response.
+        """
+        data = json.dumps(body).encode()
+        headers = {'Content-Type': 'application/json'}
+        calls = body if isinstance(body, list) else [body]
+        read_only = all(call.get('method') in READ_METHODS for call in calls)
+        for attempt in range(2):
+            conn = self.pool.get()
+            reused = conn.sock is not None
+            try:
+                conn.request('POST', self.path, body=data, headers=headers)
+            except RETRIED_ERRORS:
+                conn.close()
+                if attempt or not reused:
+                    raise
+                continue
+            except Exception:
+                conn.close()
+                raise
+            try:
+                response = conn.getresponse()
+                payload = response.read()
+            except RETRIED_ERRORS:
+                conn.close()
+                if attempt or not reused or not read_only:
+                    raise
+                continue
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self.pool.put(conn)
+            return json.loads(payload) if payload else None
+
+    def call(self, method, *params, **named):
+        """
+        Performs a single JSON-RPC call.
+
+        Args:
+            method (str): Name of the method.
+            *params: Positional parameters.
+            **named: Named parameters (cannot be mixed with positional ones).
+
+        Returns:
+            The result of the call.
+
+        Raises:
+            NodeClientError: If the node returns an error.
+        """
+        response = self.post(self.make_call(method, named or list(params)))
+        return unwrap(response)
+
+    def batch(self, calls):
+        """
+        Sends several calls in a single JSON-RPC batch request.
+
+        Args:
+            calls (list): List of (method, params) tuples.
+
+        Returns:
+            list: Results in the order of `calls`. Failed calls are returned as NodeClientError instances.
+        """
+        requests = [self.make_call(method, params) for method, params in calls]
+        responses = self.post(requests) or []
+        by_id = {response.get('id'): response for response in responses}
+        return [result_or_error(by_id.get(request['id'])) for request in requests]
+
+    def pipeline(self, calls):
+        """
+        Writes one HTTP request per call on a single socket before reading any response.
+
+        Args:
+            calls (list): List of (method, params) tuples.
+
+        Returns:
+            list: Results in the order of `calls`. Failed calls are returned as NodeClientError instances.
+        """
+        pool = self.pool
+        chunks = []
+        for method, params in calls:
+            data = json.dumps(self.make_call(method, params)).encode()
+            chunks.append(
+                f"POST {self.path} HTTP/1.1\r\n"
+                f"Host: {pool.host}:{pool.port}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+            )
+
+        with socket.create_connection((pool.host, pool.port), timeout=pool.timeout) as sock:
+            sock.sendall(b''.join(chunks))
+            reader = sock.makefile('rb')
+            results = [result_or_error(read_http_response(reader)) for _ in calls]
+            reader.close()
+        return results
+
+    def send_transaction(self, sender, receiver, amount):
+        """
+        Sends `amount` base units from user `sender` to user `receiver`.
+        """
+        return self.call('send_transaction', sender, receiver, amount)
+
+    def send_many(self, sender, payments):
+        """
+        Pays several users from user `sender` in one transaction; `payments` is a list
+        of (receiver, amount) pairs, amounts in base units.
+        """
+        return self.call('send_many', sender, [list(payment) for payment in payments])
+
+    def mine_block(self, miner):
+        """
+        Mines the pending transactions with user `miner` as the reward receiver.
+        """
+        return self.call('mine_block', miner)
+
+    def get_balance(self, user):
+        """
+        Returns the balance of user `user`, in base units.
+        """
+        return self.call('get_balance', user)
+
+    def get_block(self, index):
+        """
+        Returns the block at height `index`.
+        """
+        return self.call('get_block', index)
+
+    def get_headers(self, start=0):
+        """
+        Returns the headers of the node's best chain from height `start`, as a
+        HeaderChain a light client can verify without the block bodies.
+        """
+        return HeaderChain.from_bytes(bytes.fromhex(self.call('get_headers', start)))
+
+    def get_transaction_proof(self, index, txid):
+        """
+        Returns the Merkle proof of transaction `txid` in the block at height `index`,
+        for `HeaderChain.verify_transaction`.
+        """
+        return [(bytes.fromhex(sibling), is_left) for sibling, is_left in self.call('get_transaction_proof', index, txid)]
+
+    def get_transaction(self, txid):
+        """
+        Returns a confirmed transaction as {'height': ..., 'transaction': ...}, or None.
+        """
+        return self.call('get_transaction', txid)
+
+    def get_utxos(self, user=None):
+        """
+        Returns the UTXOs of user `user`, or all of them.
+        """
+        return self.call('get_utxos', user)
+
+    def close(self):
+        """
+        Closes the pooled connections.
+        """
+        self.pool.close()
+
+
+def read_http_response(reader):
+    """
+    Reads one HTTP/1.1 response with a Content-Length body from a buffered reader.
+
+    Args:
+        reader (io.BufferedReader): Reader over the socket.
+
+    Returns:
+        dict, list or None: The decoded JSON body.
+    """
+    status_line = reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed before the response was received")
+    length = 0
+    while True:
+        line = reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value.strip())
+    payload = reader.read(length)
+    return json.loads(payload) if payload else None
+
+
+def result_or_error(response):
+    """
+    Extracts the result of a response, or a NodeClientError describing its failure.
+    """
+    try:
+        return unwrap(response)
+    except NodeClientError as e:
+        return e
+
+
+def unwrap(response):
+    """
+    Extracts the result of a response.
+
+    Raises:
+        NodeClientError: If the response carries an error or is missing.
+    """
+    if response is None:
+        raise NodeClientError(-32603, "No response received")
+    if isinstance(response, list) or 'error' in response:
+        error = response[0]['error'] if isinstance(response, list) else response['error']
+        raise NodeClientError(error['code'], error['message'])
+    return response['result']
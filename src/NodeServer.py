@@ -0,0 +1,419 @@
+import inspect
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Profiler import profiler
+from HeaderChain import HEADER
+
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+class RPCError(Exception):
+    """
+    Error raised by an RPC method and returned to the client as a JSON-RPC error object.
+
+    Attributes:
+        code (int): JSON-RPC error code.
+        message (str): Human readable description of the error.
+    """
+    def __init__(self, code, message):
+        """
+        Initializes the error with a JSON-RPC code and message.
+
+        Args:
+            code (int): JSON-RPC error code.
+            message (str): Human readable description of the error.
+        """
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class NodeRPC:
+    """
+    Exposes the methods of a System as JSON-RPC 2.0 calls.
+
+    Every call runs under a single lock, since System mutates shared lists
+    (UTXO_set, mempool, blockchain) without any synchronization of its own.
+    Users are referenced by their index in `system.users` and amounts are integers
+    of base units (see Amount.py).
+
+    Attributes:
+        system (System): The node state served to clients.
+        lock (threading.Lock): Serializes access to the system.
+        methods (dict): Mapping from RPC method name to bound handler.
+
+    Methods:
+        handle_payload(payload): Dispatches a single call or a batch and returns the response.
+        handle_call(call): Dispatches a single call object.
+    """
+    def __init__(self, system):
+        """
+        Initializes the dispatcher for a system.
+
+        Args:
+            system (System): The node state served to clients.
+        """
+        self.system = system
+        self.lock = threading.Lock()
+        self.methods = {
+            'send_transaction': self.send_transaction,
+            'send_many': self.send_many,
+            'mine_block': self.mine_block,
+            'get_balance': self.get_balance,
+            'get_block': self.get_block,
+            'get_utxos': self.get_utxos,
+            'get_block_count': self.get_block_count,
+            'get_headers': self.get_headers,
+            'get_transaction_proof': self.get_transaction_proof,
+            'get_transaction': self.get_transaction,
+            'create_user': self.create_user,
+            'get_metrics': self.get_metrics,
+        }
+
+    def get_user(self, index):
+        """
+        Looks up a user by index.
+
+        Args:
+            index (int): Index of the user.
+
+        Returns:
+            User: The matching user.
+        """
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(self.system.users):
+            raise RPCError(INVALID_PARAMS, f"Unknown user {index!r}")
+        return self.system.users[index]
+
+    def send_transaction(self, sender, receiver, amount):
+        """
+        Sends `amount` base units from user `sender` to user `receiver`.
+
+        Returns:
+            bool: True if the transaction was accepted, False otherwise.
+        """
+        if not isinstance(amount, int) or isinstance(amount, bool):
+            raise RPCError(INVALID_PARAMS, f"Invalid amount {amount!r}")
+        return self.system.send_transaction(self.get_user(sender), self.get_user(receiver), amount)
+
+    def send_many(self, sender, payments):
+        """
+        Pays several users from user `sender` in one transaction; `payments` is a list
+        of [receiver, amount] pairs, amounts in base units.
+
+        Returns:
+            bool: True if the transaction was accepted, False otherwise.
+        """
+        if not isinstance(payments, list) or not payments:
+            raise RPCError(INVALID_PARAMS, "Payments must be a non-empty list of [receiver, amount] pairs")
+        pairs = []
+        for payment in payments:
+            if not isinstance(payment, list) or len(payment) != 2:
+                raise RPCError(INVALID_PARAMS, f"Invalid payment {payment!r}")
+            receiver, amount = payment
+            if not isinstance(amount, int) or isinstance(amount, bool):
+                raise RPCError(INVALID_PARAMS, f"Invalid amount {amount!r}")
+            pairs.append((self.get_user(receiver), amount))
+        return self.system.send_many(self.get_user(sender), pairs)
+
+    def mine_block(self, miner):
+        """
+        Mines the pending transactions with user `miner` as the reward receiver.
+
+        Returns:
+            dict: Summary of the mined block.
+        """
+        if not self.system.mempool:
+            raise RPCError(SERVER_ERROR, "No pending transactions")
+        block = self.system.mine_block(self.get_user(miner))
+        return {
+            'index': block.index,
+            'hash': block.hash,
+            'nonce': block.nonce,
+            'mining_time': block.mining_time,
+            'miner_total_reward': block.miner_total_reward,
+        }
+
+    def get_balance(self, user):
+        """
+        Returns the balance of user `user`, in base units.
+        """
+        return self.get_user(user).get_balance(self.system.UTXO_set)
+
+    def get_block(self, index):
+        """
+        Returns the full data of the block at height `index`.
+        """
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(self.system.blockchain):
+            raise RPCError(INVALID_PARAMS, f"Unknown block {index!r}")
+        block = self.system.blockchain[index]
+        data = block.get_block_data()
+        data['transactions'] = block.transactions
+        data['hash'] = block.hash
+        data['mining_time'] = block.mining_time
+        data['miner_total_reward'] = block.miner_total_reward
+        return data
+
+    def get_utxos(self, user=None):
+        """
+        Returns the unspent outputs of user `user`, or every UTXO if no user is given.
+        """
+        utxos = self.system.UTXO_set
+        if user is not None:
+            adress = self.get_user(user).adress
+            utxos = utxos.owned([adress])
+        return [{'utxo_id': utxo.utxo_id, 'sender': utxo.sender, 'amount': utxo.amount} for utxo in utxos]
+
+    def get_block_count(self):
+        """
+        Returns the number of blocks in the chain.
+        """
+        return len(self.system.blockchain)
+
+    def get_headers(self, start=0):
+        """
+        Returns the header records of the best chain from height `start`, as hex
+        (see HeaderChain), for light clients.
+        """
+        headers = self.system.headers
+        if not isinstance(start, int) or isinstance(start, bool) or not 0 <= start <= len(headers):
+            raise RPCError(INVALID_PARAMS, f"Invalid start height {start!r}")
+        return headers.data[start * HEADER.size:].hex()
+
+    def get_transaction_proof(self, index, txid):
+        """
+        Returns the Merkle proof of transaction `txid` in the block at height `index`,
+        as [sibling hex, sibling_is_left] pairs.
+        """
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(self.system.blockchain):
+            raise RPCError(INVALID_PARAMS, f"Unknown block {index!r}")
+        try:
+            proof = self.system.transaction_proof(index, txid)
+        except ValueError:
+            raise RPCError(INVALID_PARAMS, f"Transaction {txid!r} is not in block {index}")
+        return [[sibling.hex(), is_left] for sibling, is_left in proof]
+
+    def get_transaction(self, txid):
+        """
+        Returns a confirmed transaction as {'height': ..., 'transaction': ...}, or None.
+        """
+        if not isinstance(txid, str):
+            raise RPCError(INVALID_PARAMS, f"Invalid txid {txid!r}")
+        try:
+            found = self.system.find_transaction(txid)
+        except ValueError:
+            raise RPCError(INVALID_PARAMS, f"Invalid txid {txid!r}")
+        if found is None:
+            return None
+        height, transaction = found
+        return {'height': height, 'transaction': transaction}
+
+    def create_user(self):
+        """
+        Creates a new user and returns its index and address.
+        """
+        user = self.system.create_user()
+        return {'index': user.index, 'adress': user.adress}
+
+    def get_metrics(self):
+        """
+        Returns the profiler measurements of the node.
+        """
+        return profiler.to_dict()
+
+    def handle_call(self, call):
+        """
+        Dispatches a single JSON-RPC call object.
+
+        The params are bound to the signature of the method before it runs, so only
+        a call that does not fit it is answered with INVALID_PARAMS; any other error
+        raised by the method, a TypeError included, is a server error.
+
+        Args:
+            call (dict): The decoded request object.
+
+        Returns:
+            dict or None: The response object, or None for notifications.
+        """
+        if not isinstance(call, dict) or call.get('jsonrpc') != '2.0' or not isinstance(call.get('method'), str):
+            return error_response(None, INVALID_REQUEST, "Invalid request")
+
+        call_id = call.get('id')
+        method = self.methods.get(call['method'])
+        params = call.get('params', [])
+        try:
+            if method is None:
+                raise RPCError(METHOD_NOT_FOUND, f"Method {call['method']!r} not found")
+            if isinstance(params, list):
+                args, kwargs = params, {}
+            elif isinstance(params, dict):
+                args, kwargs = [], params
+            else:
+                raise RPCError(INVALID_PARAMS, "Params must be a list or an object")
+            try:
+                inspect.signature(method).bind(*args, **kwargs)
+            except TypeError as e:
+                raise RPCError(INVALID_PARAMS, str(e))
+            with self.lock:
+                result = method(*args, **kwargs)
+        except RPCError as e:
+            response = error_response(call_id, e.code, e.message)
+        except Exception as e:
+            response = error_response(call_id, SERVER_ERROR, str(e))
+        else:
+            response = {'jsonrpc': '2.0', 'result': result, 'id': call_id}
+
+        if 'id' not in call:
+            return None
+        return response
+
+    def handle_payload(self, payload):
+        """
+        Dispatches a raw request body, which may hold a single call or a batch.
+
+        Args:
+            payload (bytes): The HTTP request body.
+
+        Returns:
+            dict, list or None: The response to send back, or None if nothing must be sent.
+        """
+        try:
+            request = json.loads(payload)
+        except (ValueError, UnicodeDecodeError):
+            return error_response(None, PARSE_ERROR, "Parse error")
+
+        if isinstance(request, list):
+            if not request:
+                return error_response(None, INVALID_REQUEST, "Empty batch")
+            responses = [self.handle_call(call) for call in request]
+            responses = [response for response in responses if response is not None]
+            return responses or None
+        return self.handle_call(request)
+
+
+def error_response(call_id, code, message):
+    """
+    Builds a JSON-RPC error response.
+
+    Args:
+        call_id: The id of the failed call.
+        code (int): JSON-RPC error code.
+        message (str): Description of the error.
+
+    Returns:
+        dict: The error response object.
+    """
+    return {'jsonrpc': '2.0', 'error': {'code': code, 'message': message}, 'id': call_id}
+
+
+class NodeRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP/1.1 handler that forwards POST bodies to the server's NodeRPC.
+
+    Connections are kept alive between requests, so clients can reuse a socket
+    and pipeline several requests before reading the responses; they are
+    answered in order.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        """
+        Handles a JSON-RPC request.
+        """
+        length = int(self.headers.get('Content-Length', 0))
+        payload = self.rfile.read(length)
+        response = self.server.rpc.handle_payload(payload)
+        body = b'' if response is None else json.dumps(response).encode()
+
+        self.send_response(200 if response is not None else 204)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """
+        Silences the per-request access log.
+        """
+        pass
+
+
+class NodeServer(ThreadingHTTPServer):
+    """
+    Local HTTP server exposing a System through JSON-RPC.
+
+    Attributes:
+        rpc (NodeRPC): The dispatcher serving the system.
+        thread (threading.Thread or None): Background thread when started with `start()`.
+
+    Methods:
+        start(): Serves requests in a background thread.
+        stop(): Stops the server and closes its socket.
+    """
+    daemon_threads = True
+
+    def __init__(self, system, host='127.0.0.1', port=0):
+        """
+        Binds the server to a local address.
+
+        Args:
+            system (System): The node state to serve.
+            host (str): Interface to bind to.
+            port (int): Port to bind to; 0 picks a free port.
+        """
+        super().__init__((host, port), NodeRequestHandler)
+        self.rpc = NodeRPC(system)
+        self.thread = None
+
+    @property
+    def url(self):
+        """
+        str: Base URL of the server.
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """
+        Serves requests in a daemon thread.
+
+        Returns:
+            NodeServer: The server itself.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving and releases the socket.
+        """
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+if __name__ == '__main__':
+    import argparse
+    from System import System
+
+    parser = argparse.ArgumentParser(description="Run a local JSON-RPC blockchain node.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8545)
+    parser.add_argument('--difficulty', type=int, default=4)
+    args = parser.parse_args()
+
+    server = NodeServer(System(difficulty=args.difficulty), args.host, args.port)
+    print(f"Node server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,156 @@
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+
+NONCE_SPACE = 2 ** 32
+CHUNK_SIZE = 2 ** 16
+
+
+def difficulty_target(difficulty):
+    """
+    Returns the largest hash value, as an integer, that has `difficulty` leading hex zeros.
+
+    Args:
+        difficulty (int): Number of leading zero hex digits required.
+
+    Returns:
+        int: Exclusive upper bound for a valid hash.
+    """
+    return 1 << (256 - 4 * difficulty)
+
+
+def search_range(prefix, suffix, target, start, stop):
+    """
+    Scans the nonces in [start, stop) in order and stops at the first valid one.
+
+    Module-level so it can run in worker processes.
+
+    Args:
+        prefix (bytes): Hashed bytes before the nonce.
+        suffix (bytes): Hashed bytes after the nonce.
+        target (int): Exclusive upper bound for a valid hash.
+        start (int): First nonce to try.
+        stop (int): End of the range (exclusive).
+
+    Returns:
+        tuple: (nonce or None, hex hash or None, number of hashes computed)
+    """
+    base = hashlib.sha256(prefix)
+    for nonce in range(start, stop):
+        h = base.copy()
+        h.update(str(nonce).encode())
+        h.update(suffix)
+        digest = h.digest()
+        if int.from_bytes(digest, 'big') < target:
+            return nonce, digest.hex(), nonce - start + 1
+    return None, None, stop - start
+
+
+class NonceSearch:
+    """
+    Sequential proof-of-work search over the nonce space of a block.
+
+    Nonces are scanned in order from 0, in chunks of CHUNK_SIZE, so no nonce is ever
+    tried twice. When the 32-bit nonce space is exhausted the block's extranonce is
+    rolled and the scan restarts. Chunks can be split between worker processes; the
+    result is the same as the sequential scan, since the lowest valid nonce of each
+    round of chunks wins.
+
+    Attributes:
+        block (Block): The block being mined; its nonce, extranonce and hash are set on success.
+        target (int): Exclusive upper bound for a valid hash.
+        nonce_space (int): Number of nonces per extranonce.
+        chunk_size (int): Number of nonces per chunk.
+        attempts (int): Number of hashes computed so far.
+        exhausted (list): Fully scanned ranges, as (extranonce, start, stop) tuples.
+
+    Methods:
+        chunks(start, count): Returns the next `count` ranges to scan.
+        run(workers): Searches until a valid nonce is found and updates the block.
+    """
+    def __init__(self, block, difficulty, nonce_space=NONCE_SPACE, chunk_size=CHUNK_SIZE):
+        """
+        Initializes the search for a block.
+
+        Args:
+            block (Block): The block to mine.
+            difficulty (int): Number of leading zero hex digits required.
+            nonce_space (int): Number of nonces per extranonce.
+            chunk_size (int): Number of nonces per chunk.
+        """
+        self.block = block
+        self.target = difficulty_target(difficulty)
+        self.nonce_space = nonce_space
+        self.chunk_size = chunk_size
+        self.attempts = 0
+        self.exhausted = []
+
+    def mark_exhausted(self, extranonce, start, stop):
+        """
+        Records a fully scanned range, merging it with the previous one when contiguous.
+        """
+        if self.exhausted:
+            last_extranonce, last_start, last_stop = self.exhausted[-1]
+            if last_extranonce == extranonce and last_stop == start:
+                self.exhausted[-1] = (extranonce, last_start, stop)
+                return
+        self.exhausted.append((extranonce, start, stop))
+
+    def chunks(self, start, count):
+        """
+        Returns up to `count` consecutive ranges from `start`, within the nonce space.
+
+        Args:
+            start (int): First nonce.
+            count (int): Number of ranges.
+
+        Returns:
+            list: (start, stop) tuples.
+        """
+        ranges = []
+        while len(ranges) < count and start < self.nonce_space:
+            stop = min(start + self.chunk_size, self.nonce_space)
+            ranges.append((start, stop))
+            start = stop
+        return ranges
+
+    def run(self, workers=1):
+        """
+        Searches for a valid nonce, rolling the extranonce when the nonce space is exhausted.
+
+        Args:
+            workers (int): Number of processes scanning chunks in parallel.
+
+        Returns:
+            int: Number of hashes computed.
+        """
+        block = self.block
+        executor = ProcessPoolExecutor(workers) if workers > 1 else None
+        try:
+            while True:
+                prefix, suffix = block.hash_template()
+                start = 0
+                while start < self.nonce_space:
+                    ranges = self.chunks(start, workers)
+                    if executor is None:
+                        results = [search_range(prefix, suffix, self.target, *ranges[0])]
+                    else:
+                        results = list(executor.map(
+                            search_range, *zip(*[(prefix, suffix, self.target, a, b) for a, b in ranges])
+                        ))
+
+                    self.attempts += sum(attempts for _, _, attempts in results)
+                    for (range_start, range_stop), (nonce, block_hash, _) in zip(ranges, results):
+                        if nonce is not None:
+                            if nonce > range_start:
+                                self.mark_exhausted(block.extranonce, range_start, nonce)
+                            block.nonce = nonce
+                            block.hash = block_hash
+                            return self.attempts
+                        self.mark_exhausted(block.extranonce, range_start, range_stop)
+                    start = ranges[-1][1]
+
+                block.extranonce += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
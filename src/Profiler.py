@@ -0,0 +1,291 @@
+import json
+import time
+from collections import deque
+
+
+BUCKETS = (0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+"""tuple: Upper bounds, in seconds, of the histogram buckets of every timer."""
+
+
+class StageStats:
+    """
+    Accumulated timings of one instrumented stage.
+
+    Attributes:
+        count (int): Number of recorded durations.
+        total (float): Sum of the durations, in seconds.
+        min (float or None): Shortest duration.
+        max (float or None): Longest duration.
+        buckets (list): Cumulative-ready counts per bucket of BUCKETS, plus one overflow bucket.
+        samples (deque): Most recent durations, for live histograms.
+    """
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets', 'samples')
+
+    def __init__(self, max_samples):
+        """
+        Initializes empty statistics.
+
+        Args:
+            max_samples (int): Number of recent durations kept.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.samples = deque(maxlen=max_samples)
+
+    def record(self, seconds):
+        """
+        Adds one duration.
+
+        Args:
+            seconds (float): The duration.
+        """
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.samples.append(seconds)
+
+    def to_dict(self):
+        """
+        Returns the statistics as a JSON-serializable dict.
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'buckets': dict(zip([str(b) for b in BUCKETS] + ['+Inf'], self.buckets)),
+        }
+
+
+class Timer:
+    """
+    Context manager recording the time spent in its block into a Profiler stage.
+    """
+    __slots__ = ('profiler', 'stage', 'start')
+
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class NullTimer:
+    """
+    Shared do-nothing context manager returned while profiling is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class Profiler:
+    """
+    Per-stage timers and counters for the hot paths of the system.
+
+    Instrumented code uses `with profiler.timer('stage'):` and `profiler.count('name', n)`.
+    While disabled, `timer` returns a shared no-op context manager and `count` returns
+    immediately, so the instrumentation costs one attribute check per call.
+
+    Stages recorded by the system: utxo_lookup, coin_selection, signing, verification,
+    serialization, hashing, send_transaction, mining. Counters: pow_attempts,
+    transactions, blocks. The hashrate of every mined block is kept in `hashrates`.
+
+    Attributes:
+        enabled (bool): Whether measurements are recorded.
+        stages (dict): Stage name to StageStats.
+        counters (dict): Counter name to value.
+        hashrates (deque): Recent (block index, hashes per second) pairs.
+        max_samples (int): Number of recent samples kept per stage.
+
+    Methods:
+        enable() / disable(): Turns recording on or off.
+        reset(): Clears every measurement.
+        timer(stage): Returns a context manager timing a stage.
+        record(stage, seconds): Adds a duration to a stage.
+        count(name, n): Increments a counter.
+        record_block(index, attempts, seconds): Records the PoW work of a mined block.
+        to_json(): Exports the measurements as JSON.
+        to_prometheus(): Exports the measurements in Prometheus text format.
+    """
+    def __init__(self, max_samples=1000):
+        """
+        Initializes a disabled profiler.
+
+        Args:
+            max_samples (int): Number of recent samples kept per stage.
+        """
+        self.enabled = False
+        self.max_samples = max_samples
+        self.reset()
+
+    def reset(self):
+        """
+        Clears every measurement.
+        """
+        self.stages = {}
+        self.counters = {}
+        self.hashrates = deque(maxlen=self.max_samples)
+
+    def enable(self):
+        """
+        Starts recording measurements.
+        """
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stops recording measurements.
+        """
+        self.enabled = False
+
+    def timer(self, stage):
+        """
+        Returns a context manager timing its block as `stage`.
+
+        Args:
+            stage (str): Name of the stage.
+
+        Returns:
+            Timer or NullTimer: The context manager.
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, stage)
+
+    def record(self, stage, seconds):
+        """
+        Adds a duration to a stage.
+
+        Args:
+            stage (str): Name of the stage.
+            seconds (float): The duration.
+        """
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats(self.max_samples)
+        stats.record(seconds)
+
+    def count(self, name, n=1):
+        """
+        Increments a counter.
+
+        Args:
+            name (str): Name of the counter.
+            n (int): Increment.
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_block(self, index, attempts, seconds):
+        """
+        Records the proof-of-work of a mined block.
+
+        Args:
+            index (int): Index of the block.
+            attempts (int): Number of hashes computed.
+            seconds (float): Time spent searching.
+        """
+        if not self.enabled:
+            return
+        self.count('pow_attempts', attempts)
+        self.count('blocks')
+        self.record('mining', seconds)
+        self.hashrates.append((index, attempts / seconds if seconds > 0 else None))
+
+    def samples(self, stage):
+        """
+        Returns the recent durations of a stage.
+
+        Args:
+            stage (str): Name of the stage.
+
+        Returns:
+            list: Durations in seconds, oldest first.
+        """
+        stats = self.stages.get(stage)
+        return list(stats.samples) if stats is not None else []
+
+    def to_dict(self):
+        """
+        Returns every measurement as a JSON-serializable dict.
+        """
+        return {
+            'enabled': self.enabled,
+            'stages': {name: stats.to_dict() for name, stats in self.stages.items()},
+            'counters': dict(self.counters),
+            'hashrates': [{'block': index, 'hashrate': rate} for index, rate in self.hashrates],
+        }
+
+    def to_json(self):
+        """
+        Exports the measurements as a JSON string.
+
+        Returns:
+            str: The JSON document.
+        """
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix='blockchain'):
+        """
+        Exports the measurements in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix of every metric name.
+
+        Returns:
+            str: The metrics.
+        """
+        lines = []
+        if self.stages:
+            name = f"{prefix}_stage_seconds"
+            lines.append(f"# HELP {name} Time spent in each instrumented stage.")
+            lines.append(f"# TYPE {name} histogram")
+            for stage, stats in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {stats.total}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {stats.count}')
+        for counter, value in sorted(self.counters.items()):
+            name = f"{prefix}_{counter}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        if self.hashrates and self.hashrates[-1][1] is not None:
+            name = f"{prefix}_hashrate"
+            lines.append(f"# HELP {name} Hashes per second of the last mined block.")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {self.hashrates[-1][1]}")
+        return '\n'.join(lines) + '\n'
+
+
+profiler = Profiler()
+"""Profiler: Process-wide profiler used by the instrumented classes."""
@@ -0,0 +1,298 @@
+import hashlib
+import os
+import struct
+import sys
+from array import array
+
+from UTXOTable import UTXOTable, TXID_SIZE
+from HeaderChain import HeaderChain, HEADER as HEADER_RECORD
+
+
+MAGIC = b'UTXOSNAP'
+VERSION = 2
+HEADER = struct.Struct('<8sHQ32sQQqIQ')
+ADRESS_SIZE = 32
+HASH_SIZE = 32
+SUFFIX = '.utxo'
+
+
+class SnapshotError(Exception):
+    """
+    Raised when a snapshot file is malformed or fails its integrity check.
+    """
+    pass
+
+
+class UTXOSnapshot:
+    """
+    A UTXO set frozen at a given block, used to bootstrap a System without replaying the whole chain.
+
+    The file format is a fixed header followed by the columns of a UTXOTable, the
+    header records of the chain up to the block and a trailing SHA-256 of everything
+    before it:
+
+        header      magic, version, height, block hash, next UTXO index,
+                    next transaction index, issued supply, address count, row count
+        adresses    32 raw bytes per owner address
+        txids       32 raw bytes per row
+        indexes     int64 per row
+        owners      int32 per row (position in the address list)
+        amounts     int64 per row (base units)
+        headers     one HeaderChain record per block, up to and including the block
+        digest      SHA-256 of all the bytes above
+
+    All integers are little-endian. Rows keep the order of the UTXO set. The header
+    records let a restore skip the Merkle root of every block before the snapshot.
+
+    Attributes:
+        height (int): Index of the block the snapshot was taken at.
+        block_hash (str): Hash of that block.
+        index_utxo (int): Next UTXO index of the system.
+        index_transaction (int): Next transaction index of the system.
+        issued (int): Supply issued up to that block, in base units.
+        table (UTXOTable): The unspent outputs.
+        headers (HeaderChain): The headers of the chain up to the block.
+        digest (str or None): Hex content hash, set once written or read.
+
+    Methods:
+        from_system(system): Takes a snapshot of a system at its last block.
+        write(path): Writes the snapshot to a file and returns its content hash.
+        read(path): Reads and verifies a snapshot file.
+        from_bytes(data): Decodes and verifies an encoded snapshot.
+        filename(): Returns the file name used for the snapshot in a directory.
+    """
+    def __init__(self, height, block_hash, index_utxo, index_transaction, issued, table, headers):
+        """
+        Initializes a snapshot.
+
+        Args:
+            height (int): Index of the block the snapshot was taken at.
+            block_hash (str): Hash of that block.
+            index_utxo (int): Next UTXO index of the system.
+            index_transaction (int): Next transaction index of the system.
+            issued (int): Supply issued up to that block, in base units.
+            table (UTXOTable): The unspent outputs.
+            headers (HeaderChain): The headers of the chain up to the block.
+        """
+        self.height = height
+        self.block_hash = block_hash
+        self.index_utxo = index_utxo
+        self.index_transaction = index_transaction
+        self.issued = issued
+        self.table = table
+        self.headers = headers
+        self.digest = None
+
+    @classmethod
+    def from_system(cls, system):
+        """
+        Takes a snapshot of a system at its last block.
+
+        Args:
+            system (System): The system to snapshot. Its mempool must be empty, since
+                pending transactions have already modified the UTXO set.
+
+        Returns:
+            UTXOSnapshot: The snapshot.
+        """
+        if system.mempool:
+            raise ValueError("Cannot snapshot a system with pending transactions")
+        block = system.blockchain[-1]
+        return cls(
+            block.index, block.hash, system.index_utxo, system.index_transaction,
+            system.issued, UTXOTable.from_utxos(system.UTXO_set),
+            HeaderChain.from_bytes(system.headers.to_bytes()[:(block.index + 1) * HEADER_RECORD.size])
+        )
+
+    def filename(self):
+        """
+        Returns the file name of the snapshot, sortable by height.
+
+        Returns:
+            str: The file name.
+        """
+        return f"snapshot_{self.height:010d}_{self.block_hash[:16]}{SUFFIX}"
+
+    def to_bytes(self):
+        """
+        Encodes the snapshot, without the trailing digest.
+
+        Returns:
+            bytes: The encoded header and columns.
+        """
+        table = self.table
+        header = HEADER.pack(
+            MAGIC, VERSION, self.height, bytes.fromhex(self.block_hash), self.index_utxo,
+            self.index_transaction, self.issued, len(table.adresses), len(table)
+        )
+        adresses = b''.join(bytes.fromhex(adress) for adress in table.adresses)
+        return b''.join([
+            header, adresses, bytes(table.txids),
+            little_endian(table.indexes), little_endian(table.owners), little_endian(table.amounts),
+            self.headers.to_bytes()
+        ])
+
+    def write(self, path):
+        """
+        Writes the snapshot atomically to `path`.
+
+        Args:
+            path (str): Destination file.
+
+        Returns:
+            str: Hex SHA-256 content hash of the file.
+        """
+        data = self.to_bytes()
+        digest = hashlib.sha256(data).digest()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.write(digest)
+        os.replace(tmp_path, path)
+        self.digest = digest.hex()
+        return self.digest
+
+    @classmethod
+    def read(cls, path):
+        """
+        Reads a snapshot file and verifies its content hash.
+
+        Args:
+            path (str): Snapshot file.
+
+        Returns:
+            UTXOSnapshot: The decoded snapshot.
+
+        Raises:
+            SnapshotError: If the file is malformed or corrupted.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        return cls.from_bytes(data, path)
+
+    @classmethod
+    def from_bytes(cls, data, source='snapshot'):
+        """
+        Decodes a snapshot, with its trailing digest, and verifies its content hash.
+
+        Args:
+            data (bytes): The encoded snapshot.
+            source (str): Name of the data in error messages.
+
+        Returns:
+            UTXOSnapshot: The decoded snapshot.
+
+        Raises:
+            SnapshotError: If the data is malformed or corrupted.
+        """
+        if len(data) < HEADER.size + HASH_SIZE:
+            raise SnapshotError(f"{source} is too short to be a snapshot")
+        body, digest = data[:-HASH_SIZE], data[-HASH_SIZE:]
+        if hashlib.sha256(body).digest() != digest:
+            raise SnapshotError(f"{source} failed its integrity check")
+
+        magic, version, height, block_hash, index_utxo, index_transaction, issued, n_adresses, n_rows = \
+            HEADER.unpack_from(body)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError(f"{source} is not a version {VERSION} snapshot")
+        expected = HEADER.size + n_adresses * ADRESS_SIZE + n_rows * (TXID_SIZE + 8 + 4 + 8) \
+            + (height + 1) * HEADER_RECORD.size
+        if len(body) != expected:
+            raise SnapshotError(f"{source} has {len(body)} bytes, expected {expected}")
+
+        table = UTXOTable()
+        offset = HEADER.size
+        for i in range(n_adresses):
+            table.owner_id(body[offset:offset + ADRESS_SIZE].hex())
+            offset += ADRESS_SIZE
+        table.txids = bytearray(body[offset:offset + n_rows * TXID_SIZE])
+        offset += n_rows * TXID_SIZE
+        table.indexes, offset = read_column(body, offset, 'q', n_rows)
+        table.owners, offset = read_column(body, offset, 'i', n_rows)
+        table.amounts, offset = read_column(body, offset, 'q', n_rows)
+        headers = HeaderChain.from_bytes(body[offset:])
+        if headers.record(-1)[1] != block_hash:
+            raise SnapshotError(f"{source} has headers of another chain")
+
+        snapshot = cls(height, block_hash.hex(), index_utxo, index_transaction, issued, table, headers)
+        snapshot.digest = digest.hex()
+        return snapshot
+
+
+def little_endian(column):
+    """
+    Returns the bytes of an array in little-endian order.
+    """
+    if sys.byteorder == 'little':
+        return column.tobytes()
+    swapped = array(column.typecode, column)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def read_column(data, offset, typecode, count):
+    """
+    Reads a little-endian array column.
+
+    Returns:
+        tuple: (the array, the offset after it)
+    """
+    column = array(typecode)
+    end = offset + count * column.itemsize
+    column.frombytes(data[offset:end])
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column, end
+
+
+def save_snapshot(system, directory):
+    """
+    Writes a snapshot of `system` at its last block into `directory`.
+
+    Args:
+        system (System): The system to snapshot.
+        directory (str): Directory holding the snapshots.
+
+    Returns:
+        str: Path of the written file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    snapshot = UTXOSnapshot.from_system(system)
+    path = os.path.join(directory, snapshot.filename())
+    snapshot.write(path)
+    print(f"Snapshot of block {snapshot.height} written to {path} ({snapshot.digest[:16]}).")
+    return path
+
+
+def latest_snapshot(directory, blocks):
+    """
+    Finds the most recent valid snapshot that belongs to the given chain.
+
+    Snapshots taken on a block that is not in `blocks` (a different or longer chain)
+    and corrupted files are skipped.
+
+    Args:
+        directory (str): Directory holding the snapshots.
+        blocks (list): The chain, indexed by block height.
+
+    Returns:
+        UTXOSnapshot or None: The snapshot, or None if there is no usable one.
+    """
+    if not os.path.isdir(directory):
+        return None
+    names = sorted((name for name in os.listdir(directory) if name.endswith(SUFFIX)), reverse=True)
+    for name in names:
+        try:
+            height = int(name.split('_')[1])
+        except (IndexError, ValueError):
+            continue
+        if height >= len(blocks):
+            continue
+        try:
+            snapshot = UTXOSnapshot.read(os.path.join(directory, name))
+        except SnapshotError as e:
+            print(f"Skipping snapshot {name}: {e}")
+            continue
+        if blocks[height].hash == snapshot.block_hash:
+            return snapshot
+    return None
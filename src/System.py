@@ -1,10 +1,27 @@
-import random
+import json
+import os
 import time
+from operator import itemgetter
 
 from User import User
-from Transaction import Transaction
+from Transaction import Transaction, funding_shares, select_inputs
 from UTXO import UTXO
 from Block import Block
+from Mempool import Mempool
+from UTXOSet import UTXOSet
+from Amount import to_units, format_amount
+from Snapshot import save_snapshot, latest_snapshot
+from Archive import BlockArchive
+from Profiler import profiler
+from Clock import SystemClock, VirtualClock
+from NonceSearch import NonceSearch, difficulty_target
+from BlockTree import BlockTree, UndoRecord, block_work
+from HeaderChain import HeaderChain, merkle_proof
+from ChainValidator import ValidationError, check_transactions
+from BlockStore import BlockStore, StoredChain
+
+
+GENESIS_AMOUNT = to_units(1000)
 
 
 class System:
@@ -13,70 +30,125 @@ class System:
 
     Attributes:
         users (list): List of all registered users in the system.
-        blockchain (list): List of all blocks in the chain.
-        mempool (list): Pool of unconfirmed transactions (including coinbase).
+        blockchain (list or StoredChain): Blocks of the best chain, indexed by height; a
+            StoredChain reading them from disk once a block store is enabled.
+        headers (HeaderChain): Fixed-size headers of the best chain, for views and light
+            clients that do not need the block bodies.
+        block_tree (BlockTree): Every known block, including competing branches, with
+            the cumulative work of each chain and the undo records of the best chain.
+        mempool (Mempool): Pool of validated transactions waiting to be mined.
         transactions (list): All processed transactions.
-        UTXO_set (list): List of all unspent transaction outputs.
+        UTXO_set (UTXOSet): All unspent transaction outputs, including those created by pending transactions.
+        wallets (dict): Address to the Wallet of each registered user, kept up to date by
+            the UTXO set and the mempool.
         rewards (list): List of mining rewards (coinbase transactions).
         mining_fees (list): List of mining fees per block (not yet used).
         money_in_circulation (dict): Mapping of timestamps to total money in circulation.
+        issued (int): Total amount ever created by the genesis block and block rewards.
 
-        mining_fee (float): Flat fee added to transactions.
-        mining_reward (float): Fixed reward for mining a block.
+        mining_fee (int): Flat fee added to transactions, in base units.
+        mining_reward (int): Fixed reward for mining a block, in base units.
         difficulty (int): Mining difficulty (number of leading zeroes in hash).
+        seed (int, str or None): Seed of a deterministic run, or None.
+        clock (SystemClock or VirtualClock): Source of block timestamps.
+        snapshot_dir (str or None): Directory where periodic UTXO snapshots are written.
+        snapshot_interval (int or None): Number of blocks between snapshots.
+        archive (BlockArchive or None): On-disk store of pruned block bodies.
+        prune_keep (int or None): Number of recent blocks kept in full when pruning.
+        pruned_height (int): Number of blocks, from the genesis block, already pruned.
+        store (BlockStore or None): On-disk store of the chain and the users.
 
         index_user (int): Running index to assign user IDs.
         index_transaction (int): Running index to assign transaction IDs.
         index_block (int): Running index to assign block IDs.
         index_utxo (int): Running index to assign UTXO IDs.
 
-        first_user (User): The initial user who mines the genesis block.
+        first_user (User or None): The initial user who mines the genesis block.
 
     Methods:
         create_genesis_block(): Creates the genesis block and first user.
-        get_index_utxo(): Returns a unique UTXO index as a string.
+        get_index_utxo(): Returns a unique UTXO index.
         create_user(): Instantiates and registers a new user.
-        add_block(block): Adds a mined block to the blockchain.
+        add_block(block, undo): Adds a mined block to the blockchain.
+        link_block(node, undo): Makes a block of the tree the new tip of the best chain.
         add_user(user): Adds a user to the system.
         add_transaction(transaction): Records a transaction and displays info.
         add_reward(reward): Records a mining reward.
         send_transaction(sender, receiver, amount): Sends and processes a transaction.
+        send_many(sender, payments, cosigners): Pays several receivers with one transaction.
         get_balances(): Returns current balances for all users.
-        get_money_circulation(block): Updates money in circulation after each block.
+        get_money_circulation(block): Updates money in circulation after each block and checks supply conservation.
         create_coinbase_transaction(miner, amount): Creates a coinbase (mining reward) transaction.
         get_mining_fees(): Calculates total mining fees from transactions in the mempool.
         mine_block(miner): Performs proof-of-work to mine a new block and update state.
+        enable_snapshots(directory, interval): Writes a UTXO snapshot every `interval` blocks.
+        enable_pruning(directory, keep): Keeps only the last `keep` block bodies in memory.
+        prune_chain(): Archives the bodies of blocks older than the last `prune_keep`.
+        enable_store(directory, snapshot_interval, private_keys): Keeps the chain in a block store.
+        submit_transaction(transaction): Processes and records a new transaction.
+        submit_block(block): Adds a block mined elsewhere, reorganizing the chain if it has more work.
+        reorganize(node): Switches the best chain to the chain ending at `node`.
+        connect_block(block): Applies a block to the UTXO set and returns its undo record.
+        disconnect_block(node): Reverts the tip of the best chain.
+        revert(undo): Reverts the changes recorded in an undo record.
+        replay_blocks(blocks): Applies already mined blocks to the UTXO set.
+        restore_snapshot(snapshot, blocks, headers): Sets the state from a snapshot without a replay.
+        transaction_proof(height, txid): Returns the Merkle proof of a confirmed transaction.
+        find_transaction(txid): Returns a confirmed transaction and the height of its block.
+        bootstrap(blocks, snapshot_dir): Builds a system from the latest snapshot and the blocks after it.
+        open(directory): Opens a system kept in a block store.
     """
 
     
-    def __init__(self, mining_fee=0.5, mining_reward=3, difficulty=4):
+    def __init__(self, mining_fee=0.5, mining_reward=3, difficulty=4, genesis=True, seed=None):
         """
         Initializes the cryptocurrency system with default parameters.
 
+        Amounts in the ledger are integers of base units (see Amount.py); the fee
+        and reward are given in coins and converted exactly.
+
         Args:
-            mining_fee (float): Fee charged per transaction.
-            mining_reward (float): Reward given to miners per block.
+            mining_fee (float): Fee charged per transaction, in coins.
+            mining_reward (float): Reward given to miners per block, in coins.
             difficulty (int): Proof-of-work difficulty (number of leading zeroes in hash).
+            genesis (bool): Whether to create the first user and the genesis block. Systems
+                restored from existing blocks (see `bootstrap`) start empty.
+            seed (int, str or None): Enables the deterministic mode: user keys are derived
+                from the seed and block timestamps come from a virtual clock. Since the
+                nonce search is sequential, the same seed and the same calls produce
+                byte-identical chains.
         """
         self.users = []
         self.blockchain = []
-        self.mempool = []
+        self.headers = HeaderChain()
+        self.block_tree = BlockTree()
+        self.wallets = {}
+        self.mempool = Mempool(self.wallets)
         self.transactions = []
-        self.UTXO_set = []
+        self.UTXO_set = UTXOSet(wallets=self.wallets)
         self.rewards = []
         self.mining_fees = []
         self.money_in_circulation = {}
+        self.issued = 0
 
-        self.mining_fee = mining_fee
-        self.mining_reward = mining_reward
+        self.mining_fee = to_units(mining_fee)
+        self.mining_reward = to_units(mining_reward)
         self.difficulty = difficulty
+        self.seed = seed
+        self.clock = VirtualClock() if seed is not None else SystemClock()
+        self.snapshot_dir = None
+        self.snapshot_interval = None
+        self.archive = None
+        self.prune_keep = None
+        self.pruned_height = 0
+        self.store = None
 
         self.index_user = 0
         self.index_transaction = 0
         self.index_block = 0
         self.index_utxo = 0
 
-        self.first_user = self.create_genesis_block()
+        self.first_user = self.create_genesis_block() if genesis else None
 
 
     def create_genesis_block(self):
@@ -89,13 +161,15 @@ class System:
         user0 = self.create_user()
         special_transaction = self.create_coinbase_transaction(
                     miner=user0,  # The first user is the miner of the genesis block
-                    amount=1000
+                    amount=GENESIS_AMOUNT
                 )
-        special_transaction.process_transaction()
+        special_transaction.process_transaction(self)
+        self.issued += GENESIS_AMOUNT
         genesis_block = Block(
                     index=0,
                     transactions=[special_transaction.serialize_transaction()],
-                    previous_hash='0'
+                    previous_hash='0',
+                    timestamp=self.clock.now()
                 )
         
         self.add_block(genesis_block)
@@ -110,11 +184,11 @@ class System:
         Returns a unique index for the next UTXO.
 
         Returns:
-            str: A unique UTXO index as a string.
+            int: A unique UTXO index.
         """
         index = self.index_utxo
         self.index_utxo += 1
-        return str(index)
+        return index
     
     
     def create_user(self):
@@ -124,33 +198,55 @@ class System:
         Returns:
             User: The created user.
         """
-        user = User(self.index_user)
+        user = User(self.index_user, seed=self.seed)
         self.add_user(user)
         self.index_user += 1
         print(f"User {user.index} created with adress {user.adress}.")
         return user
 
     
-    def add_block(self, block):
+    def add_block(self, block, undo=None):
         """
         Adds a mined block to the blockchain.
 
         Args:
             block (Block): The block to be added.
+            undo (UndoRecord or None): How to disconnect the block, or None if it cannot be.
         """
-        self.blockchain.append(block)
-        self.index_block += 1
+        node = self.block_tree.add(block, block_work(self.difficulty), self.block_tree.tip)
+        self.link_block(node, undo)
         print(f"Block {block.index} created and added to blockchain.")
 
 
+    def link_block(self, node, undo):
+        """
+        Makes a block of the tree, already applied to the UTXO set, the new tip of the
+        best chain.
+
+        Args:
+            node (BlockNode): Node of the block; its parent must be the current tip.
+            undo (UndoRecord or None): How to disconnect the block.
+        """
+        node.undo = undo
+        node.index_utxo = self.index_utxo
+        node.index_transaction = self.index_transaction
+        self.block_tree.tip = node
+        self.blockchain.append(node.block)
+        self.headers.append(node.block)
+        self.index_block += 1
+
+
     def add_user(self, user):
         """
-        Adds a user to the system's user list.
+        Adds a user to the system's user list and starts tracking its wallet.
 
         Args:
             user (User): The user to be added.
         """
+        user.wallet = self.UTXO_set.watch(user.adress)
         self.users.append(user)
+        if self.store is not None:
+            self.store.add_user(user.to_dict(self.store.config['private_keys']))
 
 
     def add_transaction(self, transaction):
@@ -162,9 +258,11 @@ class System:
         """
         self.transactions.append(transaction)
         if transaction.sender is None:
-            print(f"Coinbase transaction {transaction.index} added: {transaction.receiver.adress} received {transaction.amount}.")
+            print(f"Coinbase transaction {transaction.index} added: {transaction.receiver.adress} received {format_amount(transaction.amount)}.")
+        elif len(transaction.outputs) > 1:
+            print(f"Transaction {transaction.index} added: {transaction.sender.adress} sent {format_amount(transaction.amount)} to {len(transaction.outputs)} receivers.")
         else:
-            print(f"Transaction {transaction.index} added: {transaction.sender.adress} sent {transaction.amount} to {transaction.receiver.adress}.")
+            print(f"Transaction {transaction.index} added: {transaction.sender.adress} sent {format_amount(transaction.amount)} to {transaction.receiver.adress}.")
 
 
     def add_reward(self, reward):
@@ -184,50 +282,112 @@ class System:
         Args:
             sender (User): The user sending the funds.
             receiver (User): The user receiving the funds.
-            amount (float): The amount to transfer.
+            amount (int): The amount to transfer, in base units.
 
         Returns:
             bool: True if the transaction is successful, False otherwise.
         """
-        transaction = Transaction(
-                    index=self.index_transaction,
-                    sender=sender,
-                    receiver=receiver,
-                    amount=amount,
-                    system=self
-                )
-        if transaction.process_transaction():
+        with profiler.timer('send_transaction'):
+            transaction = Transaction(
+                        index=self.index_transaction,
+                        sender=sender,
+                        receiver=receiver,
+                        amount=amount,
+                        system=self
+                    )
+            processed = self.submit_transaction(transaction)
+        if processed:
+            print(f"Transaction {transaction.index} processed: {sender.adress} sent {format_amount(amount)} to {receiver.adress}.")
+        return processed
+
+
+    def send_many(self, sender, payments, cosigners=()):
+        """
+        Pays several receivers with a single transaction: one fee, one signature per
+        funding user and one change output per funding user, instead of one
+        transaction per payment.
+
+        Args:
+            sender (User): The user sending the funds; pays the fee and what the
+                cosigners do not cover.
+            payments (list): (User, amount) pairs, amounts in base units.
+            cosigners (iterable): (User, contribution) pairs of other users funding the
+                payments from their own UTXOs; each gets its own change.
+
+        Returns:
+            bool: True if the transaction is successful, False otherwise.
+        """
+        if not payments:
+            raise ValueError("A batch transaction needs at least one payment")
+        with profiler.timer('send_transaction'):
+            transaction = Transaction(
+                        index=self.index_transaction,
+                        sender=sender,
+                        receiver=None,
+                        amount=None,
+                        system=self,
+                        payments=payments,
+                        cosigners=cosigners
+                    )
+            processed = self.submit_transaction(transaction)
+        if processed:
+            print(f"Transaction {transaction.index} processed: {sender.adress} sent {format_amount(transaction.amount)} to {len(payments)} receivers.")
+        return processed
+
+
+    def submit_transaction(self, transaction):
+        """
+        Processes a new transaction and records it if it is accepted.
+
+        Args:
+            transaction (Transaction): The transaction.
+
+        Returns:
+            bool: True if the transaction is successful, False otherwise.
+        """
+        processed = transaction.process_transaction(self)
+        if processed:
             self.add_transaction(transaction)
             self.index_transaction += 1
-            self.mempool.append(transaction.serialize_transaction())
-            print(f"Transaction {transaction.index} processed: {sender.adress} sent {amount} to {receiver.adress}.")
-            return True
+            profiler.count('transactions')
         else:
             print("Transaction failed due to insufficient balance or invalid amount.")
-            return False
+        return processed
 
 
     def get_balances(self):
         """
-        Retrieves the current balance for all users.
+        Retrieves the current balance for all users, from one grouped reduction over
+        the UTXO set (see `UTXOSet.balances`) rather than one lookup per user.
 
         Returns:
-            dict: Mapping from user index to their address and current balance.
+            dict: Mapping from user index to their address and current balance in base units.
         """
-        balances = {}
-        for user in self.users:
-            balances[f"Usuario {user.index}"] = [user.adress, user.get_balance(self.UTXO_set)]
-        return balances
+        totals = self.UTXO_set.balances()
+        return {f"Usuario {user.index}": [user.adress, totals.get(user.adress, 0)] for user in self.users}
     
 
     def get_money_circulation(self, block):
         """
         Calculates and stores the total money in circulation after a block is added.
 
+        Since amounts are exact integers, the money in circulation must equal everything
+        ever issued: fees leave the UTXO set when a transaction is sent and come back
+        through the coinbase of the block that includes it. On large UTXO sets the sum
+        is one vector sum over the columnar ledger (see `UTXOSet.total`).
+
         Args:
             block (Block): The newly mined block.
+
+        Raises:
+            RuntimeError: If the UTXO set does not add up to the issued supply.
         """
-        money_circulation = sum(utxo.amount for utxo in self.UTXO_set)
+        money_circulation = self.UTXO_set.total()
+        if money_circulation != self.issued:
+            raise RuntimeError(
+                f"Supply invariant violated after block {block.index}: "
+                f"{money_circulation} units in UTXOs, {self.issued} issued."
+            )
         self.money_in_circulation[block.timestamp] = money_circulation
 
     
@@ -237,7 +397,7 @@ class System:
 
         Args:
             miner (User): The miner receiving the reward.
-            amount (float): The reward amount.
+            amount (int): The reward amount, in base units.
 
         Returns:
             Transaction: The coinbase transaction.
@@ -254,21 +414,24 @@ class System:
 
     def get_mining_fees(self):
         """
-        Calculates the total mining fees from all valid transactions in the mempool.
+        Returns the total mining fees of the transactions in the mempool.
 
         Returns:
-            float: The sum of all mining fees.
+            int: The sum of all mining fees, in base units.
         """
-        total_fees = sum(tx['mining_fee'] for tx in self.mempool if tx['sender'] is not None)
-        return total_fees
+        return self.mempool.total_fees
     
 
-    def mine_block(self, miner):
+    def mine_block(self, miner, workers=1):
         """
         Mines a new block using proof-of-work, adds it to the blockchain, and processes rewards.
 
+        Nonces are scanned sequentially (see NonceSearch), rolling the extranonce if the
+        32-bit nonce space runs out.
+
         Args:
             miner (User): The user who mines the block.
+            workers (int): Number of processes sharing the nonce search.
 
         Returns:
             Block: The newly mined block.
@@ -277,7 +440,15 @@ class System:
 
         coinbase_transaction = self.create_coinbase_transaction(miner, total_reward)
         self.transactions.append(coinbase_transaction)
-        self.mempool.insert(0, coinbase_transaction.serialize_transaction())
+        transactions = [coinbase_transaction.serialize_transaction()] + self.mempool.block_transactions()
+
+        tip = self.block_tree.tip
+        undo = UndoRecord(tip.index_utxo, tip.index_transaction)
+        undo.issued = self.mining_reward
+        undo.fees = len(self.mempool)
+        for entry in self.mempool.entries.values():
+            undo.spent.extend(entry.inputs)
+            undo.created.extend(entry.creates)
 
         prev_bloque = self.blockchain[-1]
         prev_hash = prev_bloque.hash
@@ -285,30 +456,556 @@ class System:
 
         block = Block(
             index=index,
-            transactions=self.mempool,
-            previous_hash=prev_hash
+            transactions=transactions,
+            previous_hash=prev_hash,
+            timestamp=self.clock.now()
         )
 
         block.miner_total_reward = total_reward
 
         start_time = time.time()
-        while block.hash[:self.difficulty] != '0' * self.difficulty:
-            block.nonce = random.randint(0, 1_000_000_000)
-            block.hash = block.compute_hash()
+        attempts = NonceSearch(block, self.difficulty).run(workers)
         end_time = time.time()
         block.mining_time = round(end_time - start_time, 4)
+        profiler.record_block(index, attempts, end_time - start_time)
 
-        print(f"Block mined: {block.hash} by {miner.adress} in {block.mining_time}s")
+        print(f"Block mined: {block.hash} by {miner.adress} in {block.mining_time}s ({attempts} attempts)")
 
-        coinbase_transaction.process_transaction()
-        self.add_block(block)
+        undo.created.append(self.index_utxo)
+        coinbase_transaction.process_transaction(self)
+        self.issued += self.mining_reward
+        self.add_block(block, undo)
         self.add_reward(coinbase_transaction)
-        self.mempool = []
+        self.mempool.clear()
         self.get_money_circulation(block)
 
+        if self.snapshot_dir is not None and block.index % self.snapshot_interval == 0:
+            save_snapshot(self, self.snapshot_dir)
+        if self.archive is not None:
+            self.prune_chain()
+
         return block
 
 
+    def enable_snapshots(self, directory, interval=100):
+        """
+        Writes a snapshot of the UTXO set into `directory` every `interval` mined blocks.
 
+        Args:
+            directory (str): Directory holding the snapshots.
+            interval (int): Number of blocks between snapshots.
+        """
+        if interval < 1:
+            raise ValueError("Snapshot interval must be at least 1")
+        self.snapshot_dir = directory
+        self.snapshot_interval = interval
+
+
+    def enable_pruning(self, directory, keep=100):
+        """
+        Keeps the last `keep` blocks in full and moves older block bodies, with their
+        Transaction objects, to an archive in `directory`. Pruned blocks keep their
+        header and read their transactions back from disk when accessed.
+
+        Balances are unaffected since they only depend on the UTXO set.
+
+        Args:
+            directory (str): Directory of the block archive.
+            keep (int): Number of recent blocks kept in memory.
+        """
+        if keep < 1:
+            raise ValueError("At least one block must be kept in memory")
+        if self.store is not None:
+            raise ValueError("A stored chain already keeps its blocks on disk")
+        self.archive = BlockArchive(directory)
+        self.prune_keep = keep
+        self.prune_chain()
+
+
+    def prune_chain(self):
+        """
+        Archives the bodies of every block older than the last `prune_keep` blocks and
+        drops their Transaction objects from `transactions` and `rewards`.
+        """
+        cutoff = len(self.blockchain) - self.prune_keep
+        if self.pruned_height >= cutoff:
+            return
+        while self.pruned_height < cutoff:
+            block = self.blockchain[self.pruned_height]
+            txids = {tx['txid'] for tx in block.transactions}
+            while self.transactions and self.transactions[0].txid in txids:
+                self.transactions.pop(0)
+            while self.rewards and self.rewards[0].txid in txids:
+                self.rewards.pop(0)
+            block.prune(self.archive)
+            node = self.block_tree.get(block.hash)
+            if node is not None:
+                node.undo = None  # reorganizations cannot reach archived blocks
+            self.pruned_height += 1
+        print(f"Blocks up to {self.pruned_height - 1} pruned to {self.archive.directory}.")
+
+
+    def enable_store(self, directory, snapshot_interval=100, private_keys=False):
+        """
+        Writes the chain, the users and the parameters of the system to a block store
+        in `directory` and keeps them there from now on: `blockchain` becomes a view that
+        reads blocks from disk, new blocks and users are appended to the store and
+        disconnected blocks are cut from it. UTXO snapshots are written to
+        `directory/snapshots`, so `System.open` only replays the blocks after the last one.
+
+        Args:
+            directory (str): Directory of the store; it must not hold a chain yet.
+            snapshot_interval (int): Number of blocks between snapshots.
+            private_keys (bool): Whether to store the private keys of the users. Users of
+                a deterministic system derive them again from the seed anyway.
+        """
+        if self.archive is not None:
+            raise ValueError("A pruned chain cannot be moved to a block store")
+        store = BlockStore(directory)
+        if len(store):
+            store.close()
+            raise ValueError(f"{directory} already holds a chain; use System.open")
+        store.set_config({
+            'mining_fee': self.mining_fee,
+            'mining_reward': self.mining_reward,
+            'difficulty': self.difficulty,
+            'seed': self.seed,
+            'private_keys': private_keys,
+            'snapshot_interval': snapshot_interval,
+        })
+        for user in self.users:
+            store.add_user(user.to_dict(private_keys))
+        for block in self.blockchain:
+            store.append(block)
+        self.store = store
+        self.blockchain = StoredChain(store)
+        self.enable_snapshots(os.path.join(directory, 'snapshots'), snapshot_interval)
+        if self.blockchain and not self.mempool:
+            save_snapshot(self, self.snapshot_dir)
+
+
+    def submit_block(self, block):
+        """
+        Adds a block mined elsewhere to the block tree.
+
+        The block must extend a known block and carry a valid proof-of-work. If the
+        chain it ends has more cumulative work than the best chain, the system
+        reorganizes onto it; otherwise it is kept as a competing branch, which later
+        blocks may extend.
 
+        Args:
+            block (Block): The block.
+
+        Returns:
+            bool: True if the block was accepted (as tip or side branch), False otherwise.
+        """
+        tree = self.block_tree
+        if block.hash in tree:
+            return False
+        parent = tree.get(block.previous_hash)
+        if parent is None:
+            print(f"Block {block.index} rejected: unknown previous block {block.previous_hash}.")
+            return False
+        if (block.index != parent.height + 1 or block.compute_hash() != block.hash
+                or int(block.hash, 16) >= difficulty_target(self.difficulty)):
+            print(f"Block {block.index} rejected: invalid height or proof-of-work.")
+            return False
+
+        node = tree.add(block, block_work(self.difficulty), parent)
+        if node.work <= tree.tip.work:
+            print(f"Block {block.index} stored in a competing branch.")
+            return True
+        return self.reorganize(node)
+
+
+    def reorganize(self, node):
+        """
+        Switches the best chain to the chain ending at `node`.
 
+        Blocks of the current chain are disconnected back to the fork point with their
+        undo records, then the blocks of the new branch are connected, so a
+        reorganization of depth k costs O(k) blocks. Pending transactions are unwound
+        first and processed again at the end; those whose inputs were spent by the new
+        branch are dropped.
+
+        Every block of the new branch is validated before it becomes the tip: the
+        signatures of its transactions (see `check_transactions`), its inputs and its
+        coinbase (see `connect_block`) and the supply invariant. If one is invalid, the
+        previous chain is restored and the block is removed from the tree with the
+        blocks built on it.
+
+        Args:
+            node (BlockNode): Tip of the new best chain.
+
+        Returns:
+            bool: True if the chain was switched, False otherwise.
+        """
+        tree = self.block_tree
+        old_tip = tree.tip
+        fork = tree.fork_point(old_tip, node)
+        disconnected = tree.branch(fork, old_tip)
+        if any(old.undo is None for old in disconnected):
+            print(f"Reorganization to block {node.block.index} rejected: it reaches pruned blocks.")
+            return False
+        connected = tree.branch(fork, node)
+
+        index_transaction = self.index_transaction
+        pending = self.mempool.unwind(self.UTXO_set)
+        if pending:
+            del self.mining_fees[-len(pending):]
+        self.index_utxo = old_tip.index_utxo
+        self.index_transaction = old_tip.index_transaction
+
+        for old in reversed(disconnected):
+            self.disconnect_block(old)
+
+        switched = True
+        keys = {user.adress: user.public_key for user in self.users}
+        for new in connected:
+            try:
+                errors = check_transactions(new.block.transactions, keys)
+                if errors:
+                    raise ValidationError(f"block {new.block.index}: {errors[0]}")
+                self.link_block(new, self.connect_block(new.block))
+                self.get_money_circulation(new.block)
+            except (ValueError, RuntimeError) as error:
+                print(f"Reorganization aborted: {error}")
+                while tree.tip is not fork:
+                    self.disconnect_block(tree.tip)
+                for old in disconnected:
+                    self.link_block(old, self.connect_block(old.block))
+                tree.remove(new)
+                switched = False
+                break
+
+        self.get_money_circulation(self.blockchain[-1])
+        for transaction in pending:
+            if not transaction.process_transaction(self):
+                print(f"Pending transaction {transaction.index} dropped by the reorganization.")
+        self.index_transaction = max(self.index_transaction, index_transaction)
+
+        if switched:
+            print(f"Chain reorganized at block {fork.height}: {len(disconnected)} blocks disconnected, {len(connected)} connected.")
+            if self.archive is not None:
+                self.prune_chain()
+        return switched
+
+
+    def connect_block(self, block):
+        """
+        Applies a block to the UTXO set and records how to revert it.
+
+        Signatures are not checked here (see ChainValidator), but every spent output is
+        compared with the UTXO set: it must belong to the party spending it and hold the
+        amount the transaction claims, and the coinbase may not create more than the
+        block reward and fees.
+
+        Spent outputs are found again with the same selection rule as
+        `Transaction.select_utxos`, party by party, and new outputs get their indexes in
+        the order they were created when the block was built (regular transactions
+        first, each with its outputs then the change of the sender and of each
+        cosigner, then the coinbase).
+
+        Args:
+            block (Block): The block, following the tip of the best chain.
+
+        Returns:
+            UndoRecord: The changes made by the block.
+
+        Raises:
+            ValidationError: If the block spends an output that is not unspent or not owned
+                as claimed, a transaction does not fund its shares or the coinbase is too
+                large; the changes already made are reverted. It is a ValueError.
+        """
+        utxos = self.UTXO_set
+        undo = UndoRecord(self.index_utxo, self.index_transaction)
+        coinbases = []
+        fees = 0
+
+        try:
+            for tx in block.transactions:
+                if tx['sender'] is None:
+                    coinbases.append(tx)
+                    continue
+
+                claimed = [json.loads(utxo) for utxo in tx['sender_UTXOs']]
+                changes = []
+                for adress, share in funding_shares(tx):
+                    owned = [utxo for utxo in claimed if utxo['sender'] == adress]
+                    inputs, total_input = select_inputs(owned, share, itemgetter('amount'))
+                    if total_input < share:
+                        raise ValidationError(f"block {block.index}: {adress} does not cover its share of transaction {tx['index']}")
+                    for claim in inputs:
+                        utxo = utxos.pop(int(claim['utxo_id'][64:]))  # utxo_id is the 64-char hex txid followed by the index
+                        undo.spent.append(utxo)
+                        if utxo.utxo_id != claim['utxo_id'] or utxo.sender != adress or utxo.amount != claim['amount']:
+                            raise ValidationError(
+                                f"block {block.index}: transaction {tx['index']} spends UTXO {utxo.index} "
+                                f"as {claim['amount']} units of {adress}, but it holds {utxo.amount} units of {utxo.sender}"
+                            )
+                    changes.append((adress, total_input - share))
+
+                txid = bytes.fromhex(tx['txid'])
+                for receiver, amount in tx.get('outputs', [(tx['receiver'], tx['amount'])]):
+                    index = self.get_index_utxo()
+                    utxos.append(UTXO(txid, index, receiver, amount))
+                    undo.created.append(index)
+                for adress, change in changes:
+                    if change > 0:
+                        index = self.get_index_utxo()
+                        utxos.append(UTXO(txid, index, adress, change))
+                        undo.created.append(index)
+
+                fees += tx['mining_fee']
+                self.mining_fees.append(tx['mining_fee'])
+                undo.fees += 1
+                self.index_transaction = tx['index'] + 1
+        except KeyError as missing:
+            self.revert(undo)
+            raise ValidationError(f"block {block.index} spends UTXO {missing} which is not unspent") from None
+        except ValueError as error:
+            self.revert(undo)
+            raise ValidationError(str(error)) from None
+
+        allowed = GENESIS_AMOUNT if block.index == 0 else self.mining_reward + fees
+        issued = [tx['amount'] for tx in coinbases]
+        if not all(isinstance(amount, int) and amount > 0 for amount in issued) or sum(issued) > allowed:
+            self.revert(undo)
+            raise ValidationError(
+                f"block {block.index} creates {sum(issued)} units in its coinbase, "
+                f"more than the reward and fees ({allowed} units)"
+            )
+
+        for tx in coinbases:
+            index = self.get_index_utxo()
+            utxos.append(UTXO(bytes.fromhex(tx['txid']), index, tx['receiver'], tx['amount']))
+            undo.created.append(index)
+            undo.issued += tx['amount']
+        undo.issued -= fees
+        self.issued += undo.issued
+        self.money_in_circulation[block.timestamp] = self.issued
+        return undo
+
+
+    def disconnect_block(self, node):
+        """
+        Reverts the tip of the best chain with its undo record.
+
+        Args:
+            node (BlockNode): The tip.
+        """
+        self.revert(node.undo)
+        node.undo = None
+        self.blockchain.pop()
+        self.headers.truncate(len(self.blockchain))
+        self.index_block -= 1
+        self.money_in_circulation.pop(node.block.timestamp, None)
+        self.block_tree.tip = node.parent
+
+
+    def revert(self, undo):
+        """
+        Reverts the changes recorded in an undo record: created outputs are removed,
+        spent outputs restored and the counters reset.
+
+        Args:
+            undo (UndoRecord): The changes of a block.
+        """
+        created = set(undo.created)
+        for index in undo.created:
+            self.UTXO_set.discard(index)
+        self.UTXO_set.extend(utxo for utxo in undo.spent if utxo.index not in created)
+        self.issued -= undo.issued
+        if undo.fees:
+            del self.mining_fees[-undo.fees:]
+        self.index_utxo = undo.index_utxo
+        self.index_transaction = undo.index_transaction
+
+
+    def replay_blocks(self, blocks):
+        """
+        Applies already mined blocks to the UTXO set and appends them to the chain,
+        keeping their undo records (see `connect_block`).
+
+        Args:
+            blocks (list): Blocks following the last block of the chain.
+        """
+        tree = self.block_tree
+        for block in blocks:
+            undo = self.connect_block(block)
+            if tree.tip is None:
+                undo = None  # the genesis block cannot be disconnected
+            node = tree.add(block, block_work(self.difficulty), tree.tip)
+            self.link_block(node, undo)
+
+        if blocks:
+            self.get_money_circulation(blocks[-1])
+
+
+    def restore_snapshot(self, snapshot, blocks, headers=None):
+        """
+        Sets the state of an empty system from a snapshot, without replaying the blocks.
+
+        Args:
+            snapshot (UTXOSnapshot): The snapshot.
+            blocks (list or StoredChain): The chain up to and including the block of the
+                snapshot. A StoredChain is kept as is, so its blocks are not decoded.
+            headers (HeaderChain or None): The headers of `blocks`; those of the snapshot
+                by default. They are only rebuilt, computing the Merkle root of every
+                block, if the snapshot headers do not match the blocks.
+        """
+        self.UTXO_set = UTXOSet(snapshot.table, self.wallets)
+        self.index_utxo = snapshot.index_utxo
+        self.index_transaction = snapshot.index_transaction
+        self.issued = snapshot.issued
+        self.blockchain = blocks if isinstance(blocks, StoredChain) else list(blocks)
+        if headers is None:
+            headers = snapshot.headers
+            if headers.column('hash') != [bytes.fromhex(block.hash) for block in self.blockchain]:
+                print(f"Headers of the snapshot at block {snapshot.height} do not match the chain, rebuilding them.")
+                headers = HeaderChain()
+                for block in self.blockchain:
+                    headers.append(block)
+        self.headers = headers
+        self.index_block = len(blocks)
+        self.money_in_circulation[blocks[snapshot.height].timestamp] = snapshot.issued
+        root = self.block_tree.add(blocks[snapshot.height], block_work(self.difficulty))
+        root.index_utxo = snapshot.index_utxo
+        root.index_transaction = snapshot.index_transaction
+        self.block_tree.tip = root
+
+
+    def transaction_proof(self, height, txid):
+        """
+        Returns the Merkle proof that a transaction is in a block of the best chain,
+        which a light client checks with `HeaderChain.verify_transaction`.
+
+        Args:
+            height (int): Height of the block.
+            txid (str): Hex txid of the transaction.
+
+        Returns:
+            list: (sibling, sibling_is_left) pairs (see `merkle_proof`).
+
+        Raises:
+            ValueError: If the transaction is not in the block.
+        """
+        txids = [tx['txid'] for tx in self.blockchain[height].transactions]
+        return merkle_proof(txids, txids.index(txid))
+
+
+    def find_transaction(self, txid):
+        """
+        Finds a confirmed transaction of the best chain. With a block store the
+        txid hash table gives its block directly; otherwise the chain is scanned
+        from the tip.
+
+        Args:
+            txid (str): Hex txid.
+
+        Returns:
+            tuple or None: (height, serialized transaction), or None if it is not confirmed.
+        """
+        if self.store is not None:
+            found = self.store.find_transaction(txid)
+            if found is None or found[0] >= len(self.blockchain):
+                return None
+            height, position = found
+            return height, self.blockchain[height].transactions[position]
+        for block in reversed(self.blockchain):
+            for tx in block.transactions:
+                if tx['txid'] == txid:
+                    return block.index, tx
+        return None
+
+
+    @classmethod
+    def bootstrap(cls, blocks, snapshot_dir, mining_fee=0.5, mining_reward=3, difficulty=4, users=None):
+        """
+        Builds a system from an existing chain, starting from the latest snapshot that
+        belongs to it and replaying only the blocks after that snapshot.
+
+        Without a usable snapshot the whole chain is replayed from the genesis block.
+
+        Args:
+            blocks (list): The chain, indexed by block height.
+            snapshot_dir (str): Directory holding the snapshots.
+            mining_fee (float): Fee charged per transaction, in coins.
+            mining_reward (float): Reward given to miners per block, in coins.
+            difficulty (int): Proof-of-work difficulty.
+            users (list or None): Local users (with their keys) to register in the system.
+
+        Returns:
+            System: The restored system.
+        """
+        system = cls(mining_fee, mining_reward, difficulty, genesis=False)
+        for user in users or []:
+            system.add_user(user)  # before the replay, so the wallets are filled without a scan
+            system.index_user = max(system.index_user, user.index + 1)
+        if system.users:
+            system.first_user = system.users[0]
+
+        start = 0
+        snapshot = latest_snapshot(snapshot_dir, blocks)
+        if snapshot is not None:
+            start = snapshot.height + 1
+            system.restore_snapshot(snapshot, blocks[:start])
+            print(f"Bootstrapping from snapshot at block {snapshot.height}, replaying {len(blocks) - start} blocks.")
+
+        system.replay_blocks(blocks[start:])
+        return system
+
+
+    @classmethod
+    def open(cls, directory):
+        """
+        Opens a system kept in a block store (see `enable_store`).
+
+        Only the index files are mapped: the UTXO set comes from the latest snapshot,
+        the headers are read as raw records and only the blocks after the snapshot are
+        decoded and replayed, so opening a node does not depend on the length of its
+        chain. Earlier blocks are read from disk when they are accessed. The virtual
+        clock of a deterministic system resumes after the last block.
+
+        Args:
+            directory (str): Directory of the store.
+
+        Returns:
+            System: The restored system, still writing to the store.
+
+        Raises:
+            ValueError: If the directory holds no chain.
+        """
+        store = BlockStore(directory)
+        if not len(store):
+            store.close()
+            raise ValueError(f"{directory} holds no chain")
+        config = store.config
+        system = cls(difficulty=config['difficulty'], genesis=False, seed=config['seed'])
+        system.mining_fee = config['mining_fee']
+        system.mining_reward = config['mining_reward']
+        for data in store.users():
+            user = User.from_dict(data, system.seed)
+            system.add_user(user)
+            system.index_user = max(system.index_user, user.index + 1)
+        if system.users:
+            system.first_user = system.users[0]
+        system.store = store
+        system.enable_snapshots(os.path.join(directory, 'snapshots'), config['snapshot_interval'])
+
+        chain = StoredChain(store)
+        start = 0
+        snapshot = latest_snapshot(system.snapshot_dir, chain)
+        if snapshot is not None:
+            start = snapshot.height + 1
+            chain.length = start
+            system.restore_snapshot(snapshot, chain, store.header_chain(start))
+        else:
+            chain.length = 0
+            system.blockchain = chain
+        print(f"Opening {directory}: {len(store)} blocks, replaying {len(store) - start}.")
+        system.replay_blocks([store.load(height) for height in range(start, len(store))])
+        if start == len(store):
+            system.get_money_circulation(chain[-1])
+        system.clock.resume(chain[-1].timestamp)
+        return system
@@ -1,8 +1,69 @@
 import hashlib
 from ecdsa import SigningKey, SECP256k1
 import json
+from operator import attrgetter
+from types import MappingProxyType
 
 from UTXO import UTXO
+from Profiler import profiler
+
+
+def thawed(value):
+    """
+    Returns a copy of a frozen value with its tuples turned back into lists, as they
+    are serialized in JSON.
+    """
+    if isinstance(value, tuple):
+        return [thawed(item) for item in value]
+    return value
+
+
+def funding_shares(tx):
+    """
+    Returns how much each funding party of a serialized transaction pays: every
+    cosigner its declared contribution, the sender the rest of the amount and the fee.
+
+    Args:
+        tx (dict): The serialized transaction.
+
+    Returns:
+        list: (address, share) pairs, the sender first, shares in base units.
+
+    Raises:
+        ValueError: If a contribution is not a positive integer or the contributions
+            exceed the amount and the fee.
+    """
+    cosigners = [(adress, contribution) for adress, contribution in tx.get('cosigners', ())]
+    if not all(isinstance(value, int) and not isinstance(value, bool) and value > 0 for _, value in cosigners):
+        raise ValueError(f"transaction {tx['index']} has an invalid cosigner contribution")
+    sender_share = tx['amount'] + tx['mining_fee'] - sum(value for _, value in cosigners)
+    if sender_share < 0:
+        raise ValueError(f"transaction {tx['index']} has contributions above its amount and fee")
+    return [(tx['sender'], sender_share)] + cosigners
+
+
+def select_inputs(utxos, share, amount=attrgetter('amount')):
+    """
+    Selects the inputs one party spends: its smallest outputs first, until they cover
+    its share. Used to build transactions and to find their inputs again when a block
+    is applied, so both sides pick the same outputs.
+
+    Args:
+        utxos (iterable): Outputs of the party, in the order of the transaction data.
+        share (int): Amount to cover, in base units.
+        amount (callable): Returns the amount of an output.
+
+    Returns:
+        tuple: (selected outputs, their total).
+    """
+    selected = []
+    total = 0
+    for utxo in sorted(utxos, key=amount):
+        if total >= share:
+            break
+        selected.append(utxo)
+        total += amount(utxo)
+    return selected, total
 
 
 class Transaction:
@@ -15,97 +76,174 @@ class Transaction:
     Each transaction also includes a mining fee, and produces new UTXOs for the receiver and any change
     to the sender.
 
+    A batch transaction pays several receivers at once (`payments`) with a single fee
+    and signature, and can be funded jointly by cosigners: each cosigner declares a
+    contribution, spends only its own UTXOs to cover it, gets its own change output
+    and signs; the sender pays the rest of the amount and the fee. Single-output
+    transactions keep the original data format; batch ones add an `outputs` list and,
+    when cosigned, a `cosigners` list of (address, contribution) pairs.
+
+    Transactions use `__slots__` and keep no reference to the System: the configuration
+    they need is copied at construction and the system is passed to `process_transaction`,
+    so pickling a transaction does not drag the whole ledger along.
+
+    Transactions are immutable once built: their canonical bytes and txid are computed
+    once in the constructor, the signature can only be set once, and the result of the
+    signature check is memoized. Assigning any other attribute raises AttributeError,
+    and the memoized data is a read-only mapping whose nested values are tuples, so the
+    txid cannot go stale; `serialize_transaction` returns a fresh, mutable copy.
+
     Attributes:
         index (int): Unique identifier for the transaction.
         sender (User or None): The user initiating the transaction. None for coinbase transactions.
-        receiver (User): The user receiving the funds.
-        amount (float): The amount being transferred to the receiver.
-        system (System): Reference to the overarching system to access UTXOs and configuration.
-        mining_fee (float): The fixed fee paid to miners.
-        total_amount (float): The amount including the mining fee.
-        UTXO_set (list): The current set of unspent transaction outputs in the system.
+        receiver (User): The user receiving the funds (the first receiver of a batch).
+        amount (int): The amount being transferred to the receivers, in base units.
+        outputs (tuple): (User, amount) pairs paid by the transaction, in output order.
+        cosigners (tuple): Other users funding the transaction.
+        contributions (tuple): Amount each cosigner pays, in base units, in order.
+        mining_fee (int): The fixed fee paid to miners, in base units.
+        total_amount (int): The amount including the mining fee, in base units.
         sender_adress (str or None): The blockchain address of the sender.
-        signing_key (SigningKey or None): Sender's private key used for signing.
-        verifying_key (VerifyingKey or None): Sender's public key used for verification.
-        sender_UTXOs (list): List of UTXOs belonging to the sender.
-        signature (str or None): Digital signature of the transaction.
+        sender_UTXOs (tuple): UTXOs belonging to the sender and the cosigners.
+        signature (bytes or None): Digital signature of the transaction.
+        cosignatures (tuple or None): Signatures of the cosigners, in order.
+        data (mappingproxy): Read-only transaction data, without the txid, as hashed
+            into the txid; lists are stored as tuples.
+        canonical_bytes (bytes): Canonical JSON encoding of `data`.
         txid (str): Unique transaction ID derived from transaction data.
+        verified (bool or None): Memoized result of the signature check.
     """
-    def __init__(self, index, sender, receiver, amount, system): 
+    __slots__ = (
+        'index', 'sender', 'receiver', 'amount', 'outputs', 'cosigners', 'contributions', 'mining_fee', 'total_amount',
+        'sender_adress', 'sender_UTXOs', 'signature', 'cosignatures', 'data', 'canonical_bytes', 'txid',
+        'verified', 'frozen'
+    )
+    MEMOIZED = ('signature', 'cosignatures', 'verified')
+
+    def __init__(self, index, sender, receiver, amount, system, payments=None, cosigners=()):
         """
         Initializes a transaction object between a sender and receiver.
 
         Args:
             index (int): Unique transaction index.
             sender (User or None): User initiating the transaction (None for coinbase).
-            receiver (User): User receiving the amount.
-            amount (float): Amount to transfer (excluding mining fee).
-            system (System): Reference to the system to access shared state like UTXO set.
+            receiver (User or None): User receiving the amount; None when `payments` is given.
+            amount (int or None): Amount to transfer in base units (excluding mining fee);
+                None when `payments` is given.
+            system (System): The system providing the mining fee and the UTXO set.
+                No reference to it is kept.
+            payments (list or None): (User, amount) pairs of a batch transaction.
+            cosigners (iterable): (User, contribution) pairs of other users funding the
+                transaction, contributions in base units.
         """
+        self.frozen = False
         self.index = index
         self.sender = sender # ID emisor
-        self.receiver = receiver # ID receptor 
-        self.amount = amount
-        self.system = system
+        if payments is None:
+            self.outputs = ((receiver, amount),)
+            self.amount = amount
+        else:
+            self.outputs = tuple((user, value) for user, value in payments)
+            self.amount = sum(value for _, value in self.outputs)
+        cosigners = tuple(cosigners)
+        self.cosigners = tuple(user for user, _ in cosigners)
+        self.contributions = tuple(value for _, value in cosigners)
+        self.receiver = self.outputs[0][0] # ID receptor 
         self.mining_fee = system.mining_fee
-        self.total_amount = amount + system.mining_fee
-        self.UTXO_set = system.UTXO_set
-        # self.receiver_UTXOs = receiver.get_UTXOs()
+        self.total_amount = self.amount + system.mining_fee
+        self.signature = None
+        self.cosignatures = None
+        self.verified = None
         if sender is not None:
             self.sender_adress = sender.adress
-            self.signing_key = sender.sk
-            self.verifying_key = sender.vk
-            self.sender_UTXOs = [utxo for utxo in self.UTXO_set if utxo.sender == self.sender_adress]
-            self.signature = None
-        
+            adresses = [sender.adress] + [user.adress for user in self.cosigners]
+            with profiler.timer('utxo_lookup'):
+                self.sender_UTXOs = tuple(system.UTXO_set.owned(adresses))
         else:
             self.sender_adress = None
-            self.signing_key = None
-            self.verifying_key = None
-            self.sender_UTXOs = []
-            self.signature = None
+            self.sender_UTXOs = ()
+
+        with profiler.timer('serialization'):
+            self.data = self.get_transaction_data()
+            self.canonical_bytes = self.encode()
+            self.txid = self.create_txid()
+        self.frozen = True
 
-        self.txid = self.create_txid()
+    def __setattr__(self, name, value):
+        if getattr(self, 'frozen', False) and (name not in self.MEMOIZED or getattr(self, name) is not None):
+            raise AttributeError(f"Transaction {self.index} is immutable; cannot set {name}")
+        object.__setattr__(self, name, value)
 
-        # self.process_transaction()
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state['data'] = dict(self.data)  # a mappingproxy cannot be pickled
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, 'data', MappingProxyType(state['data']))
 
     def get_transaction_data(self):
         """
-        Retrieves structured transaction data for hashing or serialization.
+        Builds the structured transaction data for hashing or serialization. Only called
+        by the constructor; use the memoized `data` afterwards.
 
         Returns:
-            dict: Dictionary containing index, sender, receiver, amount, mining fee, and sender UTXOs.
+            mappingproxy: Read-only mapping containing index, sender, receiver, amount, mining
+            fee, and sender UTXOs, plus the outputs of a batch and the cosigners' addresses
+            when there are any. Lists are stored as tuples.
         """
-        return {
+        data = {
             'index': self.index,
             'sender': self.sender_adress,
             'receiver': self.receiver.adress,
             'amount': self.amount,
             'mining_fee': self.mining_fee,
-            'sender_UTXOs': [utxo.serialize_utxo() for utxo in self.sender_UTXOs]
+            'sender_UTXOs': tuple(utxo.serialize_utxo() for utxo in self.sender_UTXOs)
         }
+        if len(self.outputs) > 1:
+            data['outputs'] = tuple((user.adress, value) for user, value in self.outputs)
+        if self.cosigners:
+            data['cosigners'] = tuple((user.adress, value) for user, value in zip(self.cosigners, self.contributions))
+        return MappingProxyType(data)
 
     def serialize_transaction(self):
         """
-        Serializes transaction data and adds a transaction ID (txid).
+        Serializes transaction data and adds a transaction ID (txid) and, once the
+        transaction is signed, the hex signatures, so blocks can be verified by anyone
+        holding the public keys. The signatures sign the txid and are not part of it.
 
         Returns:
-            dict: Serialized transaction dictionary including txid.
+            dict: Serialized transaction dictionary including txid (a new copy of the
+            memoized data, nested lists included, so no encoding or hashing is done and
+            changing it leaves the transaction untouched).
         """
-        data = self.get_transaction_data()
-        tx_str = json.dumps(data, sort_keys=True)
-        data["txid"] = hashlib.sha256(tx_str.encode()).hexdigest()
+        data = {key: thawed(value) for key, value in self.data.items()}
+        data['txid'] = self.txid
+        if self.signature is not None:
+            data['signature'] = self.signature.hex()
+            if self.cosignatures:
+                data['cosignatures'] = [signature.hex() for signature in self.cosignatures]
         return data
 
+    def encode(self):
+        """
+        Encodes the transaction data canonically (sorted keys). Only called by the constructor.
+
+        Returns:
+            bytes: The canonical JSON encoding.
+        """
+        return json.dumps(dict(self.data), sort_keys=True).encode()
+
     def create_txid(self):
         """
-        Creates a unique transaction ID by hashing the transaction data.
+        Creates a unique transaction ID by hashing the canonical bytes.
 
         Returns:
             str: SHA-256 hash representing the transaction ID.
         """
-        tx_str = json.dumps(self.get_transaction_data(), sort_keys=True)
-        return hashlib.sha256(tx_str.encode()).hexdigest()
+        return hashlib.sha256(self.canonical_bytes).hexdigest()
     
     def validate_transaction(self):
         """
@@ -114,8 +252,14 @@ class Transaction:
         Returns:
             bool: True if the transaction is valid, False otherwise.
         """
-        sender_balance = sum(utxo.amount for utxo in self.sender_UTXOs)
-        if sender_balance < self.total_amount or self.amount <= 0:
+        valid_amounts = all(isinstance(value, int) and value > 0 for _, value in self.outputs)
+        try:
+            shares = funding_shares(self.data)
+        except ValueError:
+            valid_amounts = False
+        if not valid_amounts or any(
+                sum(utxo.amount for utxo in self.sender_UTXOs if utxo.sender == adress) < share
+                for adress, share in shares):
             print("Invalid transaction: insufficient balance or invalid amount")
             return False
 
@@ -127,91 +271,112 @@ class Transaction:
 
     def sign_transaction(self):
         """
-        Signs the transaction ID using the sender’s private key.
+        Signs the transaction ID using the sender’s private key, and the cosigners' keys.
 
         Returns:
             None
         """
         if self.sender is None:
             return None
-        self.signature = self.sender.sign_transaction(self.txid)
+        with profiler.timer('signing'):
+            self.signature = self.sender.sign_transaction(self.txid)
+            self.cosignatures = tuple(user.sign_transaction(self.txid) for user in self.cosigners)
 
     def verify_signature(self):
         """
-        Verifies the digital signature of the transaction.
+        Verifies the digital signature of the transaction. The result is memoized once
+        the transaction is signed.
 
         Returns:
             bool: True if the signature is valid or if the transaction is coinbase; False otherwise.
         """
         if self.signature is None or self.sender is None:
             return True
-        return self.sender.verify_signature(self.txid, self.signature.hex())
+        if self.verified is None:
+            with profiler.timer('verification'):
+                self.verified = (
+                    self.sender.verify_signature(self.txid, self.signature)
+                    and self.cosignatures is not None
+                    and len(self.cosignatures) == len(self.cosigners)
+                    and all(user.verify_signature(self.txid, signature)
+                            for user, signature in zip(self.cosigners, self.cosignatures))
+                )
+        return self.verified
 
 
     def select_utxos(self):
         """
-        Selects a list of UTXOs from the sender sufficient to cover the transaction total.
+        Selects, for the sender and each cosigner, its own UTXOs sufficient to cover its
+        share (see `funding_shares`).
 
         Returns:
-            tuple: (list of selected UTXOs, total amount from selected UTXOs)
+            tuple: (list of selected UTXOs, list of (address, change) pairs in funding order)
         """
-        sender_utxos = sorted(self.sender_UTXOs, key=lambda x: x.amount)
-        selected = []
-        total = 0
-
-        for utxo in sender_utxos:
-            selected.append(utxo)
-            total += utxo.amount
-            if total >= self.total_amount:
-                break
+        with profiler.timer('coin_selection'):
+            selected = []
+            changes = []
+            for adress, share in funding_shares(self.data):
+                owned = [utxo for utxo in self.sender_UTXOs if utxo.sender == adress]
+                inputs, total = select_inputs(owned, share)
+                selected.extend(inputs)
+                changes.append((adress, total - share))
 
-        return selected, total
+        return selected, changes
 
     
-    def process_transaction(self):
+    def process_transaction(self, system):
         """
-        Processes the transaction by validating, signing, updating the UTXO set,
-        and creating new UTXOs for the receiver and sender's change.
+        Processes the transaction by signing, validating, updating the UTXO set,
+        and creating new UTXOs for the receivers, in order, then the change of the sender
+        and of each cosigner.
+
+        Regular transactions are validated through the system's mempool (which caches
+        the result), rejected if an input is already spent by a pending transaction,
+        and admitted to the mempool with the outputs they spend and create.
+
+        Args:
+            system (System): The system whose UTXO set and mempool are updated.
 
         Returns:
             bool: True if the transaction is successfully processed, False otherwise.
         """
+        txid = bytes.fromhex(self.txid)
         if self.sender is None:
-            receiver_utxo = UTXO(self.txid + self.system.get_index_utxo(), self.receiver, self.amount)
-            self.UTXO_set.append(receiver_utxo)
+            receiver_utxo = UTXO(txid, system.get_index_utxo(), self.receiver.adress, self.amount)
+            system.UTXO_set.append(receiver_utxo)
             return True
         else: 
 
-            if not self.validate_transaction():
+            if self.signature is None:
+                self.sign_transaction()
+            if not system.mempool.validate(self):
                 return False
-            self.sign_transaction()
             
-            selected_utxos, total_input = self.select_utxos()
+            selected_utxos, changes = self.select_utxos()
+
+            conflict = system.mempool.conflicts(selected_utxos, system.UTXO_set)
+            if conflict is not None:
+                print(f"Invalid transaction: {conflict}")
+                return False
 
             for utxo in selected_utxos:
-                self.UTXO_set.remove(utxo)
+                system.UTXO_set.remove(utxo)
 
             new_utxos = []
 
-            receiver_utxo = UTXO(self.txid + self.system.get_index_utxo(), self.receiver, self.amount)
-            new_utxos.append(receiver_utxo)
+            for receiver, amount in self.outputs:
+                receiver_utxo = UTXO(txid, system.get_index_utxo(), receiver.adress, amount)
+                new_utxos.append(receiver_utxo)
 
 
-            change = round(total_input - self.total_amount, 1)  # Avoid float issues
-            if change > 0:
-                change_utxo = UTXO(self.txid + self.system.get_index_utxo(), self.sender, change)
-                # change_utxo = UTXO(self.txid, self.sender, change)
+            for adress, change in changes:
+                if change > 0:
+                    change_utxo = UTXO(txid, system.get_index_utxo(), adress, change)
+                    new_utxos.append(change_utxo)
 
-                new_utxos.append(change_utxo)
-                # self.sender.add_UTXO(change_utxo)
 
-
-            self.UTXO_set.extend(new_utxos) 
-            self.system.mining_fees.append(self.mining_fee)
+            system.UTXO_set.extend(new_utxos) 
+            system.mining_fees.append(self.mining_fee)
+            system.mempool.add(self, selected_utxos, new_utxos)
 
             return True
-
-
-        
-    
-        
\ No newline at end of file
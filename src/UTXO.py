@@ -8,24 +8,41 @@ class UTXO:
     Each UTXO records a certain amount of cryptocurrency that can be used as input for future transactions.
     UTXOs are associated with a user's address and are uniquely identified.
 
+    The class uses `__slots__` and keeps no reference to the owning user or system: the
+    raw transaction hash is shared by every output of a transaction and the owner address
+    is the same string object held by the User, so each UTXO only pays for its own fields.
+
     Attributes:
-        utxo_id (str): Unique identifier of the UTXO, typically derived from the transaction.
+        txid (bytes): Raw SHA-256 hash of the transaction that created the UTXO.
+        index (int): System-wide output index, unique per UTXO.
         sender (str): Address of the user who owns this UTXO.
-        amount (float): Value of the UTXO available for spending.
+        amount (int): Value of the UTXO available for spending, in base units.
+        utxo_id (str): Unique identifier of the UTXO (hex txid followed by the index).
     """
-    def __init__(self, utxo_id, user, amount):
+    __slots__ = ('txid', 'index', 'sender', 'amount')
+
+    def __init__(self, txid, index, adress, amount):
         """
         Initializes a new UTXO instance with a unique ID, owner, and amount.
 
         Args:
-            utxo_id (str): Unique identifier for the UTXO.
-            user (User): The user object who owns the UTXO.
-            amount (float): The amount of cryptocurrency associated with this UTXO.
+            txid (bytes): Raw hash of the transaction creating the UTXO.
+            index (int): System-wide output index.
+            adress (str): Address of the user who owns the UTXO.
+            amount (int): The amount of cryptocurrency associated with this UTXO, in base units.
         """
-        self.utxo_id = utxo_id
-        self.sender = user.adress
+        self.txid = txid
+        self.index = index
+        self.sender = adress
         self.amount = amount
 
+    @property
+    def utxo_id(self):
+        """
+        str: Unique identifier of the UTXO, the hex txid followed by the output index.
+        """
+        return self.txid.hex() + str(self.index)
+
     def serialize_utxo(self):
         """
         Serializes the UTXO data into a JSON-formatted string.
@@ -0,0 +1,274 @@
+from Wallet import Wallet
+from UTXOTable import UTXOTable, np
+
+
+LEDGER_THRESHOLD = 10_000
+
+
+class UTXOSet:
+    """
+    The set of unspent outputs, keyed by their system-wide index.
+
+    Behaves like the list it replaces (append, extend, remove, iteration in insertion
+    order, len) but is backed by a dict, so removing an output and checking whether
+    one is still unspent are O(1).
+
+    Every change is also applied to the wallet of the owner address, if one is
+    watched, so the outputs and balance of a user are available without a scan.
+
+    Bulk queries (the total supply, the balance of every address) run as Python loops
+    on small sets. The first time one is made on a set of at least LEDGER_THRESHOLD
+    outputs, and NumPy is installed, a columnar ledger (a UTXOTable of owner ids and
+    amounts) is built and then kept up to date with every change, so later queries
+    are a single vector sum or grouped reduction over its columns.
+
+    Attributes:
+        utxos (dict): UTXO index to UTXO, in insertion order.
+        wallets (dict): Address to the Wallet watching it.
+        table (UTXOTable or None): Columnar ledger mirroring the set, once built.
+
+    Methods:
+        append(utxo): Adds an output.
+        extend(utxos): Adds several outputs.
+        remove(utxo): Removes an output, raising ValueError if it is not in the set.
+        pop(index): Removes and returns the output with the given index.
+        get(index): Returns the output with the given index, or None.
+        discard(index): Removes the output with the given index if it is unspent.
+        watch(adress): Returns the wallet of an address, creating it if needed.
+        owned(adresses): Returns the outputs owned by some addresses.
+        balance(adress): Returns the balance of an address.
+        total(): Returns the sum of every output.
+        balances(): Returns the balance of every address owning outputs.
+        ledger(): Returns the columnar ledger, building it on large sets.
+    """
+    __slots__ = ('utxos', 'wallets', 'table')
+
+    def __init__(self, utxos=(), wallets=None):
+        """
+        Initializes the set.
+
+        Args:
+            utxos (iterable): Initial outputs.
+            wallets (dict or None): Wallets to keep up to date, by address; they are
+                reset and filled with the initial outputs.
+        """
+        self.utxos = {}
+        self.wallets = wallets if wallets is not None else {}
+        self.table = None
+        for wallet in self.wallets.values():
+            wallet.reset()
+        self.extend(utxos)
+
+    def __len__(self):
+        return len(self.utxos)
+
+    def __iter__(self):
+        return iter(self.utxos.values())
+
+    def __contains__(self, utxo):
+        """
+        Checks whether an output (or an output index) is unspent.
+
+        An output is matched on its txid too, since after a chain reorganization the
+        same index can belong to an output of another block.
+        """
+        if isinstance(utxo, int):
+            return utxo in self.utxos
+        found = self.utxos.get(utxo.index)
+        return found is not None and found.txid == utxo.txid
+
+    def __getitem__(self, position):
+        return list(self.utxos.values())[position]
+
+    def append(self, utxo):
+        """
+        Adds an output.
+
+        Args:
+            utxo (UTXO): The output.
+        """
+        if self.wallets:
+            previous = self.utxos.get(utxo.index)
+            if previous is not None and previous.sender in self.wallets:
+                self.wallets[previous.sender].discard(previous.index)
+            wallet = self.wallets.get(utxo.sender)
+            if wallet is not None:
+                wallet.add(utxo)
+        if self.table is not None:
+            if utxo.index in self.utxos:
+                self.table.remove(utxo.index)
+            self.table.add(utxo)
+        self.utxos[utxo.index] = utxo
+
+    def extend(self, utxos):
+        """
+        Adds several outputs.
+
+        Args:
+            utxos (iterable): The outputs.
+        """
+        if self.wallets or self.table is not None:
+            for utxo in utxos:
+                self.append(utxo)
+        else:
+            for utxo in utxos:
+                self.utxos[utxo.index] = utxo
+
+    def remove(self, utxo):
+        """
+        Removes an output.
+
+        Args:
+            utxo (UTXO): The output.
+
+        Raises:
+            ValueError: If the output is not in the set.
+        """
+        if self.discard(utxo.index) is None:
+            raise ValueError(f"UTXO {utxo.index} is not unspent")
+
+    def pop(self, index):
+        """
+        Removes and returns the output with the given index.
+
+        Args:
+            index (int): The UTXO index.
+
+        Returns:
+            UTXO: The removed output.
+
+        Raises:
+            KeyError: If the output is not in the set.
+        """
+        utxo = self.discard(index)
+        if utxo is None:
+            raise KeyError(index)
+        return utxo
+
+    def get(self, index):
+        """
+        Returns the output with the given index.
+
+        Args:
+            index (int): The UTXO index.
+
+        Returns:
+            UTXO or None: The output, or None if it is spent or unknown.
+        """
+        return self.utxos.get(index)
+
+    def discard(self, index):
+        """
+        Removes the output with the given index, if it is unspent.
+
+        Args:
+            index (int): The UTXO index.
+
+        Returns:
+            UTXO or None: The removed output, or None if it was not in the set.
+        """
+        utxo = self.utxos.pop(index, None)
+        if utxo is not None:
+            if self.wallets:
+                wallet = self.wallets.get(utxo.sender)
+                if wallet is not None:
+                    wallet.discard(index)
+            if self.table is not None:
+                self.table.remove(index)
+        return utxo
+
+    def watch(self, adress):
+        """
+        Returns the wallet of an address, creating it if the address is not watched yet.
+
+        A new wallet is filled with one scan of the set, which is skipped while the
+        set is empty (e.g. when users are registered before the chain is replayed).
+
+        Args:
+            adress (str): The address.
+
+        Returns:
+            Wallet: The wallet.
+        """
+        wallet = self.wallets.get(adress)
+        if wallet is None:
+            wallet = self.wallets[adress] = Wallet(adress)
+            for utxo in self.utxos.values():
+                if utxo.sender == adress:
+                    wallet.add(utxo)
+        return wallet
+
+    def owned(self, adresses):
+        """
+        Returns the outputs owned by some addresses, address by address, each in the
+        order of the set. Watched addresses are read from their wallets; the set is
+        scanned only if one of them is not watched.
+
+        Args:
+            adresses (iterable): The addresses.
+
+        Returns:
+            list: The outputs.
+        """
+        adresses = list(dict.fromkeys(adresses))
+        wallets = [self.wallets.get(adress) for adress in adresses]
+        if None not in wallets:
+            return [utxo for wallet in wallets for utxo in wallet.utxos.values()]
+        return [utxo for adress in adresses for utxo in self.utxos.values() if utxo.sender == adress]
+
+    def balance(self, adress):
+        """
+        Returns the sum of the outputs owned by an address, from its wallet if it is
+        watched.
+
+        Args:
+            adress (str): The address.
+
+        Returns:
+            int: The balance, in base units.
+        """
+        wallet = self.wallets.get(adress)
+        if wallet is not None:
+            return wallet.balance
+        return sum(utxo.amount for utxo in self.utxos.values() if utxo.sender == adress)
+
+    def ledger(self):
+        """
+        Returns the columnar ledger of the set, building it on the first call once the
+        set has LEDGER_THRESHOLD outputs; below that, or without NumPy, loops over the
+        outputs are faster than keeping the columns in sync.
+
+        Returns:
+            UTXOTable or None: The ledger, or None if the set is too small.
+        """
+        if self.table is None and np is not None and len(self.utxos) >= LEDGER_THRESHOLD:
+            self.table = UTXOTable.from_utxos(self.utxos.values())
+            self.table.row_map()  # built now rather than on the first change
+        return self.table
+
+    def total(self):
+        """
+        Returns the sum of every output in the set, e.g. to check the money supply.
+
+        Returns:
+            int: The total, in base units.
+        """
+        table = self.ledger()
+        if table is not None:
+            return table.total()
+        return sum(utxo.amount for utxo in self.utxos.values())
+
+    def balances(self):
+        """
+        Returns the balance of every address owning outputs, watched or not.
+
+        Returns:
+            dict: Address to balance, in base units.
+        """
+        table = self.ledger()
+        if table is not None:
+            return {adress: balance for adress, balance in table.balances().items() if balance}
+        balances = {}
+        for utxo in self.utxos.values():
+            balances[utxo.sender] = balances.get(utxo.sender, 0) + utxo.amount
+        return balances
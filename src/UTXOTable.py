@@ -0,0 +1,264 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+from UTXO import UTXO
+
+
+TXID_SIZE = 32
+EXACT_FLOAT = 2 ** 53
+
+
+class UTXOTable:
+    """
+    Columnar, array-backed store of unspent transaction outputs.
+
+    Instead of one Python object per UTXO, every field lives in a contiguous column:
+    raw transaction hashes in a bytearray, output indexes, owner ids and amounts in
+    typed arrays. Owner addresses are interned once and referenced by a small integer id.
+
+    Rows are removed by moving the last row into the freed slot, so every column
+    stays dense and removal is O(1). The output index to row mapping is only built
+    the first time a row is looked up, so tables built in bulk for aggregation do
+    not pay for it.
+
+    Attributes:
+        txids (bytearray): Raw 32-byte transaction hash of each row.
+        indexes (array): System-wide output index of each row.
+        owners (array): Owner id of each row.
+        amounts (array): Amount of each row in base units.
+        adresses (list): Owner id to address.
+        owner_ids (dict): Address to owner id.
+        rows (dict or None): Output index to row number, built on first lookup.
+
+    Methods:
+        add(utxo): Appends a UTXO object.
+        add_row(txid, index, adress, amount): Appends a row from raw fields.
+        remove(index): Removes the UTXO with the given output index.
+        get(index): Rebuilds the UTXO object with the given output index.
+        balance(adress): Returns the balance of one address.
+        balances(): Returns the balance of every address.
+        total(): Returns the sum of all amounts.
+        to_numpy(): Returns the columns as NumPy arrays.
+        from_utxos(utxos): Builds a table from UTXO objects.
+    """
+    def __init__(self):
+        """
+        Initializes an empty table.
+        """
+        self.txids = bytearray()
+        self.indexes = array('q')
+        self.owners = array('i')
+        self.amounts = array('q')
+        self.adresses = []
+        self.owner_ids = {}
+        self.rows = None
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __contains__(self, index):
+        return index in self.row_map()
+
+    def __iter__(self):
+        for row in range(len(self.indexes)):
+            yield self.utxo_at(row)
+
+    def owner_id(self, adress):
+        """
+        Returns the id of an address, interning it on first use.
+
+        Args:
+            adress (str): The owner address.
+
+        Returns:
+            int: The owner id.
+        """
+        owner = self.owner_ids.get(adress)
+        if owner is None:
+            owner = len(self.adresses)
+            self.owner_ids[adress] = owner
+            self.adresses.append(adress)
+        return owner
+
+    def row_map(self):
+        """
+        Returns the output index to row mapping, building it if needed.
+
+        Returns:
+            dict: Mapping from output index to row number.
+        """
+        if self.rows is None:
+            self.rows = {index: row for row, index in enumerate(self.indexes)}
+        return self.rows
+
+    def add(self, utxo):
+        """
+        Appends a UTXO object to the table.
+
+        Args:
+            utxo (UTXO): The output to store.
+        """
+        self.add_row(utxo.txid, utxo.index, utxo.sender, utxo.amount)
+
+    def add_row(self, txid, index, adress, amount):
+        """
+        Appends a row from raw fields.
+
+        Args:
+            txid (bytes): Raw 32-byte transaction hash.
+            index (int): System-wide output index.
+            adress (str): Owner address.
+            amount (int): Amount in base units.
+        """
+        if self.rows is not None:
+            if index in self.rows:
+                raise ValueError(f"UTXO {index} is already in the table")
+            self.rows[index] = len(self.indexes)
+        self.txids += txid
+        self.indexes.append(index)
+        self.owners.append(self.owner_id(adress))
+        self.amounts.append(amount)
+
+    def remove(self, index):
+        """
+        Removes the UTXO with the given output index.
+
+        Args:
+            index (int): System-wide output index.
+        """
+        rows = self.row_map()
+        row = rows.pop(index)
+        last = len(self.indexes) - 1
+        if row != last:
+            moved = self.indexes[last]
+            self.txids[row * TXID_SIZE:(row + 1) * TXID_SIZE] = self.txids[last * TXID_SIZE:]
+            self.indexes[row] = moved
+            self.owners[row] = self.owners[last]
+            self.amounts[row] = self.amounts[last]
+            rows[moved] = row
+        del self.txids[last * TXID_SIZE:]
+        self.indexes.pop()
+        self.owners.pop()
+        self.amounts.pop()
+
+    def utxo_at(self, row):
+        """
+        Rebuilds the UTXO object stored at a row.
+
+        Args:
+            row (int): Row number.
+
+        Returns:
+            UTXO: The rebuilt output.
+        """
+        return UTXO(
+            bytes(self.txids[row * TXID_SIZE:(row + 1) * TXID_SIZE]),
+            self.indexes[row],
+            self.adresses[self.owners[row]],
+            self.amounts[row]
+        )
+
+    def get(self, index):
+        """
+        Rebuilds the UTXO object with the given output index.
+
+        Args:
+            index (int): System-wide output index.
+
+        Returns:
+            UTXO: The rebuilt output.
+        """
+        return self.utxo_at(self.row_map()[index])
+
+    def balance(self, adress):
+        """
+        Returns the balance of an address.
+
+        Args:
+            adress (str): The owner address.
+
+        Returns:
+            int: Sum of the amounts owned by the address, in base units.
+        """
+        owner = self.owner_ids.get(adress)
+        if owner is None:
+            return 0
+        if np is not None:
+            owners, amounts = self.numpy_columns()
+            return int(amounts[owners == owner].sum())
+        return sum(a for o, a in zip(self.owners, self.amounts) if o == owner)
+
+    def balances(self):
+        """
+        Returns the balance of every address seen by the table.
+
+        Returns:
+            dict: Mapping from address to balance in base units.
+        """
+        if np is not None:
+            owners, amounts = self.numpy_columns()
+            if self.total() < EXACT_FLOAT:
+                # one grouped reduction; float64 sums are exact below 2**53
+                totals = np.bincount(owners, weights=amounts, minlength=len(self.adresses)).astype(np.int64)
+            else:
+                totals = np.zeros(len(self.adresses), dtype=np.int64)
+                np.add.at(totals, owners, amounts)
+            return {adress: int(total) for adress, total in zip(self.adresses, totals.tolist())}
+        totals = [0] * len(self.adresses)
+        for owner, amount in zip(self.owners, self.amounts):
+            totals[owner] += amount
+        return dict(zip(self.adresses, totals))
+
+    def total(self):
+        """
+        Returns the sum of every amount in the table.
+
+        Returns:
+            int: Total amount in base units.
+        """
+        if np is not None:
+            return int(np.frombuffer(self.amounts, dtype=np.int64).sum())
+        return sum(self.amounts)
+
+    def numpy_columns(self):
+        """
+        Returns zero-copy NumPy views of the owner and amount columns.
+        """
+        return np.frombuffer(self.owners, dtype=np.int32), np.frombuffer(self.amounts, dtype=np.int64)
+
+    def to_numpy(self):
+        """
+        Returns the columns as NumPy arrays.
+
+        Returns:
+            dict: Arrays 'txid' (n x 32 uint8), 'index', 'owner' and 'amount' (base units).
+        """
+        if np is None:
+            raise ImportError("NumPy is required for to_numpy()")
+        owners, amounts = self.numpy_columns()
+        return {
+            'txid': np.frombuffer(bytes(self.txids), dtype=np.uint8).reshape(-1, TXID_SIZE),
+            'index': np.frombuffer(self.indexes, dtype=np.int64).copy(),
+            'owner': owners.copy(),
+            'amount': amounts.copy(),
+        }
+
+    @classmethod
+    def from_utxos(cls, utxos):
+        """
+        Builds a table from an iterable of UTXO objects.
+
+        Args:
+            utxos (iterable): The outputs to store.
+
+        Returns:
+            UTXOTable: The new table.
+        """
+        table = cls()
+        for utxo in utxos:
+            table.add(utxo)
+        return table
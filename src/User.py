@@ -1,5 +1,5 @@
 from hashlib import sha256
-from ecdsa import SigningKey, SECP256k1, BadSignatureError
+from ecdsa import SigningKey, VerifyingKey, SECP256k1, BadSignatureError
 
 class User:
     """
@@ -10,32 +10,127 @@ class User:
 
     Attributes:
         index (int): Unique ID for the user.
-        sk (SigningKey): ECDSA private key for signing messages.
+        sk (SigningKey or None): ECDSA private key for signing messages; None for a
+            watch-only user restored from public data.
         vk (VerifyingKey): ECDSA public key for verifying signatures.
-        private_key (str): Hex representation of the private key.
+        private_key (str or None): Hex representation of the private key.
         public_key (str): Hex representation of the public key.
         adress (str): SHA-256 hash of the public key, used as the user’s blockchain address.
+        wallet (Wallet or None): Outputs and balance of the address, tracked incrementally
+            once the user is added to a system.
     """
-    def __init__(self, index):
+    def __init__(self, index, seed=None):
         """
         Initializes a new user with a unique index, key pair, and blockchain address.
 
         Args:
             index (int): The unique identifier of the user.
+            seed (int, str or None): When given, the key pair is derived from the seed and
+                the index instead of fresh entropy, so the same seed gives the same users.
         """
         self.index = index
-        self.private_key, self.public_key = self.create_keys()
+        self.private_key, self.public_key = self.create_keys(seed)
         self.adress = self.create_adress()
+        self.wallet = None
 
 
-    def create_keys(self):
+    @classmethod
+    def from_keys(cls, index, public_key, private_key=None):
+        """
+        Restores a user from exported key data.
+
+        Args:
+            index (int): The unique identifier of the user.
+            public_key (str): Hex representation of the public key.
+            private_key (str or None): Hex representation of the private key. Without it
+                the user is watch-only: balances work but it cannot sign.
+
+        Returns:
+            User: The restored user.
+
+        Raises:
+            ValueError: If the private key does not match the public key.
+        """
+        user = cls.__new__(cls)
+        user.index = index
+        if private_key is not None:
+            user.sk = SigningKey.from_string(bytes.fromhex(private_key), SECP256k1, hashfunc=sha256)
+            user.vk = user.sk.verifying_key
+            if user.vk.to_string().hex() != public_key:
+                raise ValueError(f"Private key of user {index} does not match its public key")
+        else:
+            user.sk = None
+            user.vk = VerifyingKey.from_string(bytes.fromhex(public_key), SECP256k1, hashfunc=sha256)
+        user.private_key = private_key
+        user.public_key = public_key
+        user.adress = user.create_adress()
+        user.wallet = None
+        return user
+
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        """
+        Restores a user from `to_dict` output. Without a private key, a user of a
+        deterministic system derives its keys again from the seed; otherwise it is
+        watch-only.
+
+        Args:
+            data (dict): The fields written by `to_dict`.
+            seed (int, str or None): Seed of the system the user belongs to.
+
+        Returns:
+            User: The restored user.
+
+        Raises:
+            ValueError: If the keys do not match the stored address.
+        """
+        if data['private_key'] is None and seed is not None:
+            user = cls(data['index'], seed=seed)
+            if user.adress != data['adress']:
+                user = cls.from_keys(data['index'], data['public_key'])
+        else:
+            user = cls.from_keys(data['index'], data['public_key'], data['private_key'])
+        if user.adress != data['adress']:
+            raise ValueError(f"User {data['index']} does not match its address")
+        return user
+
+
+    def to_dict(self, private_key=False):
+        """
+        Returns the data needed to restore the user.
+
+        Args:
+            private_key (bool): Whether to include the private key.
+
+        Returns:
+            dict: Index, public key, address and private key (or None).
+        """
+        return {
+            'index': self.index,
+            'public_key': self.public_key,
+            'adress': self.adress,
+            'private_key': self.private_key if private_key else None,
+        }
+
+
+    def create_keys(self, seed=None):
         """
         Generates an ECDSA key pair (SECP256k1) for the user.
 
+        Args:
+            seed (int, str or None): Seed for deterministic key derivation. The secret
+                exponent is SHA-256(seed:index) reduced into the curve order.
+
         Returns:
             tuple: (private_key (str), public_key (str)) in hexadecimal format.
         """
-        self.sk = SigningKey.generate(SECP256k1, hashfunc=sha256)
+        if seed is None:
+            self.sk = SigningKey.generate(SECP256k1, hashfunc=sha256)
+        else:
+            digest = sha256(f"{seed}:{self.index}".encode()).digest()
+            secexp = int.from_bytes(digest, 'big') % (SECP256k1.order - 1) + 1
+            self.sk = SigningKey.from_secret_exponent(secexp, SECP256k1, hashfunc=sha256)
         self.vk = self.sk.verifying_key
         private_key = self.sk.to_string().hex()
         public_key = self.vk.to_string().hex()
@@ -56,26 +151,37 @@ class User:
         """
         Calculates the total balance available to the user based on the current UTXO set.
 
+        Reads the wallet of the address when the set watches it, so it costs O(1)
+        instead of a scan of the set.
+
         Args:
-            UTXO_set (list): List of all unspent transaction outputs in the system.
+            UTXO_set (UTXOSet): All unspent transaction outputs in the system.
 
         Returns:
-            float: Sum of amounts for UTXOs associated with this user's address.
+            int: Sum of amounts for UTXOs associated with this user's address, in base units.
         """
-        return sum(utxo.amount for utxo in UTXO_set if utxo.sender == self.adress)
+        return UTXO_set.balance(self.adress)
 
 
     def sign_transaction(self, message):
         """
         Signs a message using the user's private key.
 
+        The nonce is derived from the key and the message (RFC 6979), so the same
+        message always gets the same signature.
+
         Args:
             message (str): The message to be signed.
 
         Returns:
             bytes: The digital signature.
+
+        Raises:
+            ValueError: If the user has no private key.
         """
-        return self.sk.sign(message.encode(), hashfunc=sha256)
+        if self.sk is None:
+            raise ValueError(f"User {self.index} is watch-only and cannot sign")
+        return self.sk.sign_deterministic(message.encode(), hashfunc=sha256)
     
     def verify_signature(self, message, signature):
         """
@@ -83,13 +189,15 @@ class User:
 
         Args:
             message (str): The original message.
-            signature (str): The hexadecimal representation of the signature to verify.
+            signature (bytes or str): The signature, raw or as hexadecimal.
 
         Returns:
             bool: True if the signature is valid, False otherwise.
         """
+        if isinstance(signature, str):
+            signature = bytes.fromhex(signature)
         try:
-            return self.vk.verify(bytes.fromhex(signature), message.encode())
+            return self.vk.verify(signature, message.encode())
         except BadSignatureError:
             return False
     
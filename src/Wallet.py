@@ -0,0 +1,89 @@
+class Wallet:
+    """
+    The unspent outputs and balance of one address, kept up to date by the UTXO set.
+
+    A wallet is registered with `UTXOSet.watch`; from then on every output added to or
+    removed from the set for its address is mirrored here, whatever the cause (a new
+    transaction, a mined or replayed block, a reorganization, an unwound mempool or a
+    restored snapshot), so reading a balance or selecting coins never scans the set.
+    The mempool records which of the outputs are spent or created by pending
+    transactions.
+
+    Attributes:
+        adress (str): The address.
+        utxos (dict): UTXO index to UTXO, the unspent outputs of the address in the order
+            of the UTXO set, including those created by pending transactions.
+        balance (int): Sum of `utxos`, in base units.
+        pending (dict): UTXO index to UTXO, outputs of the address spent by pending
+            transactions (no longer in `utxos`).
+        unconfirmed (set): Indexes of the outputs in `utxos` created by pending transactions.
+
+    Methods:
+        add(utxo): Adds an output.
+        discard(index): Removes an output, if present.
+        reset(): Forgets every output.
+        confirmed_balance(): Returns the balance as of the last block.
+    """
+    __slots__ = ('adress', 'utxos', 'balance', 'pending', 'unconfirmed')
+
+    def __init__(self, adress):
+        """
+        Initializes an empty wallet.
+
+        Args:
+            adress (str): The address.
+        """
+        self.adress = adress
+        self.utxos = {}
+        self.balance = 0
+        self.pending = {}
+        self.unconfirmed = set()
+
+    def __len__(self):
+        return len(self.utxos)
+
+    def add(self, utxo):
+        """
+        Adds an output.
+
+        Args:
+            utxo (UTXO): The output, owned by the address.
+        """
+        previous = self.utxos.get(utxo.index)
+        if previous is not None:
+            self.balance -= previous.amount
+        self.utxos[utxo.index] = utxo
+        self.balance += utxo.amount
+
+    def discard(self, index):
+        """
+        Removes an output, if the wallet has it.
+
+        Args:
+            index (int): The UTXO index.
+        """
+        utxo = self.utxos.pop(index, None)
+        if utxo is not None:
+            self.balance -= utxo.amount
+
+    def reset(self):
+        """
+        Forgets every output, e.g. before the UTXO set is rebuilt from a snapshot.
+        """
+        self.utxos = {}
+        self.balance = 0
+        self.pending = {}
+        self.unconfirmed = set()
+
+    def confirmed_balance(self):
+        """
+        Returns the balance as of the last block, ignoring pending transactions.
+
+        Costs O(pending outputs) of the address.
+
+        Returns:
+            int: The balance, in base units.
+        """
+        received = sum(self.utxos[index].amount for index in self.unconfirmed if index in self.utxos)
+        spent = sum(utxo.amount for utxo in self.pending.values() if utxo.index not in self.unconfirmed)
+        return self.balance - received + spent
@@ -0,0 +1,54 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The modules live flat in src/ and import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from System import System
+from Amount import to_units
+
+
+N_USERS = 5
+
+
+def build(n_blocks, branch='a', seed=0):
+    """
+    Builds a seeded system: the same `seed` gives the same genesis block and users, and
+    `branch` seeds the payments, so systems built with different branches fork after
+    the genesis block.
+    """
+    system = System(difficulty=1, seed=seed)
+    for _ in range(N_USERS - 1):
+        system.create_user()
+    extend(system, n_blocks, random.Random(branch))
+    return system
+
+
+def extend(system, n_blocks, rng):
+    """
+    Mines `n_blocks` blocks of three random payments each.
+    """
+    for _ in range(n_blocks):
+        for _ in range(3):
+            sender, receiver = rng.sample(system.users, 2)
+            system.send_transaction(sender, receiver, to_units(rng.choice([0.5, 1, 2.5])))
+        system.mine_block(rng.choice(system.users))
+
+
+@pytest.fixture
+def chain():
+    """
+    Factory of seeded systems: `chain(n_blocks, branch='a', seed=0)`.
+    """
+    return build
+
+
+@pytest.fixture
+def extend_chain():
+    """
+    Mines more seeded blocks on a system: `extend_chain(system, n_blocks, rng)`.
+    """
+    return extend
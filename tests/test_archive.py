@@ -0,0 +1,25 @@
+import pytest
+
+from Archive import BlockArchive
+
+
+def test_reused_directory_serves_own_bodies(tmp_path, chain):
+    first, second = chain(8, 'a'), chain(8, 'b')
+    first.enable_pruning(str(tmp_path), keep=2)
+    second.enable_pruning(str(tmp_path), keep=2)
+    for system in (first, second):
+        for block in system.blockchain:
+            assert block.compute_hash() == block.hash
+
+
+def test_corrupted_body_rejected(tmp_path, chain):
+    system = chain(4, 'a')
+    system.enable_pruning(str(tmp_path), keep=1)
+    block = system.blockchain[1]
+    system.archive.close()
+    with open(tmp_path / 'bodies.dat', 'r+b') as f:
+        offset, length, _ = BlockArchive(str(tmp_path)).offsets[block.hash]
+        f.seek(offset + length // 2)
+        f.write(b'#')
+    with pytest.raises(ValueError):
+        BlockArchive(str(tmp_path)).load(block.hash)
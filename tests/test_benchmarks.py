@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+@pytest.mark.parametrize('arguments', [
+    ['memory', '-n', '200'],
+    ['bootstrap', '-n', '20'],
+    ['determinism', '-n', '3', '--difficulty', '1'],
+    ['reorg', '-n', '12', '--depths', '1', '3'],
+    ['transactions', '-n', '5'],
+    ['batch', '-n', '5'],
+    ['wallets', '-n', '200', '--users', '5'],
+    ['validation', '-n', '10', '--workers', '1', '2'],
+    ['headers', '-n', '10'],
+    ['store', '-n', '10'],
+    ['ledger', '--sizes', '100', '--owners', '5'],
+], ids=lambda arguments: arguments[0])
+def test_benchmark_runs(arguments):
+    result = subprocess.run(
+        [sys.executable, 'Benchmarks.py', *arguments], cwd=SRC, capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,49 @@
+from Block import Block
+from NonceSearch import NonceSearch, difficulty_target
+
+
+def blocks_of(system):
+    return [(block.hash, block.nonce, block.extranonce, block.timestamp) for block in system.blockchain]
+
+
+def test_same_seed_same_chain(chain):
+    first, second = chain(8), chain(8)
+    assert blocks_of(first) == blocks_of(second)
+    assert first.headers.to_bytes() == second.headers.to_bytes()
+    assert [user.adress for user in first.users] == [user.adress for user in second.users]
+
+
+def test_other_seed_other_chain(chain):
+    first, second = chain(3), chain(3, seed=1)
+    assert first.users[0].adress != second.users[0].adress
+    assert all(a[0] != b[0] for a, b in zip(blocks_of(first), blocks_of(second)))
+
+
+def mined(difficulty, workers=1, **options):
+    block = Block(1, [{'txid': '00' * 32}], '11' * 32, 'fixed')
+    search = NonceSearch(block, difficulty, **options)
+    search.run(workers)
+    return block, search
+
+
+def test_nonce_search_is_sequential():
+    block, search = mined(2)
+    assert block.extranonce == 0
+    assert search.attempts == block.nonce + 1
+    assert search.exhausted == ([(0, 0, block.nonce)] if block.nonce else [])
+    assert block.hash == block.compute_hash()
+    assert int(block.hash, 16) < difficulty_target(2)
+
+
+def test_nonce_search_rolls_extranonce():
+    block, search = mined(3, nonce_space=64, chunk_size=16)
+    assert block.extranonce > 0
+    assert search.attempts == 64 * block.extranonce + block.nonce + 1
+    assert search.exhausted[:block.extranonce] == [(extranonce, 0, 64) for extranonce in range(block.extranonce)]
+    assert block.hash == block.compute_hash()
+
+
+def test_parallel_search_finds_the_sequential_nonce():
+    sequential, _ = mined(2, chunk_size=8)
+    parallel, _ = mined(2, workers=2, chunk_size=8)
+    assert (parallel.nonce, parallel.extranonce, parallel.hash) == (sequential.nonce, sequential.extranonce, sequential.hash)
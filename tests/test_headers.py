@@ -0,0 +1,33 @@
+import pytest
+
+from HeaderChain import HeaderChain, HEADER
+from ChainValidator import ValidationError
+
+
+def replace(headers, height, field, value):
+    records = [list(record) for record in HEADER.iter_unpack(headers.to_bytes())]
+    records[height][HeaderChain.FIELDS.index(field)] = value
+    return HeaderChain.from_bytes(b''.join(HEADER.pack(*record) for record in records))
+
+
+def test_headers_verify(chain):
+    system = chain(10)
+    system.headers.verify(system.difficulty)
+    block = system.blockchain[5]
+    txid = block.transactions[-1]['txid']
+    assert system.headers.verify_transaction(5, txid, system.transaction_proof(5, txid))
+
+
+def test_forged_proof_of_work_rejected(chain):
+    system = chain(10)
+    headers = replace(system.headers, 4, 'hash', bytes(32))
+    headers = replace(headers, 5, 'previous_hash', bytes(32))
+    with pytest.raises(ValidationError, match="does not match its hash"):
+        headers.verify(system.difficulty)
+
+
+def test_forged_merkle_root_rejected(chain):
+    system = chain(10)
+    headers = replace(system.headers, 4, 'merkle_root', bytes(range(32)))
+    with pytest.raises(ValidationError, match="does not match its hash"):
+        headers.verify(system.difficulty)
@@ -0,0 +1,65 @@
+from Transaction import Transaction
+from Amount import to_units
+
+
+def utxo_state(system):
+    return sorted((utxo.index, utxo.txid, utxo.sender, utxo.amount) for utxo in system.UTXO_set)
+
+
+def wallet_state(system):
+    return {
+        adress: (
+            {index: (utxo.txid, utxo.amount) for index, utxo in wallet.utxos.items()},
+            wallet.balance, dict(wallet.pending), set(wallet.unconfirmed),
+        )
+        for adress, wallet in system.wallets.items()
+    }
+
+
+def test_double_spend_rejected(chain, capsys):
+    system = chain(2)
+    sender, receiver = system.users[0], system.users[1]
+    first = Transaction(system.index_transaction, sender, receiver, to_units(1), system)
+    second = Transaction(system.index_transaction + 1, sender, receiver, to_units(1), system)
+    assert system.submit_transaction(first)
+    spent = {utxo.index for utxo in first.select_utxos()[0]}
+    assert spent & {utxo.index for utxo in second.select_utxos()[0]}
+
+    before = utxo_state(system)
+    capsys.readouterr()
+    assert not system.submit_transaction(second)
+    assert f"is already spent by pending transaction {first.txid}" in capsys.readouterr().out
+    assert utxo_state(system) == before
+    assert second.txid not in system.mempool
+
+
+def test_child_of_unconfirmed_parent(chain):
+    system = chain(2)
+    payer, middle, payee = system.users[0], system.create_user(), system.users[2]
+    assert system.send_transaction(payer, middle, to_units(5))
+    assert system.send_transaction(middle, payee, to_units(2))  # spends the unconfirmed output
+    parent, child = list(system.mempool.entries)
+
+    block = system.mine_block(payer)
+    txids = [tx['txid'] for tx in block.transactions]
+    assert txids.index(parent) < txids.index(child)
+    assert middle.get_balance(system.UTXO_set) == to_units(5) - to_units(2) - system.mining_fee
+    assert not system.mempool
+
+
+def test_unwind_restores_utxo_set_and_wallets(chain):
+    system = chain(3)
+    before = utxo_state(system), wallet_state(system)
+    newcomer = system.create_user()
+    before_newcomer = utxo_state(system), wallet_state(system)
+    assert before_newcomer[0] == before[0]
+
+    assert system.send_transaction(system.users[0], newcomer, to_units(4))
+    assert system.send_transaction(newcomer, system.users[1], to_units(1))
+    assert system.send_many(system.users[0], [(system.users[3], to_units(1)), (system.users[4], to_units(2))])
+    assert utxo_state(system) != before_newcomer[0]
+
+    pending = system.mempool.unwind(system.UTXO_set)
+    assert len(pending) == 3
+    assert (utxo_state(system), wallet_state(system)) == before_newcomer
+    assert not system.mempool
@@ -0,0 +1,126 @@
+import http.client
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from NodeServer import (
+    NodeServer, PARSE_ERROR, INVALID_REQUEST, METHOD_NOT_FOUND, INVALID_PARAMS, SERVER_ERROR
+)
+from NodeClient import NodeClient, NodeClientError
+
+
+@pytest.fixture
+def node(chain):
+    server = NodeServer(chain(2), port=0).start()
+    client = NodeClient(server.url)
+    yield server, client
+    client.close()
+    server.stop()
+
+
+def post(server, body):
+    """
+    Posts a raw body and returns the status and the decoded response.
+    """
+    host, port = server.server_address[:2]
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request('POST', '/', body=body, headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    payload = response.read()
+    conn.close()
+    return response.status, json.loads(payload) if payload else None
+
+
+def test_batch(node):
+    server, client = node
+    count, balance, missing = client.batch([('get_block_count', []), ('get_balance', [0]), ('no_such_method', [])])
+    assert count == 3
+    assert balance == server.rpc.system.users[0].get_balance(server.rpc.system.UTXO_set)
+    assert isinstance(missing, NodeClientError) and missing.code == METHOD_NOT_FOUND
+
+
+def test_pipeline(node):
+    server, client = node
+    results = client.pipeline([('get_block', [height]) for height in range(3)] + [('get_block', [99])])
+    assert [block['hash'] for block in results[:3]] == [block.hash for block in server.rpc.system.blockchain]
+    assert isinstance(results[3], NodeClientError) and results[3].code == INVALID_PARAMS
+
+
+def test_notifications(node):
+    server, client = node
+    users = len(server.rpc.system.users)
+    assert post(server, json.dumps({'jsonrpc': '2.0', 'method': 'create_user'})) == (204, None)
+    batch = [{'jsonrpc': '2.0', 'method': 'create_user'}, {'jsonrpc': '2.0', 'method': 'get_block_count', 'id': 1}]
+    status, responses = post(server, json.dumps(batch))
+    assert status == 200 and [response['id'] for response in responses] == [1]
+    assert len(server.rpc.system.users) == users + 2
+
+
+@pytest.mark.parametrize('body, code', [
+    ('{"jsonrpc": "2.0", "method"', PARSE_ERROR),
+    ('{"jsonrpc": "1.0", "method": "get_block_count", "id": 1}', INVALID_REQUEST),
+    ('[]', INVALID_REQUEST),
+    ('{"jsonrpc": "2.0", "method": "no_such_method", "id": 1}', METHOD_NOT_FOUND),
+    ('{"jsonrpc": "2.0", "method": "get_balance", "params": [0, 1], "id": 1}', INVALID_PARAMS),
+    ('{"jsonrpc": "2.0", "method": "get_balance", "params": {"owner": 0}, "id": 1}', INVALID_PARAMS),
+    ('{"jsonrpc": "2.0", "method": "get_balance", "params": 0, "id": 1}', INVALID_PARAMS),
+    ('{"jsonrpc": "2.0", "method": "send_transaction", "params": [0, 1, 1.5], "id": 1}', INVALID_PARAMS),
+])
+def test_error_codes(node, body, code):
+    server, _ = node
+    status, response = post(server, body)
+    assert status == 200 and response['error']['code'] == code
+
+
+def test_handler_type_error_is_a_server_error(node):
+    server, client = node
+
+    def broken():
+        return 'height ' + len(server.rpc.system.blockchain)
+
+    server.rpc.methods['broken'] = broken
+    with pytest.raises(NodeClientError) as error:
+        client.call('broken')
+    assert error.value.code == SERVER_ERROR
+
+
+class DroppingHandler(BaseHTTPRequestHandler):
+    """
+    Answers the first request, then drops every connection without a response.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received += 1
+        if self.server.received > 1:
+            self.close_connection = True
+            return
+        body = json.dumps({'jsonrpc': '2.0', 'result': 0, 'id': 0}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.mark.parametrize('method, sent', [('mine_block', 1), ('get_balance', 2)])
+def test_retry_only_read_methods(method, sent):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DroppingHandler)
+    server.received = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = NodeClient(f"http://127.0.0.1:{server.server_address[1]}/")
+    try:
+        client.call('get_block_count')  # leaves a keep-alive connection in the pool
+        with pytest.raises((http.client.RemoteDisconnected, ConnectionError)):
+            client.call(method, 0)
+        assert server.received == 1 + sent
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import random
+
+import pytest
+
+from System import System
+from Block import Block
+from NonceSearch import NonceSearch
+from Amount import to_units
+
+
+def state(system):
+    """
+    Everything a block changes, to compare two systems or a system with itself.
+    """
+    return (
+        sorted((utxo.index, utxo.txid, utxo.sender, utxo.amount) for utxo in system.UTXO_set),
+        system.issued,
+        system.index_utxo,
+        system.index_transaction,
+        [block.hash for block in system.blockchain],
+        system.headers.to_bytes(),
+        {user.adress: user.get_balance(system.UTXO_set) for user in system.users},
+    )
+
+
+def mine_on(parent, transactions, timestamp):
+    block = Block(parent.index + 1, transactions, parent.hash, timestamp)
+    NonceSearch(block, 1).run()
+    return block
+
+
+@pytest.mark.parametrize('depth', [1, 3, 8])
+def test_reorg_round_trip(depth, chain, extend_chain):
+    system = chain(depth, 'a')
+    original = chain(depth, 'a')
+    rival = chain(depth + 1, 'b')
+    assert system.blockchain[1].hash != rival.blockchain[1].hash
+
+    for block in rival.blockchain[1:]:
+        system.submit_block(block)
+    assert state(system) == state(rival)
+
+    extend_chain(original, 2, random.Random('c'))
+    for block in original.blockchain[1:]:
+        system.submit_block(block)
+    assert state(system) == state(original)
+
+
+def test_reorg_matches_replay(chain):
+    system = chain(6, 'a')
+    rival = chain(9, 'b')
+    for block in rival.blockchain[1:]:
+        system.submit_block(block)
+    replayed = System.bootstrap(rival.blockchain, 'missing', mining_fee=0.5, mining_reward=3, difficulty=1)
+    assert state(system)[:3] == state(replayed)[:3]
+
+
+def rival_branch(system, first_transactions):
+    """
+    Returns a branch forking after the genesis block of `system`, longer than its chain,
+    whose first block has the given transactions and the others only a coinbase.
+    """
+    miner = system.users[1]
+    coinbase = system.create_coinbase_transaction(miner, system.mining_reward).serialize_transaction()
+    blocks = [mine_on(system.blockchain[0], first_transactions, 'fork-0')]
+    while len(blocks) < len(system.blockchain):
+        blocks.append(mine_on(blocks[-1], [coinbase], f'fork-{len(blocks)}'))
+    return blocks
+
+
+def assert_rejected(system, blocks):
+    before = state(system)
+    tip = system.block_tree.tip
+    for block in blocks:
+        system.submit_block(block)
+    assert system.block_tree.tip is tip
+    assert state(system) == before
+    assert all(block.hash not in system.block_tree for block in blocks)
+
+
+def test_inflated_coinbase_rejected(chain):
+    system = chain(3, 'a')
+    coinbase = system.create_coinbase_transaction(system.users[1], to_units(1_000_000)).serialize_transaction()
+    assert_rejected(system, rival_branch(system, [coinbase]))
+
+
+@pytest.mark.parametrize('spender, extra', [(1, 0), (0, to_units(500))], ids=['stolen', 'overstated'])
+def test_forged_input_rejected(spender, extra, chain):
+    """
+    A signed transaction spending the genesis output (owned by user 0) either as
+    another user's or with more than it holds.
+    """
+    system = chain(3, 'a')
+    user = system.users[spender]
+    genesis_output = system.blockchain[0].transactions[0]
+    forged = {
+        'index': system.index_transaction,
+        'sender': user.adress,
+        'receiver': user.adress,
+        'amount': genesis_output['amount'] + extra - system.mining_fee,
+        'mining_fee': system.mining_fee,
+        'sender_UTXOs': [json.dumps(
+            {'utxo_id': genesis_output['txid'] + '0', 'sender': user.adress, 'amount': genesis_output['amount'] + extra},
+            sort_keys=True
+        )],
+    }
+    forged['txid'] = hashlib.sha256(json.dumps(forged, sort_keys=True).encode()).hexdigest()
+    forged['signature'] = user.sign_transaction(forged['txid']).hex()
+    coinbase = system.create_coinbase_transaction(user, system.mining_reward + system.mining_fee).serialize_transaction()
+    assert_rejected(system, rival_branch(system, [coinbase, forged]))
+
+
+def test_bad_signature_rejected(chain):
+    system = chain(3, 'a')
+    donor = chain(1, 'b')
+    transactions = [dict(tx) for tx in donor.blockchain[1].transactions]
+    for tx in transactions[1:]:
+        tx['signature'] = '00' * 64
+    assert len(transactions) > 1
+    assert_rejected(system, rival_branch(system, transactions))
+
+
+def test_undo_restores_every_height(chain, extend_chain):
+    system = chain(0, 'a')
+    rng = random.Random('undo')
+    states = [state(system)]
+    for _ in range(6):
+        extend_chain(system, 1, rng)
+        states.append(state(system))
+
+    for expected in reversed(states[:-1]):
+        system.disconnect_block(system.block_tree.tip)
+        assert state(system) == expected
+
+
+def test_undo_of_replayed_blocks(chain):
+    source = chain(5, 'a')
+    system = System(difficulty=1, seed=0, genesis=False)
+    for user in source.users:
+        system.add_user(user)
+    system.replay_blocks(source.blockchain[:3])
+    expected = state(system)
+    system.replay_blocks(source.blockchain[3:])
+    assert state(system)[:4] == state(source)[:4]
+    for _ in range(3):
+        system.disconnect_block(system.block_tree.tip)
+    assert state(system) == expected
@@ -0,0 +1,92 @@
+import io
+import random
+
+import pytest
+
+import HeaderChain
+from System import System
+from Snapshot import UTXOSnapshot, SnapshotError, save_snapshot
+from ChainFile import export_system, import_system
+
+
+def state(system):
+    return (
+        sorted((utxo.index, utxo.txid, utxo.sender, utxo.amount) for utxo in system.UTXO_set),
+        system.UTXO_set.balances(),
+        system.issued,
+        system.index_utxo,
+        system.index_transaction,
+        [block.hash for block in system.blockchain],
+        system.headers.to_bytes(),
+    )
+
+
+def bootstrap(system, directory):
+    return System.bootstrap(system.blockchain, directory, mining_fee=0.5, mining_reward=3, difficulty=1)
+
+
+def test_snapshot_and_tail_match_full_replay(tmp_path, capsys, chain, extend_chain):
+    system = chain(20)
+    save_snapshot(system, str(tmp_path))
+    extend_chain(system, 10, random.Random('tail'))
+    capsys.readouterr()
+
+    restored = bootstrap(system, str(tmp_path))
+    assert "Bootstrapping from snapshot at block 20, replaying 10 blocks." in capsys.readouterr().out
+    replayed = bootstrap(system, str(tmp_path / 'missing'))
+    assert state(restored) == state(replayed) == state(system)
+
+
+@pytest.mark.parametrize('tamper, error', [
+    (lambda data: data[:-1], "failed its integrity check"),
+    (lambda data: data[:40], "is too short to be a snapshot"),
+    (lambda data: data[:60] + bytes([data[60] ^ 1]) + data[61:], "failed its integrity check"),
+], ids=['truncated', 'cut', 'altered'])
+def test_corrupted_snapshot_rejected(tmp_path, capsys, chain, tamper, error):
+    system = chain(10)
+    path = save_snapshot(system, str(tmp_path))
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(tamper(data))
+
+    with pytest.raises(SnapshotError, match=error):
+        UTXOSnapshot.read(path)
+    capsys.readouterr()
+    restored = bootstrap(system, str(tmp_path))
+    assert "Skipping snapshot" in capsys.readouterr().out
+    assert state(restored) == state(system)
+
+
+def no_pack_header(block):
+    raise AssertionError("Header rebuilt from its block")
+
+
+def test_bootstrap_keeps_snapshot_headers(tmp_path, monkeypatch, chain):
+    system = chain(30)
+    save_snapshot(system, str(tmp_path))
+    monkeypatch.setattr(HeaderChain, 'pack_header', no_pack_header)
+    restored = System.bootstrap(system.blockchain, str(tmp_path))
+    assert restored.headers.to_bytes() == system.headers.to_bytes()
+
+
+def test_import_keeps_snapshot_headers(monkeypatch, chain):
+    system = chain(30)
+    file = io.BytesIO()
+    export_system(system, file)
+    file.seek(0)
+    monkeypatch.setattr(HeaderChain, 'pack_header', no_pack_header)
+    restored = import_system(file)
+    assert restored.headers.to_bytes() == system.headers.to_bytes()
+
+
+def test_import_resumes_clock(chain):
+    system = chain(30)
+    file = io.BytesIO()
+    export_system(system, file)
+    file.seek(0)
+    restored = import_system(file)
+    system.mine_block(system.users[0])
+    restored.mine_block(restored.users[0])
+    assert restored.blockchain[-1].timestamp == system.blockchain[-1].timestamp
+    assert restored.blockchain[-1].timestamp > restored.blockchain[-2].timestamp
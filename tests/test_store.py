@@ -0,0 +1,39 @@
+from System import System
+
+
+def test_open_resumes_clock(tmp_path, chain):
+    system = chain(20)
+    system.enable_store(str(tmp_path), snapshot_interval=8)
+    timestamp = system.clock.now()  # what the next block of the original system gets
+    system.store.close()
+    opened = System.open(str(tmp_path))
+    opened.mine_block(opened.users[0])
+    assert opened.blockchain[-1].timestamp == timestamp
+    opened.store.close()
+
+
+def test_find_every_transaction(tmp_path, chain):
+    system = chain(150)
+    system.enable_store(str(tmp_path), snapshot_interval=50)
+    txids = [tx['txid'] for block in system.blockchain for tx in block.transactions]
+    assert len(txids) > 512  # the table grows past its first size
+    for height, block in enumerate(system.blockchain):
+        for tx in block.transactions:
+            assert system.find_transaction(tx['txid']) == (height, tx)
+    assert system.find_transaction('00' * 32) is None
+
+
+def test_find_after_disconnect_and_reopen(tmp_path, chain):
+    system = chain(20)
+    system.enable_store(str(tmp_path), snapshot_interval=8)
+    removed = system.blockchain[-1].transactions
+    system.disconnect_block(system.block_tree.tip)
+    assert all(system.find_transaction(tx['txid']) is None for tx in removed)
+    block = system.mine_block(system.users[1])
+    system.store.close()
+    (tmp_path / 'txids.idx').unlink()  # rebuilt from the transaction records
+    opened = System.open(str(tmp_path))
+    for tx in block.transactions:
+        assert opened.find_transaction(tx['txid']) == (block.index, tx)
+    assert all(opened.find_transaction(tx['txid']) is None for tx in removed if tx not in block.transactions)
+    opened.store.close()
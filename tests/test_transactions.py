@@ -0,0 +1,108 @@
+import pytest
+
+from Transaction import Transaction
+from ChainValidator import check_transactions
+from Amount import to_units
+
+
+def keys_of(system):
+    return {user.adress: user.public_key for user in system.users}
+
+
+def utxos_of(system, user):
+    return {utxo.index: utxo.amount for utxo in system.UTXO_set if utxo.sender == user.adress}
+
+
+def outputs_of(system, transaction):
+    txid = bytes.fromhex(transaction.txid)
+    return sorted((utxo.sender, utxo.amount) for utxo in system.UTXO_set if utxo.txid == txid)
+
+
+def test_multi_output_payment(chain):
+    system = chain(3)
+    sender, receivers = system.users[0], system.users[1:4]
+    payments = [(receiver, to_units(amount)) for receiver, amount in zip(receivers, [1, 0.25, 2])]
+    before = system.UTXO_set.balances()
+    issued = system.issued
+    fees = system.get_mining_fees()
+
+    assert system.send_many(sender, payments)
+
+    after = system.UTXO_set.balances()
+    for receiver, amount in payments:
+        assert after[receiver.adress] - before[receiver.adress] == amount
+    total = sum(amount for _, amount in payments)
+    assert before[sender.adress] - after[sender.adress] == total + system.mining_fee
+    assert system.get_mining_fees() - fees == system.mining_fee  # one fee for the batch
+    assert len(system.mempool) == 1
+
+    system.mine_block(system.users[4])
+    assert system.UTXO_set.total() == system.issued == issued + system.mining_reward
+
+
+def test_cosigners_pay_their_share_and_get_their_change(chain):
+    system = chain(3)
+    sender, first, second, receiver = (system.users[i] for i in (0, 1, 4, 2))
+    payments = [(receiver, to_units(3))]
+    cosigners = [(first, to_units(0.3)), (second, to_units(1.2))]
+    before = system.UTXO_set.balances()
+    owned = {user.adress: utxos_of(system, user) for user in (first, second)}
+
+    transaction = Transaction(system.index_transaction, sender, None, None, system, payments=payments, cosigners=cosigners)
+    assert system.submit_transaction(transaction)
+
+    after = system.UTXO_set.balances()
+    assert after[receiver.adress] - before[receiver.adress] == to_units(3)
+    assert before[sender.adress] - after[sender.adress] == to_units(3) + system.mining_fee - to_units(1.5)
+    created = outputs_of(system, transaction)
+    for user, contribution in cosigners:
+        assert before[user.adress] - after[user.adress] == contribution
+        spent = owned[user.adress].keys() - utxos_of(system, user).keys()
+        change = sum(owned[user.adress][index] for index in spent) - contribution
+        assert [amount for adress, amount in created if adress == user.adress] == ([change] if change else [])
+    assert len(transaction.cosignatures) == 2
+
+    system.mine_block(system.users[3])
+    block = system.blockchain[-1]
+    assert check_transactions(block.transactions, keys_of(system)) == []
+    assert any(tx['txid'] == transaction.txid for tx in block.transactions)
+
+
+def cosigned(system):
+    sender, first, second, receiver = (system.users[i] for i in (0, 1, 4, 2))
+    return Transaction(system.index_transaction, sender, None, None, system,
+                       payments=[(receiver, to_units(3))],
+                       cosigners=[(first, to_units(0.3)), (second, to_units(1.2))])
+
+
+@pytest.mark.parametrize('tamper', ['missing', 'wrong'])
+def test_bad_cosignature_rejected(chain, tamper):
+    system = chain(3)
+    transaction = cosigned(system)
+    sender, (first, second) = transaction.sender, transaction.cosigners
+    transaction.signature = sender.sign_transaction(transaction.txid)
+    if tamper == 'missing':
+        transaction.cosignatures = (first.sign_transaction(transaction.txid),)
+    else:
+        transaction.cosignatures = (first.sign_transaction(transaction.txid), sender.sign_transaction(transaction.txid))
+    before = sorted((utxo.index, utxo.amount) for utxo in system.UTXO_set)
+
+    assert not system.submit_transaction(transaction)
+    assert transaction.txid not in system.mempool
+    assert sorted((utxo.index, utxo.amount) for utxo in system.UTXO_set) == before
+
+
+@pytest.mark.parametrize('tamper, error', [('missing', 'is not signed'), ('wrong', 'has an invalid signature')])
+def test_bad_cosignature_rejected_by_validator(chain, tamper, error):
+    system = chain(3)
+    transaction = cosigned(system)
+    transaction.sign_transaction()
+    tx = transaction.serialize_transaction()
+    assert check_transactions([tx], keys_of(system)) == []
+
+    tx = dict(tx)
+    if tamper == 'missing':
+        tx['cosignatures'] = tx['cosignatures'][:1]
+    else:
+        tx['cosignatures'] = [tx['cosignatures'][0], tx['signature']]
+    assert check_transactions([tx], keys_of(system)) == [f"Transaction {tx['index']} {error}"]
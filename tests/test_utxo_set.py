@@ -0,0 +1,61 @@
+import hashlib
+import random
+
+import pytest
+
+import UTXOSet as utxo_set_module
+from UTXO import UTXO
+from UTXOSet import UTXOSet
+
+
+def loop_total(utxo_set):
+    return sum(utxo.amount for utxo in utxo_set)
+
+
+def loop_balances(utxo_set):
+    balances = {}
+    for utxo in utxo_set:
+        balances[utxo.sender] = balances.get(utxo.sender, 0) + utxo.amount
+    return {adress: balance for adress, balance in balances.items() if balance}
+
+
+def make_utxo(index, adress, amount):
+    return UTXO(hashlib.sha256(str(index).encode()).digest(), index, adress, amount)
+
+
+@pytest.mark.parametrize('threshold', [10, 10**9], ids=['ledger', 'loops'])
+def test_bulk_queries_match_loops(monkeypatch, threshold):
+    monkeypatch.setattr(utxo_set_module, 'LEDGER_THRESHOLD', threshold)
+    rng = random.Random(0)
+    adresses = [f"{i:064x}" for i in range(7)]
+    utxo_set = UTXOSet(make_utxo(i, rng.choice(adresses), rng.randrange(1, 10**9)) for i in range(50))
+    utxo_set.watch(adresses[0])
+
+    def check():
+        assert utxo_set.total() == loop_total(utxo_set)
+        assert utxo_set.balances() == loop_balances(utxo_set)
+
+    check()
+    assert (utxo_set.table is not None) == (threshold == 10)
+    next_index = 50
+    for _ in range(200):
+        action = rng.random()
+        if action < 0.4:
+            utxo_set.append(make_utxo(next_index, rng.choice(adresses), rng.randrange(1, 10**9)))
+            next_index += 1
+        elif action < 0.8 and len(utxo_set):
+            utxo_set.pop(rng.choice([utxo.index for utxo in utxo_set]))
+        else:
+            # a disconnected block gives its indexes back, and the next block reuses them
+            index = next_index - 1
+            if utxo_set.get(index) is not None:
+                utxo_set.pop(index)
+                utxo_set.append(make_utxo(index, rng.choice(adresses), rng.randrange(1, 10**9)))
+        check()
+
+
+def test_system_balances_use_utxo_set(chain):
+    system = chain(4)
+    system.send_transaction(system.users[0], system.users[1], 10**7)
+    expected = {f"Usuario {user.index}": [user.adress, user.get_balance(system.UTXO_set)] for user in system.users}
+    assert system.get_balances() == expected
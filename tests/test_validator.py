@@ -0,0 +1,94 @@
+import hashlib
+import json
+
+import pytest
+
+from System import System
+from Block import Block
+from ChainValidator import ChainValidator, ValidationError
+from NonceSearch import NonceSearch
+from Amount import to_units
+
+
+def mine_on(parent, transactions, timestamp, previous_hash=None):
+    block = Block(parent.index + 1, transactions, previous_hash or parent.hash, timestamp)
+    NonceSearch(block, 1).run()
+    return block
+
+
+def validate(system, blocks, workers):
+    keys = {user.adress: user.public_key for user in system.users}
+    target = System(difficulty=system.difficulty, genesis=False)
+    with ChainValidator(system.difficulty, keys, workers) as validator:
+        validator.apply(target, blocks)
+    return target
+
+
+def bad_hash(system):
+    blocks = list(system.blockchain)
+    data = blocks[2].to_dict()
+    data['nonce'] += 1
+    blocks[2] = Block.from_dict(data)
+    return blocks
+
+
+def broken_link(system):
+    blocks = list(system.blockchain[:2])
+    return blocks + [mine_on(blocks[-1], system.blockchain[2].transactions, 'forged', previous_hash='ab' * 32)]
+
+
+def forged_input(system, spender, extra):
+    """
+    A signed transaction spending the genesis output (owned by user 0) either as
+    another user's or with more than it holds.
+    """
+    user = system.users[spender]
+    genesis = system.blockchain[0]
+    output = genesis.transactions[0]
+    forged = {
+        'index': 1,
+        'sender': user.adress,
+        'receiver': user.adress,
+        'amount': output['amount'] + extra - system.mining_fee,
+        'mining_fee': system.mining_fee,
+        'sender_UTXOs': [json.dumps(
+            {'utxo_id': output['txid'] + '0', 'sender': user.adress, 'amount': output['amount'] + extra},
+            sort_keys=True
+        )],
+    }
+    forged['txid'] = hashlib.sha256(json.dumps(forged, sort_keys=True).encode()).hexdigest()
+    forged['signature'] = user.sign_transaction(forged['txid']).hex()
+    coinbase = system.create_coinbase_transaction(user, system.mining_reward + system.mining_fee).serialize_transaction()
+    return [genesis, mine_on(genesis, [coinbase, forged], 'forged')]
+
+
+def inflated_coinbase(system):
+    genesis = system.blockchain[0]
+    coinbase = system.create_coinbase_transaction(system.users[1], to_units(1_000_000)).serialize_transaction()
+    return [genesis, mine_on(genesis, [coinbase], 'forged')]
+
+
+TAMPERS = {
+    'bad hash': (bad_hash, "Block 2 does not match its hash"),
+    'broken link': (broken_link, "Block 2 does not follow block 1"),
+    'wrong owner': (lambda system: forged_input(system, 1, 0), "block 1: transaction 1 spends UTXO 0 as 100000000000 units of"),
+    'wrong amount': (lambda system: forged_input(system, 0, to_units(500)), "block 1: transaction 1 spends UTXO 0 as 150000000000 units of"),
+    'inflated coinbase': (inflated_coinbase, "block 1 creates .* units in its coinbase, more than the reward and fees"),
+}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_valid_chain_is_applied(chain, workers):
+    system = chain(4)
+    target = validate(system, system.blockchain, workers)
+    assert [block.hash for block in target.blockchain] == [block.hash for block in system.blockchain]
+    assert target.UTXO_set.balances() == system.UTXO_set.balances()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('tamper', TAMPERS)
+def test_tampered_chain_rejected(chain, tamper, workers):
+    system = chain(4)
+    forge, error = TAMPERS[tamper]
+    with pytest.raises(ValidationError, match=error):
+        validate(system, forge(system), workers)